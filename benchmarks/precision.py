@@ -0,0 +1,99 @@
+"""Validation of the single precision mode (the parameter ``dtype`` of
+:class:`ExtractionConfig`). Each connected component of each image is processed with
+float64 and float32; the report gives the number of components whose strokes differ
+(the points of strokes are compared), the largest difference of coefficients of
+polynomials of the same strokes, the time of both modes and the memory of connections.
+
+Usage: python benchmarks/precision.py [image ...]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from dataclasses import replace
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.config import DEFAULT_CONFIG  # noqa: E402
+from src.extraction import preprocessing, segmentation, component_areas  # noqa: E402
+from src.extraction import component_filter, crop_component, component_discs  # noqa: E402
+from src.extraction.connection_functions import create_connections  # noqa: E402
+from src.extraction.chain_functions import create_chains  # noqa: E402
+from src.extraction.stroke_functions import chains_to_strokes  # noqa: E402
+from src.files import read_image  # noqa: E402
+
+DTYPES = ('float64', 'float32')
+
+
+def process_component(segment, offset, config):
+    """Process the component like :meth:`extract_component` (without the partitioning)
+
+    :returns: Strokes, the time and the peak memory of the connection stage
+    """
+    start = time.perf_counter()
+    discs, _ = component_discs(segment, offset, config)
+    tracemalloc.start()
+    connections, alt_connections = create_connections(discs, config)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    strokes = chains_to_strokes(discs, create_chains(connections, alt_connections), config)
+    return strokes, time.perf_counter() - start, peak
+
+
+def compare_strokes(strokes1, strokes2):
+    """Check if both lists have strokes with the same points
+
+    :returns: The flag and the largest difference of coefficients (if the strokes are
+        the same)
+    """
+    if [str(s) for s in strokes1] != [str(s) for s in strokes2]:
+        return False, 0.0
+    differences = [np.abs(s1.vector_of_features() - s2.vector_of_features()).max()
+                   for s1, s2 in zip(strokes1, strokes2)]
+    return True, float(max(differences, default=0.0))
+
+
+def main(paths):
+    configs = [replace(DEFAULT_CONFIG, dtype=dtype) for dtype in DTYPES]
+    print(f'{"image":20s} {"components":>10s} {"different":>9s} {"max coef diff":>13s} '
+          + ' '.join(f'{"time " + d[-2:] + " [s]":>12s} {"peak " + d[-2:] + " [MB]":>12s}'
+                     for d in DTYPES))
+    total, different = 0, 0
+    for path in paths:
+        labeled, bounding_boxes = segmentation(preprocessing(read_image(path)))
+        areas = component_areas(labeled, len(bounding_boxes))
+        selected, _, _ = component_filter(bounding_boxes, areas, DEFAULT_CONFIG.min_area)
+        times = np.zeros(len(configs))
+        peaks = np.zeros(len(configs))
+        image_different, max_difference = 0, 0.0
+        for this_label in np.flatnonzero(selected) + 1:
+            segment, offset = crop_component(labeled, this_label, bounding_boxes[this_label - 1])
+            results = []
+            for k, config in enumerate(configs):
+                strokes, component_time, peak = process_component(segment, offset, config)
+                results.append(strokes)
+                times[k] += component_time
+                peaks[k] = max(peaks[k], peak)
+            same, difference = compare_strokes(*results)
+            image_different += not same
+            max_difference = max(max_difference, difference)
+
+        total += np.count_nonzero(selected)
+        different += image_different
+        print(f'{os.path.basename(path):20s} {np.count_nonzero(selected):10d} '
+              f'{image_different:9d} {max_difference:13.2e} '
+              + ' '.join(f'{t:12.3f} {p / 2 ** 20:12.2f}' for t, p in zip(times, peaks)))
+    if total > 0:
+        print(f'Components with different strokes: {different} of {total} '
+              f'({100.0 * different / total:.2f}%)')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('images', nargs='*', default=[os.path.join(ROOT, 'data', 'tx.png')])
+    args = parser.parse_args()
+    main(args.images)
@@ -0,0 +1,79 @@
+"""Benchmark of the extraction with downscaling to a target stroke width (the parameter
+``target_width`` of :class:`ExtractionConfig`). Images are first upscaled to simulate
+high-resolution scans; then the extraction at the full resolution is compared with
+the extraction of downscaled images, in terms of time and the distance between strokes.
+
+Usage: python benchmarks/rescaling.py [image ...] [--upscale 4] [--targets 3 4 6]
+"""
+import argparse
+import os
+import sys
+import time
+from dataclasses import replace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.config import DEFAULT_CONFIG  # noqa: E402
+from src.extraction import stroke_extraction, average_width  # noqa: E402
+from src.extraction.sampling import evaluate_strokes  # noqa: E402
+from src.files import read_image  # noqa: E402
+
+
+def sample_strokes(strokes, samples=50):
+    """Get points of polynomials of all strokes (evenly spaced along strokes)"""
+    return evaluate_strokes(strokes, samples, arc_length=True).reshape(-1, 2)
+
+
+def chamfer_distance(strokes1, strokes2):
+    """Get the symmetric mean distance between points of two sets of strokes"""
+    from scipy.spatial import cKDTree
+
+    points1 = sample_strokes(strokes1)
+    points2 = sample_strokes(strokes2)
+    if len(points1) == 0 or len(points2) == 0:
+        return float('inf')
+    distance1 = cKDTree(points2).query(points1)[0].mean()
+    distance2 = cKDTree(points1).query(points2)[0].mean()
+    return (distance1 + distance2) / 2.0
+
+
+def timed_extraction(image, config):
+    start = time.perf_counter()
+    strokes = stroke_extraction(image, config)
+    return strokes, time.perf_counter() - start
+
+
+def main(paths, upscale, targets):
+    from skimage.filters import threshold_otsu
+    from skimage.transform import rescale
+
+    print(f'{"image":20s} {"target":>7s} {"time [s]":>9s} {"speedup":>8s} {"strokes":>8s} '
+          f'{"distance [px]":>14s}')
+    for path in paths:
+        image = read_image(path)
+        if upscale != 1.0:
+            image = rescale(image, upscale, order=1)
+        width = average_width(image < threshold_otsu(image))
+        name = f'{os.path.basename(path)} (w={width:.1f})'
+
+        reference, reference_time = timed_extraction(image, DEFAULT_CONFIG)
+        print(f'{name:20s} {"-":>7s} {reference_time:9.3f} {1.0:8.2f} {len(reference):8d} '
+              f'{0.0:14.2f}')
+        for target in targets:
+            config = replace(DEFAULT_CONFIG, target_width=target)
+            strokes, extraction_time = timed_extraction(image, config)
+            print(f'{name:20s} {target:7.1f} {extraction_time:9.3f} '
+                  f'{reference_time / extraction_time:8.2f} {len(strokes):8d} '
+                  f'{chamfer_distance(reference, strokes):14.2f}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('images', nargs='*', default=[os.path.join(ROOT, 'data', 'tx.png')])
+    parser.add_argument('--upscale', type=float, default=4.0,
+                        help='scale of images before the benchmark')
+    parser.add_argument('--targets', type=float, nargs='+', default=[3.0, 4.0, 6.0],
+                        help='target stroke widths')
+    args = parser.parse_args()
+    main(args.images, args.upscale, args.targets)
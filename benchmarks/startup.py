@@ -0,0 +1,59 @@
+"""Benchmark of the start of the application. Each measurement runs a new interpreter,
+so the results include the cost of imports, like in short-lived jobs.
+
+Usage: python benchmarks/startup.py [number of repetitions]
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+"""Modules that should not be imported before they are really needed"""
+HEAVY_MODULES = ('scipy.ndimage', 'skimage.filters', 'skimage.morphology', 'skimage.io',
+                 'sklearn.neighbors', 'plotly', 'PIL')
+
+
+def measure(command, cwd, repetitions):
+    """Get the median wall time of running the command"""
+    times = []
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=cwd, check=True, stdout=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return sorted(times)[len(times) // 2]
+
+
+def loaded_heavy_modules(statement):
+    """Get the heavy modules loaded by the statement"""
+    code = f'import sys; {statement}; ' \
+           f'print(",".join(m for m in {HEAVY_MODULES!r} if m in sys.modules))'
+    output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, check=True,
+                            capture_output=True, text=True).stdout.strip()
+    return output.split(',') if output else []
+
+
+def main(repetitions):
+    with tempfile.TemporaryDirectory() as work_dir:
+        os.makedirs(os.path.join(work_dir, 'data'))
+        shutil.copy(os.path.join(ROOT, 'data', 'tx.png'), os.path.join(work_dir, 'data'))
+        main_path = os.path.join(ROOT, 'main.py')
+
+        cases = [
+            ('interpreter only', [sys.executable, '-c', 'pass'], ROOT),
+            ('import main', [sys.executable, '-c', 'import main'], ROOT),
+            ('main.py tx.png no-plots', [sys.executable, main_path, 'tx.png', 'no-plots'],
+             work_dir),
+            ('main.py tx.png (with plots)', [sys.executable, main_path, 'tx.png'], work_dir),
+        ]
+        for name, command, cwd in cases:
+            print(f'{name:30s} {measure(command, cwd, repetitions):.3f} s')
+
+    print(f'Heavy modules loaded by "import main": {loaded_heavy_modules("import main")}')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
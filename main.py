@@ -1,48 +1,176 @@
-import numpy as np
+import argparse
 import sys
-import skimage.io as io
-import warnings
 import time
 from src.extraction import stroke_extraction
-from src.draw import prepare_plots
+from src.extraction.stats import ExtractionStats
+from src.files import read_image, save_results
+from src.pages import TIFF_EXTENSIONS, count_pages, extract_pages, page_prefix
+
+# The plotting stack (plotly, PIL) and the batch modules are imported only when needed
 
 
 def run_extraction(file_name, save_plots=False, print_log=True):
+    if file_name.lower().endswith(TIFF_EXTENSIONS):
+        run_pages_extraction(file_name, save_plots, print_log)
+        return
 
     # Read an input image in greyscale
-    with warnings.catch_warnings():
-        warnings.simplefilter("ignore")
-        input_image = io.imread('data/' + file_name, as_gray=True)
+    input_image = read_image('data/' + file_name)
 
     # Do the extraction
     start_time_extraction = time.time()
-    extracted_strokes = stroke_extraction(input_image)
+    stats = ExtractionStats()
+    extracted_strokes = stroke_extraction(input_image, stats=stats)
     time_extraction = time.time() - start_time_extraction
     if print_log:
         print(f'Number of extrated strokes: {len(extracted_strokes)}')
+        print(f'Skipped components: {stats.skipped_noise + stats.skipped_small} '
+              f'of {stats.components}')
         print(f'Elapsed time: {time_extraction} s')
 
     # Save the results
     name = file_name.split('.')[0]
-    points_array = []
-    polynomials_array = []
-    for s in extracted_strokes:
-        points_array.append(str(s))
-        polynomials_array.append(s.vector_of_features())
-    with open('data/' + name + '_output_points.txt', 'w+') as f:
-        for line in points_array:
-            f.write(line)
-            f.write('\n')
-    np.savetxt('data/' + name + '_output_polynomials.csv', polynomials_array, delimiter=',')
+    save_results(extracted_strokes, 'data/' + name)
 
     # Make plots
     if save_plots:
+        from src.draw import prepare_plots
         fig1, fig2 = prepare_plots(extracted_strokes, 'data/' + file_name)
-        fig1.write_html('data/' + name + '_plot_raw.html')
-        fig2.write_html('data/' + name + '_plot_approx.html')
+        # Both files use the same copy of plotly.js (plotly.min.js) saved next to them
+        fig1.write_html('data/' + name + '_plot_raw.html', include_plotlyjs='directory')
+        fig2.write_html('data/' + name + '_plot_approx.html', include_plotlyjs='directory')
+
+
+def run_pages_extraction(file_name, save_plots=False, print_log=True):
+    # Pages are read one by one (large pages tile by tile), so the file is never loaded whole
+    if save_plots and print_log:
+        print('Plots are not made for TIFF files (only the results of pages are saved)')
+    name = file_name.split('.')[0]
+    number_of_pages = count_pages('data/' + file_name)
+    for index, extracted_strokes in extract_pages('data/' + file_name):
+        save_results(extracted_strokes, page_prefix('data/' + name, index, number_of_pages))
+        if print_log:
+            print(f'Page {index + 1}: number of extrated strokes: {len(extracted_strokes)}')
+
+
+def batch_main(arguments):
+    from src.batch import run_batch
+
+    parser = argparse.ArgumentParser(prog='main.py batch',
+                                     description='Extract strokes from many images')
+    parser.add_argument('source', help='directory with images or a manifest file')
+    parser.add_argument('output', help='directory for the results and the checkpoint')
+    parser.add_argument('-w', '--workers', type=int, default=1, help='number of processes')
+    parser.add_argument('--dump-dir', default=None,
+                        help='directory where slow components are saved for replaying')
+    parser.add_argument('--glyph-cache', type=int, default=0, metavar='N',
+                        help='reuse strokes of up to N repeated components in each process')
+    args = parser.parse_args(arguments)
+    try:
+        run_batch(args.source, args.output, args.workers, dump_dir=args.dump_dir,
+                  glyph_cache_size=args.glyph_cache)
+    except ValueError as error:
+        parser.error(str(error))
+
+
+def replay_main(arguments):
+    from src.extraction.replay import replay_component
+
+    parser = argparse.ArgumentParser(prog='main.py replay',
+                                     description='Process saved slow components again')
+    parser.add_argument('components', nargs='+', help='files saved with --dump-dir')
+    parser.add_argument('--profile', type=int, default=0, metavar='N',
+                        help='print N most expensive functions (cProfile)')
+    parser.add_argument('--memory', action='store_true',
+                        help='print the peak memory of stages (tracemalloc)')
+    args = parser.parse_args(arguments)
+
+    for path in args.components:
+        memory = None
+        if args.memory:
+            from src.extraction.memory import MemoryStats
+            memory = MemoryStats()
+        result = replay_component(path, profile=args.profile > 0, memory=memory)
+        print(f'{path}: discs: {result["discs"]}, strokes: {len(result["strokes"])}, '
+              f'original time: {result["elapsed"]:.3f} s')
+        if not result['same_discs']:
+            print('  discs differ from the saved ones')
+        for stage, stage_time in result['stages'].items():
+            print(f'  {stage:12s} {stage_time:.3f} s')
+        if memory is not None:
+            print(memory.report())
+        if result['profiler'] is not None:
+            import pstats
+            pstats.Stats(result['profiler']).sort_stats('cumulative').print_stats(args.profile)
+
+
+def queue_main(arguments):
+    from src.sharding import create_queue, run_worker, merge_shards, queue_status, LEASE_TIME
+
+    parser = argparse.ArgumentParser(prog='main.py queue',
+                                     description='Work queue on a shared filesystem')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    create_parser = subparsers.add_parser('create', help='create tasks for all images')
+    create_parser.add_argument('queue', help='directory of the queue')
+    create_parser.add_argument('source', help='directory with images or a manifest file')
+    work_parser = subparsers.add_parser('work', help='process tasks until all are done')
+    work_parser.add_argument('queue', help='directory of the queue')
+    work_parser.add_argument('--worker-id', default=None, help='unique id of this worker')
+    work_parser.add_argument('--lease', type=float, default=LEASE_TIME,
+                             help='time after which tasks of silent workers are released')
+    merge_parser = subparsers.add_parser('merge', help='combine shards into a single index')
+    merge_parser.add_argument('queue', help='directory of the queue')
+    status_parser = subparsers.add_parser('status', help='print the number of tasks')
+    status_parser.add_argument('queue', help='directory of the queue')
+    args = parser.parse_args(arguments)
+
+    if args.command == 'create':
+        print(f'Created tasks: {create_queue(args.queue, args.source)}')
+    elif args.command == 'work':
+        processed = run_worker(args.queue, args.worker_id, args.lease, print_log=True)
+        print(f'Processed tasks: {processed}')
+    elif args.command == 'merge':
+        print(f'Records in the index: {merge_shards(args.queue)}')
+    else:
+        print(queue_status(args.queue))
+
+
+def serve_main(arguments):
+    from src.server import ExtractionServer
+
+    parser = argparse.ArgumentParser(prog='main.py serve',
+                                     description='Run the extraction server (HTTP)')
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen on')
+    parser.add_argument('--port', type=int, default=8765, help='port to listen on')
+    parser.add_argument('-w', '--workers', type=int, default=2, help='number of processes')
+    parser.add_argument('--max-batch', type=int, default=8, help='maximal size of a batch')
+    args = parser.parse_args(arguments)
+
+    server = ExtractionServer(args.host, args.port, args.workers, max_batch=args.max_batch,
+                              print_log=True)
+    print(f'Listening on http://{args.host}:{server.server_port}', flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
 
 
 if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'batch':
+        batch_main(sys.argv[2:])
+        sys.exit()
+    if len(sys.argv) > 1 and sys.argv[1] == 'queue':
+        queue_main(sys.argv[2:])
+        sys.exit()
+    if len(sys.argv) > 1 and sys.argv[1] == 'replay':
+        replay_main(sys.argv[2:])
+        sys.exit()
+    if len(sys.argv) > 1 and sys.argv[1] == 'serve':
+        serve_main(sys.argv[2:])
+        sys.exit()
+
     if len(sys.argv) > 1:
         input_name = sys.argv[1]
     else:
@@ -0,0 +1,255 @@
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .config import DEFAULT_CONFIG
+from .extraction import stroke_extraction
+from .extraction.glyph_cache import shared_glyph_cache
+from .extraction.stats import ExtractionStats
+from .files import read_image, save_results, output_paths
+from .pages import TIFF_EXTENSIONS, count_pages, extract_pages, page_prefix
+
+
+"""Extensions of files treated as input images when a directory is given"""
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.tif', '.tiff', '.bmp', '.gif')
+
+"""Name of the checkpoint file created in the output directory"""
+CHECKPOINT_NAME = 'batch_checkpoint.jsonl'
+
+
+def list_inputs(source):
+    """Get the list of input images
+
+    :param str source: Directory with images or a manifest file (a text file with one
+        path per line, relative to the manifest location)
+    :returns: List of pairs (path of the image, path relative to the source)
+    """
+    if os.path.isdir(source):
+        names = sorted(
+            name for name in os.listdir(source)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        return [(os.path.join(source, name), name) for name in names]
+
+    base_dir = os.path.dirname(source)
+    inputs = []
+    with open(source) as f:
+        for line in f:
+            name = line.strip()
+            if name and not name.startswith('#'):
+                inputs.append((os.path.join(base_dir, name), name))
+    return inputs
+
+
+def output_prefix_for(relative_path, output_dir):
+    """Get the prefix of output files for the given input image (without the extension,
+    so images that differ only in the extension get the same prefix, see
+    :meth:`check_prefixes`)
+
+    :param str relative_path: Path of the image relative to the source
+    :param str output_dir: Output directory
+    :rtype: str
+    """
+    return os.path.join(output_dir, os.path.splitext(relative_path)[0])
+
+
+def dump_name_for(relative_path):
+    """Get the name of the image put in file names of its slow components (see
+    :meth:`dump_component`), unique within the source
+
+    :param str relative_path: Path of the image relative to the source
+    :rtype: str
+    """
+    return re.sub(r'[^\w.-]', '_', relative_path)
+
+
+def check_prefixes(inputs, output_dir):
+    """Check that no two input images write to the same output files (e.g. a.png and
+    a.jpg); ValueError is raised otherwise, before any image is processed
+
+    :param list inputs: Pairs (path of the image, path relative to the source)
+    :param str output_dir: Output directory
+    """
+    images = {}
+    for _, relative_path in inputs:
+        prefix = output_prefix_for(relative_path, output_dir)
+        if prefix in images:
+            raise ValueError(f'{images[prefix]} and {relative_path} would write to the same '
+                             f'output files ({prefix})')
+        images[prefix] = relative_path
+
+
+def is_up_to_date(input_path, output_prefix):
+    """Check if all output files (of all pages) exist and are not older than the input image
+
+    :rtype: bool
+    """
+    input_mtime = os.path.getmtime(input_path)
+    number_of_pages = count_pages(input_path)
+    for index in range(number_of_pages):
+        for path in output_paths(page_prefix(output_prefix, index, number_of_pages)):
+            if not os.path.exists(path) or os.path.getmtime(path) < input_mtime:
+                return False
+    return True
+
+
+def process_file(input_path, output_prefix, config=DEFAULT_CONFIG, dump_dir=None,
+                 glyph_cache_size=0, dump_name='component'):
+    """Extract strokes from a single image and save the results. Pages of TIFF files are
+    processed one by one (see :meth:`extract_pages`) and saved separately (see
+    :meth:`page_prefix`)
+
+    :param str dump_dir: Directory for slow components (see :meth:`stroke_extraction`)
+    :param int glyph_cache_size: Size of the glyph cache shared by all images processed in
+        this process (see :meth:`shared_glyph_cache`); 0 means no cache
+    :param str dump_name: Name of the image in file names of slow components (see
+        :meth:`dump_name_for`)
+    :returns: Statistics of the extraction (see :class:`ExtractionStats`)
+    :rtype: dict
+    """
+    glyph_cache = shared_glyph_cache(glyph_cache_size) if glyph_cache_size > 0 else None
+    stats = ExtractionStats()
+    os.makedirs(os.path.dirname(output_prefix) or '.', exist_ok=True)
+    if input_path.lower().endswith(TIFF_EXTENSIONS):
+        number_of_pages = count_pages(input_path)
+        for index, extracted_strokes in extract_pages(input_path, config, stats=stats,
+                                                      glyph_cache=glyph_cache,
+                                                      dump_dir=dump_dir, dump_name=dump_name):
+            save_results(extracted_strokes, page_prefix(output_prefix, index, number_of_pages))
+        return stats.as_dict()
+
+    extracted_strokes = stroke_extraction(read_image(input_path), config, stats,
+                                          dump_dir=dump_dir, glyph_cache=glyph_cache,
+                                          dump_name=dump_name)
+    save_results(extracted_strokes, output_prefix)
+    return stats.as_dict()
+
+
+def load_checkpoint(checkpoint_path):
+    """Read the checkpoint of the batch
+
+    :returns: Dictionary from the relative input path to the saved record
+    """
+    records = {}
+    if os.path.exists(checkpoint_path):
+        with open(checkpoint_path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # The last line might be incomplete after an interruption
+                    continue
+                records[record['input']] = record
+    return records
+
+
+def run_batch(source, output_dir, workers=1, config=DEFAULT_CONFIG, print_log=True,
+              dump_dir=None, glyph_cache_size=0):
+    """Extract strokes from many images. Images whose results are recorded in the checkpoint
+    and are up to date are skipped, so an interrupted run can be resumed by running the
+    same command again
+
+    :param str source: Directory with images or a manifest file (see :meth:`list_inputs`)
+    :param str output_dir: Directory for the results and the checkpoint
+    :param int workers: Number of worker processes (1 means processing in this process)
+    :param ExtractionConfig config: Parameters of the extraction
+    :param bool print_log: Print the progress and the summary
+    :param str dump_dir: Directory where slow components are saved (optional, see
+        :meth:`dump_component`)
+    :param int glyph_cache_size: Number of components stored in the glyph cache of each
+        process (see :class:`GlyphCache`); 0 means no cache
+
+    :returns: Summary with numbers of processed, skipped and failed images, number of
+        strokes, elapsed time, throughput and the hit rate of the glyph cache
+    :rtype: dict
+    """
+    inputs = list_inputs(source)
+    check_prefixes(inputs, output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+    checkpoint_path = os.path.join(output_dir, CHECKPOINT_NAME)
+    done = load_checkpoint(checkpoint_path)
+
+    pending = []
+    skipped = 0
+    for input_path, relative_path in inputs:
+        prefix = output_prefix_for(relative_path, output_dir)
+        record = done.get(relative_path)
+        if record is not None and record.get('config') == config.digest() \
+                and is_up_to_date(input_path, prefix):
+            skipped += 1
+        else:
+            pending.append((input_path, relative_path, prefix))
+
+    processed = 0
+    failed = 0
+    number_of_strokes = 0
+    lookups = 0
+    cached = 0
+    start_time = time.time()
+
+    with open(checkpoint_path, 'a') as checkpoint:
+
+        def finish(relative_path, stats):
+            nonlocal processed, number_of_strokes, lookups, cached
+            processed += 1
+            result = stats['strokes']
+            number_of_strokes += result
+            if glyph_cache_size > 0:
+                lookups += stats['components'] - stats['skipped_noise'] - stats['skipped_small']
+                cached += stats['cached']
+            record = {'input': relative_path, 'strokes': result, 'config': config.digest()}
+            checkpoint.write(json.dumps(record) + '\n')
+            checkpoint.flush()
+            if print_log:
+                print(f'[{processed + failed}/{len(pending)}] {relative_path}: {result} strokes')
+
+        def fail(relative_path, error):
+            nonlocal failed
+            failed += 1
+            if print_log:
+                print(f'[{processed + failed}/{len(pending)}] {relative_path}: failed ({error})')
+
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    executor.submit(process_file, input_path, prefix, config, dump_dir,
+                                    glyph_cache_size, dump_name_for(relative_path)):
+                        relative_path
+                    for input_path, relative_path, prefix in pending
+                }
+                for future in as_completed(futures):
+                    try:
+                        finish(futures[future], future.result())
+                    except Exception as error:
+                        fail(futures[future], error)
+        else:
+            for input_path, relative_path, prefix in pending:
+                try:
+                    finish(relative_path, process_file(input_path, prefix, config, dump_dir,
+                                                       glyph_cache_size,
+                                                       dump_name_for(relative_path)))
+                except Exception as error:
+                    fail(relative_path, error)
+
+    elapsed = time.time() - start_time
+    summary = {
+        'processed': processed,
+        'skipped': skipped,
+        'failed': failed,
+        'strokes': number_of_strokes,
+        'elapsed': elapsed,
+        'images_per_second': processed / elapsed if elapsed > 0 else 0.0,
+        'strokes_per_second': number_of_strokes / elapsed if elapsed > 0 else 0.0,
+        'glyph_cache_hit_rate': cached / lookups if lookups > 0 else 0.0,
+    }
+    if print_log:
+        print(f'Processed: {processed}, skipped: {skipped}, failed: {failed}')
+        print(f'Elapsed time: {elapsed} s')
+        print(f'Throughput: {summary["images_per_second"]:.2f} images/s, '
+              f'{summary["strokes_per_second"]:.2f} strokes/s')
+        if glyph_cache_size > 0:
+            print(f'Glyph cache: {cached} of {lookups} components '
+                  f'({100.0 * summary["glyph_cache_hit_rate"]:.1f}%)')
+    return summary
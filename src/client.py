@@ -0,0 +1,59 @@
+import io
+import json
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+
+import numpy as np
+
+
+"""Address of the server started with ``python main.py serve``"""
+DEFAULT_URL = 'http://127.0.0.1:8765'
+
+
+def extract_remote(image, url=DEFAULT_URL, binary=False, timeout=60.0, **parameters):
+    """Extract strokes using the running extraction server (see :class:`ExtractionServer`)
+
+    :param image: Encoded image file (bytes) or greyscale image (2D np.array)
+    :param str url: Address of the server
+    :param bool binary: Receive the result in the binary format instead of JSON
+    :param float timeout: Maximal time of waiting for the response
+    :param parameters: Parameters of :class:`ExtractionConfig` to be overridden
+
+    :returns: List of points of each stroke (np.array) and the matrix of polynomials
+        (one row per stroke, see :meth:`Stroke.vector_of_features`)
+    """
+    if isinstance(image, np.ndarray):
+        buffer = io.BytesIO()
+        np.save(buffer, image, allow_pickle=False)
+        body = buffer.getvalue()
+        content_type = 'application/x-npy'
+    else:
+        body = bytes(image)
+        content_type = 'application/octet-stream'
+
+    query = dict(parameters)
+    if binary:
+        query['format'] = 'binary'
+    request = Request(url + '/extract?' + urlencode(query), data=body,
+                      headers={'Content-Type': content_type})
+    with urlopen(request, timeout=timeout) as response:
+        content = response.read()
+
+    if binary:
+        arrays = np.load(io.BytesIO(content))
+        offsets = arrays['offsets']
+        points = [arrays['points'][offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+        return points, arrays['polynomials']
+
+    records = json.loads(content)
+    points = [np.array(p) for p in records['points']]
+    return points, np.array(records['polynomials']).reshape(-1, 8)
+
+
+def get_json(url, path, timeout=10.0):
+    """Get the JSON response of a GET request to the server (e.g. ``/health``, ``/metrics``)
+
+    :rtype: dict
+    """
+    with urlopen(url + path, timeout=timeout) as response:
+        return json.loads(response.read())
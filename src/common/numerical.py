@@ -1,18 +1,20 @@
 import numpy as np
 
 
-def vlen(vec):
+def vlen(vec, dtype=None):
     """Return the vector length
 
+    :param dtype: Floating-point type of the calculation (by default, the type of the vector)
     :rtype: float"""
-    return np.sqrt((vec ** 2).sum())
+    return np.sqrt((np.asarray(vec, dtype=dtype) ** 2).sum())
 
 
-def euc_dist(v1, v2):
+def euc_dist(v1, v2, dtype=None):
     """Return the Euclidean distance between the two vectors
 
+    :param dtype: Floating-point type of the calculation (by default, the type of vectors)
     :rtype: float"""
-    return np.sqrt(((v1 - v2) ** 2).sum())
+    return np.sqrt((np.subtract(v1, v2, dtype=dtype) ** 2).sum())
 
 
 def f2(float_number):
@@ -23,19 +25,24 @@ def f2(float_number):
     return '{:.2f}'.format(float_number)
 
 
-def vcos(v1, v2):
+def vcos(v1, v2, dtype=None):
     """Get the cosine of the angle between the two vectors
 
+    :param dtype: Floating-point type of the calculation (by default, the type of vectors)
     :rtype: float"""
+    if dtype is not None:
+        v1 = np.asarray(v1, dtype=dtype)
+        v2 = np.asarray(v2, dtype=dtype)
     return np.dot(v1, v2) / (vlen(v1) * vlen(v2))
 
 
-def pcos(a, b, c):
+def pcos(a, b, c, dtype=None):
     """Get the cosine of the angle between vectors AB and BC.
     Parameters: the coordinates of points A, B, and C
 
+    :param dtype: Floating-point type of the calculation (by default, the type of points)
     :rtype: float"""
-    return vcos(b - a, c - b)
+    return vcos(b - a, c - b, dtype)
 
 
 def pseudo_gaussian(real, ideal, rho):
@@ -1,3 +1,6 @@
+import hashlib
+from dataclasses import dataclass, fields
+
 """The value used in disc selection. The radius of the area where there should not be any
 other disc center"""
 R_M = 0.95
@@ -20,3 +23,79 @@ EPSILON = 0.039
 
 """Minimal stroke independence"""
 D_MIN = 0.2
+
+"""Minimal area (in pixels, after the noise reduction) of a connected component to be
+processed. Smaller ones are treated as noise, e.g. dust on a scan. Components that fit in
+a 2x2 square are always skipped, because they never contain strokes"""
+MIN_AREA = 0
+
+"""Maximal number of discs of a single connected component (the work budget of
+a component). Components with more discs get a coarser selection of discs and their strokes
+are marked as degraded. 0 means no limit"""
+MAX_DISCS = 0
+
+"""Maximal number of the nearest discs considered as candidates for connections of each
+disc. 0 means that all pairs of discs are considered"""
+MAX_NEIGHBOURS = 0
+
+"""Time (in seconds) after which the remaining components of the image are processed with
+the limited number of discs (see :data:`DEGRADED_MAX_DISCS`) by :meth:`stroke_extraction`.
+A single component is limited only by ``max_discs``. 0 means no limit"""
+TIME_BUDGET = 0.0
+
+"""Average stroke width (in pixels) to which images with thicker strokes are downscaled before
+the extraction (the results are mapped back to the original coordinates). 0 means that
+images are never rescaled"""
+TARGET_WIDTH = 0.0
+
+"""Memory (in bytes) that the connection stage of a single connected component may use.
+It is estimated from the number of discs before the allocation (see
+:meth:`estimate_component_memory`); components above it get a coarser selection of discs
+(like with ``max_discs``). 0 means no limit"""
+MEMORY_BUDGET = 0
+
+"""Floating-point type of disc radii, connection matrices and polynomials of strokes
+('float64' or 'float32'). Single precision is enough for pixel coordinates and halves
+the size of matrices, but some qualities close to thresholds change, so the results might
+differ slightly (see benchmarks/precision.py)"""
+DTYPE = 'float64'
+
+
+@dataclass(frozen=True)
+class ExtractionConfig:
+    """Immutable set of parameters of the stroke extraction. Each field has the default
+    value of the module-level constant with the same name in upper case. Use
+    :func:`dataclasses.replace` to get a modified copy
+
+    The hash of the object is calculated from :meth:`digest`, so it is the same in every
+    process and the object can be used as a key of persistent caches
+    """
+    r_m: float = R_M
+    rho: float = RHO
+    q_min: float = Q_MIN
+    qr_max: float = QR_MAX
+    max_angle: float = MAX_ANGLE
+    epsilon: float = EPSILON
+    d_min: float = D_MIN
+    min_area: int = MIN_AREA
+    max_discs: int = MAX_DISCS
+    max_neighbours: int = MAX_NEIGHBOURS
+    time_budget: float = TIME_BUDGET
+    target_width: float = TARGET_WIDTH
+    memory_budget: int = MEMORY_BUDGET
+    dtype: str = DTYPE
+
+    def digest(self):
+        """Get the digest of all parameters, stable between processes and Python runs
+
+        :rtype: string
+        """
+        text = ';'.join(f'{f.name}={getattr(self, f.name)!r}' for f in fields(self))
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+    def __hash__(self):
+        return int(self.digest()[:16], 16)
+
+
+"""Configuration with default values of all parameters"""
+DEFAULT_CONFIG = ExtractionConfig()
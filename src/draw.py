@@ -2,29 +2,61 @@ import numpy as np
 import plotly.graph_objects as go
 from PIL import Image
 
+from .extraction.sampling import evaluate_strokes
 
-def draw_raw(extracted_strokes):
-    fig = go.Figure()
-    for stroke in extracted_strokes:
-        tx = np.array([p[1] for p in stroke.points])
-        ty = np.array([-p[0] for p in stroke.points])
-        fig.add_trace(go.Scatter(x=tx, y=ty, mode='lines+markers'))
-    return fig
 
+"""Plots with more strokes than this are drawn as a single WebGL trace (see :meth:`draw_raw`)"""
+MAX_SEPARATE_TRACES = 500
+
+"""Number of points of each approximated stroke in plots"""
+PLOT_SAMPLES = 17
+
+
+def packed_coordinates(lines):
+    """Join many lines into one, with NaN values between them, so the line is broken there
+
+    :param list lines: List of arrays N x 2 (points of lines)
+    :returns: Array M x 2 with points of all lines and NaN separators
+    """
+    if not lines:
+        return np.zeros((0, 2))
+    separator = np.full((1, 2), np.nan)
+    return np.concatenate([part for line in lines for part in (line, separator)])[:-1]
 
-def draw_approximated(extracted_strokes):
+
+def draw_lines(lines, mode, packed=None):
+    """Draw lines given in image coordinates (row, column) with the row axis upwards
+
+    :param list lines: List of arrays N x 2
+    :param str mode: Mode of plotly traces (e.g. 'lines+markers')
+    :param bool packed: Draw all lines as a single WebGL trace (by default, if there are
+        more than :data:`MAX_SEPARATE_TRACES` of them)
+    :rtype: go.Figure
+    """
+    if packed is None:
+        packed = len(lines) > MAX_SEPARATE_TRACES
     fig = go.Figure()
-    for stroke in extracted_strokes:
-        tt = np.linspace(0, 1, num=17)
-        tx = np.polyval(stroke.poly_y, tt)
-        ty = -np.polyval(stroke.poly_x, tt)
-        fig.add_trace(go.Scatter(x=tx, y=ty, mode='lines'))
+    if packed:
+        points = packed_coordinates(lines)
+        fig.add_trace(go.Scattergl(x=points[:, 1], y=-points[:, 0], mode=mode,
+                                   connectgaps=False))
+    else:
+        for line in lines:
+            fig.add_trace(go.Scatter(x=line[:, 1], y=-line[:, 0], mode=mode))
     return fig
 
 
-def prepare_plots(extracted_strokes, background_image_path):
-    fig1 = draw_raw(extracted_strokes)
-    fig2 = draw_approximated(extracted_strokes)
+def draw_raw(extracted_strokes, packed=None):
+    return draw_lines([stroke.points for stroke in extracted_strokes], 'lines+markers', packed)
+
+
+def draw_approximated(extracted_strokes, packed=None):
+    return draw_lines(list(evaluate_strokes(extracted_strokes, PLOT_SAMPLES)), 'lines', packed)
+
+
+def prepare_plots(extracted_strokes, background_image_path, packed=None):
+    fig1 = draw_raw(extracted_strokes, packed)
+    fig2 = draw_approximated(extracted_strokes, packed)
     pil_image = Image.open(background_image_path)
     image_dict = dict(
         source=pil_image,
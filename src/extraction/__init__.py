@@ -1,15 +1,89 @@
 """Functions and classes related strictly to stroke extraction
+
+Heavy dependencies (SciPy, scikit-image, scikit-learn) are imported inside the functions
+that use them, so importing the package does not slow down the start of the application
 """
 
+import time
+
 import numpy as np
-from scipy.ndimage import label
-from skimage.filters import threshold_otsu
-from skimage.morphology import skeletonize, dilation, erosion
 
-from .disc import create_discs
+from .disc import create_discs, coarsen_discs
 from .connection_functions import create_connections
+from .partition import partitioned_connections, MAX_PART_DISCS
+from .memory import estimate_component_memory, budget_max_discs, memory_stage
+from .glyph_cache import glyph_key
 from .chain_functions import create_chains
 from .stroke_functions import chains_to_strokes
+from ..config import DEFAULT_CONFIG
+
+
+"""Structuring element used in the noise reduction"""
+STRUCT_ELEMENT = np.array([[0.0, 0.0, 0.0], [0.0, 1.0, 1.0], [0.0, 1.0, 0.0]])
+
+"""Average stroke width (in pixels) above which the noise reduction contains erosion"""
+BOLD_WIDTH = 3.0
+
+"""Maximal number of discs of components processed after the time budget of the image
+is exceeded (see :data:`TIME_BUDGET`)"""
+DEGRADED_MAX_DISCS = 100
+
+"""Components processed longer than this (in seconds) are saved by :meth:`stroke_extraction`
+if the directory for them is given"""
+DUMP_THRESHOLD = 1.0
+
+"""Components that fit in a square of this size never contain strokes: their skeleton has
+at most 2 pixels, so there are at most 2 discs, while chains need at least 3"""
+MAX_NOISE_SIZE = 2
+
+
+def noise_reduction(binary, erode, output=None):
+    """Reduce the noise of a binary image with dilation (and erosion, if the strokes are
+    bold enough)
+
+    :param np.array binary: Binary image
+    :param bool erode: Do the erosion after the dilation
+    :param np.array output: Boolean array of the same shape for the result (optional)
+    :rtype: np.array
+    """
+    from scipy.ndimage import binary_dilation, binary_erosion
+
+    # The same as the dilation and erosion of scikit-image, which mirror the structuring
+    # element of the dilation and treat pixels outside the image as foreground in the erosion
+    structure = STRUCT_ELEMENT > 0.0
+    if not erode:
+        return binary_dilation(binary, structure[::-1, ::-1], output=output)
+    binary = binary_dilation(binary, structure[::-1, ::-1])
+    return binary_erosion(binary, structure, border_value=1, output=output)
+
+
+def average_width(binary):
+    """Estimate the average stroke width as the ratio of foreground pixels to pixels
+    of the skeleton
+
+    :param np.array binary: Binary image (True means the foreground)
+    :rtype: float
+    """
+    from skimage.morphology import skeletonize
+
+    return np.count_nonzero(binary) / np.count_nonzero(skeletonize(binary))
+
+
+def binarization(grayscale_image, threshold=None):
+    """Split pixels into the foreground (dark) and the background with the Otsu threshold
+
+    :param np.array grayscale_image: Input image in grayscale (a binary image is treated
+        as already thresholded, with the background set to True)
+    :param float threshold: Threshold (by default, calculated with the Otsu method)
+    :returns: Binary image (True means the foreground)
+    :rtype: np.array
+    """
+    if grayscale_image.dtype == bool:
+        return ~grayscale_image
+    if threshold is None:
+        from skimage.filters import threshold_otsu
+        threshold = threshold_otsu(grayscale_image)
+    return grayscale_image < threshold
 
 
 def preprocessing(grayscale_image):
@@ -20,74 +94,289 @@ def preprocessing(grayscale_image):
     * bold (if necessary),
     * adding margin.
 
-    :param np.array grayscale_image: Input image in grayscale
+    :param np.array grayscale_image: Input image in grayscale (of any type, 8-bit images
+        are not converted; a binary image is treated as already thresholded, with the
+        background set to True)
 
     :returns: Preprocessed binary image
     :rtype: np.array
     """
-
     # Thresholding
-    threshold = threshold_otsu(grayscale_image)
-    binary = (grayscale_image < threshold)
+    binary = binarization(grayscale_image)
 
     # Skeletonization
-    skeleton = skeletonize(binary)
+    avg_width = average_width(binary)
 
-    # Noise reduction (and bold)
-    num_foreground = np.count_nonzero(binary)
-    num_skeleton = np.count_nonzero(skeleton)
-    avg_width = num_foreground / num_skeleton
-    struct_element = np.array([[0.0, 0.0, 0.0], [0.0, 1.0, 1.0], [0.0, 1.0, 0.0]])
-    binary = dilation(binary, struct_element)
-    if avg_width > 3.0:
-        binary = erosion(binary, struct_element)
+    # Noise reduction (and bold) written straight into the image with the margin
+    # (1 pixel arround), so the margin does not need another copy of the image
+    height, width = binary.shape
+    preprocessed = np.zeros((height + 2, width + 2), dtype=bool)
+    noise_reduction(binary, avg_width > BOLD_WIDTH, output=preprocessed[1:-1, 1:-1])
+    return preprocessed
 
-    # Adding margin (1 pixel arround)
-    binary = np.pad(binary, ((1, 1), (1, 1)), 'constant', constant_values=False)
-    return binary
 
+def segmentation(binary):
+    """Split the preprocessed image into connected components
 
-def stroke_extraction(input_image):
-    """Do the entire stroke extraction. Transform a raster input image into a set
-    of extracted strokes
+    :param np.array binary: Preprocessed binary image (see :meth:`preprocessing`)
 
-    :param np.array input_image: Input image in grayscale (bright background)
+    :returns: Labeled image and the list of bounding boxes (as pairs of slices), where the
+        element i belongs to the label i + 1
+    """
+    from scipy.ndimage import label, find_objects
 
-    :returns: List of extracted :class:`Stroke` objects
-    :rtype: list[Stroke]
+    labeled, _ = label(binary)
+    return labeled, find_objects(labeled)
+
+
+def component_filter(bounding_boxes, areas, min_area=0):
+    """Find components that might contain strokes, using only their bounding boxes and
+    areas, so the noise is skipped before the expensive stages
+
+    :param list bounding_boxes: Bounding boxes of components (pairs of slices)
+    :param np.array areas: Number of pixels of each component
+    :param int min_area: Minimal area of a component (see :data:`MIN_AREA`)
+
+    :returns: Boolean array (True for components to be processed), the number of components
+        skipped as noise (see :data:`MAX_NOISE_SIZE`) and the number of the ones skipped
+        because of the area
     """
-    # Preprocessing
-    binary = preprocessing(input_image)
+    sizes = np.array([(rows.stop - rows.start, cols.stop - cols.start)
+                      for rows, cols in bounding_boxes], dtype=int).reshape(-1, 2)
+    noise = np.all(sizes <= MAX_NOISE_SIZE, axis=1)
+    small = ~noise & (np.asarray(areas) < min_area)
+    return ~(noise | small), np.count_nonzero(noise), np.count_nonzero(small)
 
-    # Segmentation
-    labeled, number_of_areas = label(binary)
-    extracted_strokes = []
 
-    # TODO: Try to make it parallel
-    for this_label in range(1, number_of_areas + 1):
-        segment = (labeled == this_label)
+def component_areas(labeled, number_of_components):
+    """Get the number of pixels of each component of the labeled image
 
-        # Split the set of pixels into background, interior, and boundary
-        enlarged = dilation(segment)
-        skeleton = skeletonize(segment)
-        edge = enlarged ^ segment
+    :rtype: np.array
+    """
+    return np.bincount(labeled.ravel(), minlength=number_of_components + 1)[1:]
+
+
+def crop_component(labeled, this_label, bounding_box):
+    """Cut a single connected component out of the labeled image. The result covers
+    the bounding box of the component with the 1 pixel margin
+
+    :param np.array labeled: Labeled image created with :meth:`segmentation`
+    :param int this_label: Label of the component
+    :param tuple bounding_box: Pair of slices with the bounding box of the component
+
+    :returns: Binary image of the component and the position of its top-left corner
+        in the entire image
+    """
+    rows, cols = bounding_box
+    window = (slice(rows.start - 1, rows.stop + 1), slice(cols.start - 1, cols.stop + 1))
+    segment = (labeled[window] == this_label)
+    offset = np.array([window[0].start, window[1].start])
+    return segment, offset
 
-        skel_pixels = np.transpose(np.nonzero(skeleton))
-        edge_pixels = np.transpose(np.nonzero(edge))
 
-        # Estimate the average stroke width
-        avg_width = np.count_nonzero(segment) / len(skel_pixels)
+def segment_pixels(segment, offset):
+    """Split the pixels of a single connected component into interior and boundary
 
+    :param np.array segment: Binary image of the component (with the 1 pixel margin)
+    :param np.array offset: Position of the top-left corner of the segment in the entire
+        image; it is added to the returned coordinates
+
+    :returns: Edge pixels, skeleton pixels and the average stroke width
+    """
+    from scipy.ndimage import binary_dilation
+    from skimage.morphology import skeletonize
+
+    # Split the set of pixels into background, interior, and boundary
+    enlarged = binary_dilation(segment)
+    skeleton = skeletonize(segment)
+    edge = enlarged ^ segment
+
+    skel_pixels = np.transpose(np.nonzero(skeleton)) + offset
+    edge_pixels = np.transpose(np.nonzero(edge)) + offset
+
+    # Estimate the average stroke width
+    avg_width = np.count_nonzero(segment) / len(skel_pixels)
+
+    return edge_pixels, skel_pixels, avg_width
+
+
+def component_pixels(labeled, this_label, bounding_box):
+    """Split the pixels of a single connected component into interior and boundary.
+    The component is processed within its bounding box (see :meth:`crop_component`) only,
+    but the returned coordinates refer to the entire image
+
+    :returns: Edge pixels, skeleton pixels and the average stroke width
+    """
+    segment, offset = crop_component(labeled, this_label, bounding_box)
+    return segment_pixels(segment, offset)
+
+
+def component_discs(segment, offset, config=DEFAULT_CONFIG, max_discs=None, memory=None):
+    """Create discs of a single connected component. If the component has more discs than
+    allowed (or its connections would exceed ``memory_budget`` of the configuration),
+    a coarser selection of discs is used (see :meth:`coarsen_discs`)
+
+    :param np.array segment: Binary image of the component (see :meth:`crop_component`)
+    :param np.array offset: Position of the top-left corner of the segment
+    :param ExtractionConfig config: Parameters of the extraction
+    :param int max_discs: Maximal number of discs (by default, ``max_discs`` of
+        the configuration; 0 means no limit)
+    :param MemoryStats memory: Object to collect the memory usage (optional)
+
+    :returns: List of discs and the flag if the component is degraded (processed with
+        the coarser selection of discs or the limited number of neighbours)
+    """
+    with memory_stage(memory, 'pixels'):
+        edge_pixels, skel_pixels, avg_width = segment_pixels(segment, offset)
+
+    # The coarser selection keeps the number of connections bounded
+    with memory_stage(memory, 'discs'):
+        discs = create_discs(edge_pixels, skel_pixels, avg_width, config)
+    if memory is not None:
+        predicted = estimate_component_memory(len(discs), config.dtype)
+        memory.add_component(offset, len(discs), predicted, config.memory_budget)
+    return limit_discs(discs, config, max_discs)
+
+
+def limit_discs(discs, config=DEFAULT_CONFIG, max_discs=None):
+    """Apply the work budget of a component (``max_discs`` and ``memory_budget`` of
+    the configuration) to its discs
+
+    :param list discs: Discs created with :meth:`create_discs`
+    :param ExtractionConfig config: Parameters of the extraction
+    :param int max_discs: Maximal number of discs (by default, ``max_discs`` of
+        the configuration; 0 means no limit)
+
+    :returns: List of discs and the flag if the component is degraded (see
+        :meth:`component_discs`)
+    """
+    max_discs = config.max_discs if max_discs is None else max_discs
+    max_discs = budget_max_discs(len(discs), max_discs, config)
+    degraded = 0 < max_discs < len(discs)
+    if degraded:
+        discs = coarsen_discs(discs, max_discs, config)
+    degraded |= 0 < config.max_neighbours < len(discs) - 1
+    return discs, degraded
+
+
+def extract_component(segment, offset, config=DEFAULT_CONFIG, max_discs=None, memory=None,
+                      return_discs=False):
+    """Do the stroke extraction for a single connected component. Strokes of degraded
+    components (see :meth:`component_discs`) are marked
+
+    :param np.array segment: Binary image of the component (see :meth:`crop_component`)
+    :param np.array offset: Position of the top-left corner of the segment
+    :param ExtractionConfig config: Parameters of the extraction
+    :param int max_discs: Maximal number of discs (by default, ``max_discs`` of
+        the configuration; 0 means no limit)
+    :param MemoryStats memory: Object to collect the memory usage (optional)
+    :param bool return_discs: Return also the discs of the component
+
+    :returns: List of extracted :class:`Stroke` objects (and the list of discs, if
+        ``return_discs`` is set)
+    """
+    with memory_stage(memory, 'component') as usage:
         # Create discs
-        discs = create_discs(edge_pixels, skel_pixels, avg_width)
+        discs, degraded = component_discs(segment, offset, config, max_discs, memory)
 
-        # Create connections
-        connections, alt_connections = create_connections(discs)
+        # Create connections (of large components part by part)
+        with memory_stage(memory, 'connections'):
+            if len(discs) > MAX_PART_DISCS:
+                connections, alt_connections = partitioned_connections(discs, config)
+            else:
+                connections, alt_connections = create_connections(discs, config)
 
         # Create chains and, finally, strokes
-        chains = create_chains(connections, alt_connections)
-        segment_strokes = chains_to_strokes(discs, chains)
+        with memory_stage(memory, 'strokes'):
+            chains = create_chains(connections, alt_connections)
+            strokes = chains_to_strokes(discs, chains, config)
+        for stroke in strokes:
+            stroke.degraded = degraded
+    if memory is not None:
+        memory.finish_component(usage)
+    return (strokes, discs) if return_discs else strokes
+
+
+def stroke_extraction(input_image, config=DEFAULT_CONFIG, stats=None, dump_dir=None,
+                      dump_threshold=DUMP_THRESHOLD, memory=None, glyph_cache=None,
+                      dump_name='component'):
+    """Do the entire stroke extraction. Transform a raster input image into a set
+    of extracted strokes
+
+    :param np.array input_image: Input image in grayscale (bright background)
+    :param ExtractionConfig config: Parameters of the extraction
+    :param ExtractionStats stats: Object to collect the statistics of the extraction
+        (optional)
+    :param str dump_dir: Directory where components processed longer than
+        ``dump_threshold`` seconds are saved (see :meth:`dump_component`); None means
+        that nothing is saved
+    :param float dump_threshold: Time threshold of saving components (in seconds)
+    :param MemoryStats memory: Object to collect the memory usage of stages and components
+        (optional, see :class:`MemoryStats`)
+    :param GlyphCache glyph_cache: Cache of strokes of repeated components (optional, see
+        :class:`GlyphCache`); components found there are not processed again
+    :param str dump_name: Name of the image, put at the start of file names of saved
+        components (so components of many images can be saved in the same directory)
+
+    :returns: List of extracted :class:`Stroke` objects
+    :rtype: list[Stroke]
+    """
+    # After the time budget is exceeded, the rest of components is processed faster
+    deadline = time.perf_counter() + config.time_budget if config.time_budget > 0.0 else None
+
+    # Downscaling of images with thick strokes (optional)
+    factors = None
+    if config.target_width > 0.0:
+        from .rescaling import downscale_to_width
+        input_image, factors = downscale_to_width(input_image, config.target_width)
+
+    # Preprocessing
+    with memory_stage(memory, 'preprocessing'):
+        binary = preprocessing(input_image)
+
+    # Segmentation and skipping the noise
+    with memory_stage(memory, 'segmentation'):
+        labeled, bounding_boxes = segmentation(binary)
+        areas = component_areas(labeled, len(bounding_boxes))
+    selected, noise, small = component_filter(bounding_boxes, areas, config.min_area)
+    extracted_strokes = []
+
+    max_discs = config.max_discs
+    degraded = 0
+    cached = 0
+
+    # TODO: Try to make it parallel
+    for this_label in np.flatnonzero(selected) + 1:
+        if deadline is not None and time.perf_counter() > deadline:
+            max_discs = min(config.max_discs or DEGRADED_MAX_DISCS, DEGRADED_MAX_DISCS)
+        segment, offset = crop_component(labeled, this_label, bounding_boxes[this_label - 1])
+        key = None if glyph_cache is None else glyph_key(segment, config, max_discs)
+        strokes = None if key is None else glyph_cache.get(key, offset)
+        if strokes is not None:
+            cached += 1
+        else:
+            start_time = time.perf_counter()
+            strokes, discs = extract_component(segment, offset, config, max_discs, memory,
+                                               return_discs=True)
+            elapsed = time.perf_counter() - start_time
+            if dump_dir is not None and elapsed > dump_threshold:
+                from .replay import dump_component
+                dump_component(dump_dir, segment, offset, config, discs, max_discs, elapsed,
+                               dump_name)
+            if key is not None:
+                glyph_cache.put(key, strokes, offset)
+        degraded += any(stroke.degraded for stroke in strokes)
+        extracted_strokes.extend(strokes)
 
-        extracted_strokes.extend(segment_strokes)
+    if factors is not None:
+        from .rescaling import to_original_coordinates
+        to_original_coordinates(extracted_strokes, factors)
 
+    if stats is not None:
+        stats.components += len(bounding_boxes)
+        stats.skipped_noise += noise
+        stats.skipped_small += small
+        stats.degraded += degraded
+        stats.cached += cached
+        stats.strokes += len(extracted_strokes)
     return extracted_strokes
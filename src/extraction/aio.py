@@ -0,0 +1,128 @@
+import asyncio
+import time
+from contextlib import nullcontext
+
+import numpy as np
+
+from . import (preprocessing, segmentation, component_areas, component_filter, crop_component,
+               extract_component, DEGRADED_MAX_DISCS)
+from .glyph_cache import glyph_key
+from .rescaling import downscale_to_width, to_original_coordinates
+from ..config import DEFAULT_CONFIG
+
+
+def prepare_components(input_image, min_area=0):
+    """Do the preprocessing and the segmentation (the first, image-wide stage)
+
+    :param np.array input_image: Input image in grayscale (bright background)
+    :param int min_area: Minimal area of a component (see :meth:`component_filter`)
+
+    :returns: Labeled image, bounding boxes of components (see :meth:`segmentation`),
+        labels of components that are not noise and the numbers of components skipped
+        as noise and because of the area
+    """
+    labeled, bounding_boxes = segmentation(preprocessing(input_image))
+    areas = component_areas(labeled, len(bounding_boxes))
+    selected, noise, small = component_filter(bounding_boxes, areas, min_area)
+    return labeled, bounding_boxes, np.flatnonzero(selected) + 1, noise, small
+
+
+async def iter_components_async(input_image, config=DEFAULT_CONFIG, executor=None,
+                                max_concurrency=4, limiter=None, stats=None, glyph_cache=None):
+    """Asynchronous iterator over the connected components of the image (except the noise,
+    see :meth:`component_filter`) and their strokes. CPU-heavy stages run in the executor,
+    so the event loop is not blocked. Components are processed in the order of their
+    labels; at most ``max_concurrency`` of them are submitted ahead of the consumer, so
+    a slow consumer stops the extraction as well. If the iteration is cancelled (or
+    the iterator closed), components that have not started yet are dropped. The time
+    budget, the statistics and the glyph cache work as in :meth:`stroke_extraction`
+    (components submitted after the time budget is exceeded get fewer discs)
+
+    :param np.array input_image: Input image in grayscale (bright background)
+    :param ExtractionConfig config: Parameters of the extraction
+    :param executor: Thread or process pool (:class:`concurrent.futures.Executor`);
+        None means the default executor of the event loop
+    :param int max_concurrency: Maximal number of components processed at once
+    :param asyncio.Semaphore limiter: Semaphore shared by many calls to limit the total
+        number of components processed at once (optional)
+    :param ExtractionStats stats: Object to collect the statistics of the extraction
+        (optional)
+    :param GlyphCache glyph_cache: Cache of strokes of repeated components (optional)
+
+    :returns: Pairs (label of the component, list of its strokes)
+    """
+    loop = asyncio.get_running_loop()
+    limiter = limiter or nullcontext()
+    # After the time budget is exceeded, the rest of components is processed faster
+    deadline = time.perf_counter() + config.time_budget if config.time_budget > 0.0 else None
+
+    async def run(function, *args):
+        async with limiter:
+            return await loop.run_in_executor(executor, function, *args)
+
+    # Downscaling of images with thick strokes (optional, see :meth:`stroke_extraction`)
+    factors = None
+    if config.target_width > 0.0:
+        input_image, factors = await run(downscale_to_width, input_image, config.target_width)
+
+    labeled, bounding_boxes, labels, noise, small = await run(prepare_components, input_image,
+                                                              config.min_area)
+    if stats is not None:
+        stats.components += len(bounding_boxes)
+        stats.skipped_noise += noise
+        stats.skipped_small += small
+
+    components = iter(labels.tolist())
+    max_discs = config.max_discs
+    pending = []
+    try:
+        while True:
+            # Keep the number of components submitted ahead of the consumer limited
+            for this_label in components:
+                if deadline is not None and time.perf_counter() > deadline:
+                    max_discs = min(config.max_discs or DEGRADED_MAX_DISCS, DEGRADED_MAX_DISCS)
+                bounding_box = bounding_boxes[this_label - 1]
+                segment, offset = crop_component(labeled, this_label, bounding_box)
+                key = None if glyph_cache is None else glyph_key(segment, config, max_discs)
+                strokes = None if key is None else glyph_cache.get(key, offset)
+                if strokes is not None:
+                    task = loop.create_future()
+                    task.set_result(strokes)
+                    key = None
+                else:
+                    task = asyncio.ensure_future(run(extract_component, segment, offset,
+                                                     config, max_discs))
+                pending.append((this_label, task, key, offset, strokes is not None))
+                if len(pending) >= max_concurrency:
+                    break
+            if not pending:
+                break
+            this_label, task, key, offset, cached = pending.pop(0)
+            strokes = await task
+            if key is not None:
+                glyph_cache.put(key, strokes, offset)
+            if factors is not None:
+                to_original_coordinates(strokes, factors)
+            if stats is not None:
+                stats.cached += cached
+                stats.degraded += any(stroke.degraded for stroke in strokes)
+                stats.strokes += len(strokes)
+            yield this_label, strokes
+    finally:
+        for _, task, _, _, _ in pending:
+            task.cancel()
+
+
+async def extract_async(input_image, config=DEFAULT_CONFIG, executor=None, max_concurrency=4,
+                        limiter=None, stats=None, glyph_cache=None):
+    """Asynchronous version of :meth:`stroke_extraction` (see :meth:`iter_components_async`
+    for the description of parameters)
+
+    :returns: List of extracted :class:`Stroke` objects
+    :rtype: list[Stroke]
+    """
+    extracted_strokes = []
+    async for _, strokes in iter_components_async(input_image, config, executor,
+                                                  max_concurrency, limiter, stats, glyph_cache):
+        extracted_strokes.extend(strokes)
+    return extracted_strokes
@@ -1,10 +1,10 @@
 import numpy as np
 
 from ..common.numerical import euc_dist, pseudo_gaussian, vcos
-from ..config import RHO, Q_MIN, QR_MAX
+from ..config import DEFAULT_CONFIG
 
 
-def connection_quality_and_side(disc1, disc2):
+def connection_quality_and_side(disc1, disc2, config=DEFAULT_CONFIG):
     """Calculate the quality of the connection between two discs. The high-quality connection
     should fulfill the following conditions:
 
@@ -17,21 +17,22 @@ def connection_quality_and_side(disc1, disc2):
     If discs B and C lay on the same side of disc A, the sign of this value for pairs (A, B)
     and (A, C) should be the same.
 
+    :param ExtractionConfig config: Parameters of the extraction
     :returns: 2-element tuple (see :meth:`connection_quality` i :meth:`connection_side`)
     """
 
     r1 = disc1.radius
     r2 = disc2.radius
 
-    distance = euc_dist(disc1.centre, disc2.centre)
-    q_dist = pseudo_gaussian(distance, r1, RHO)
+    distance = euc_dist(disc1.centre, disc2.centre, config.dtype)
+    q_dist = pseudo_gaussian(distance, r1, config.rho)
 
     q_area = min(r1, r2) / max(r1, r2)
 
     direction = disc1.get_directional_vector()
     real = disc1.centre - disc2.centre
-    cos_betha = vcos(direction, real)
-    q_angle = vcos(direction, real) ** 2
+    cos_betha = vcos(direction, real, config.dtype)
+    q_angle = cos_betha ** 2
 
     quality = q_dist * q_area * q_angle
     side = (cos_betha > 0.0)
@@ -39,28 +40,28 @@ def connection_quality_and_side(disc1, disc2):
     return quality, side
 
 
-def connection_quality(d1, d2):
+def connection_quality(d1, d2, config=DEFAULT_CONFIG):
     """Get only the quality value from :meth:`connection_quality_and_side`
 
     :returns: ality measure in range (0, 1]
     :rtype: float
     """
 
-    quality, _ = connection_quality_and_side(d1, d2)
+    quality, _ = connection_quality_and_side(d1, d2, config)
     return quality
 
 
-def connection_side(d1, d2):
+def connection_side(d1, d2, config=DEFAULT_CONFIG):
     """Get only the information about the side from :meth:`connection_quality_and_side`
 
     :returns: The location of the 2nd disc regarding the 1st one (left/right)
     :rtype: Boolean
     """
-    _, side = connection_quality_and_side(d1, d2)
+    _, side = connection_quality_and_side(d1, d2, config)
     return side
 
 
-def get_connection_matrixes(disc_list):
+def get_connection_matrixes(disc_list, config=DEFAULT_CONFIG):
     """Create two matrices with information about connections between all possible pairs of discs.
 
     * The first one is a triangular matrix with the quality of each connection (this is
@@ -68,50 +69,80 @@ def get_connection_matrixes(disc_list):
     * The second one contains the information about the relative position of the discs.
       If the element (i, j) equals the element (i, k), it means that disc j lays on the same
       side of disc i as disc k, so the chain j-i-k does not make any sense.
+
+    If ``max_neighbours`` is set in the configuration, only pairs of discs where one of
+    them is among the nearest neighbours of the other are considered; other connections
+    have the quality 0.
+
+    :param list disc_list: List of discs
+    :param ExtractionConfig config: Parameters of the extraction
     """
 
     num = len(disc_list)
-    quality_matrix = np.zeros((num, num))
+    quality_matrix = np.zeros((num, num), dtype=config.dtype)
     side_matrix = np.full((num, num), False)
-    for i in range(num):
-        for j in range(i + 1, num):
-            qij, sij = connection_quality_and_side(disc_list[i], disc_list[j])
-            qji, sji = connection_quality_and_side(disc_list[j], disc_list[i])
+    for i, j in candidate_pairs(disc_list, config.max_neighbours):
+        qij, sij = connection_quality_and_side(disc_list[i], disc_list[j], config)
+        qji, sji = connection_quality_and_side(disc_list[j], disc_list[i], config)
 
-            quality_matrix[i, j] = min(qij, qji)
+        quality_matrix[i, j] = min(qij, qji)
 
-            side_matrix[i, j] = sij
-            side_matrix[j, i] = sji
+        side_matrix[i, j] = sij
+        side_matrix[j, i] = sji
 
     return quality_matrix, side_matrix
 
 
-def copy_and_clean(quality_matrix):
+def candidate_pairs(disc_list, max_neighbours=0):
+    """Get pairs of discs that might be connected
+
+    :param list disc_list: List of discs
+    :param int max_neighbours: Number of the nearest discs of each disc to be considered
+        (0 means all discs)
+    :returns: Pairs (i, j) where i < j: a list of neighbours, or a generator if all pairs
+        are considered (so their number, quadratic in the number of discs, is never stored)
+    """
+    num = len(disc_list)
+    if max_neighbours <= 0 or max_neighbours >= num - 1:
+        return ((i, j) for i in range(num) for j in range(i + 1, num))
+
+    from sklearn.neighbors import KDTree
+
+    centres = np.array([disc.centre for disc in disc_list])
+    _, nearest_ids = KDTree(centres).query(centres, k=(max_neighbours + 1))
+    pairs = {(min(i, j), max(i, j)) for i, row in enumerate(nearest_ids) for j in row if i != j}
+    return sorted(pairs)
+
+
+def copy_and_clean(quality_matrix, config=DEFAULT_CONFIG):
     """Make a copy of the matrix with the quality of each connection. Replace
     poor-quality elements with zeros
+
+    :param ExtractionConfig config: Parameters of the extraction
     """
 
     num = len(quality_matrix)
-    quality_copy = np.zeros((num, num))
+    quality_copy = np.zeros((num, num), dtype=quality_matrix.dtype)
     for i in range(num):
         for j in range(i + 1, num):
             quality = quality_matrix[i, j]
-            if quality >= Q_MIN:
+            if quality >= config.q_min:
                 quality_copy[i, j] = quality
 
     return quality_copy
 
 
-def create_strong_connections(quality_matrix, side_matrix):
+def create_strong_connections(quality_matrix, side_matrix, config=DEFAULT_CONFIG):
     """Make a selection of connections using a greedy algorithm
 
     :param np.array quality_matrix: Matrix with the quality of each connection,
         created with :meth:`get_connection_matrixes`
     :param np.array side_matrix: Matrix with the the relative position of discs within
         each connection, created with :meth:`get_connection_matrixes`
+    :param ExtractionConfig config: Parameters of the extraction
     :returns: List of connections as tuples (i,j)
     """
-    quality_copy = copy_and_clean(quality_matrix)
+    quality_copy = copy_and_clean(quality_matrix, config)
     matrix_size = len(quality_copy)
     connections = []
 
@@ -133,7 +164,8 @@ def create_strong_connections(quality_matrix, side_matrix):
     return connections
 
 
-def find_alt_connections(quality_matrix, side_matrix, strong_connections):
+def find_alt_connections(quality_matrix, side_matrix, strong_connections,
+                         config=DEFAULT_CONFIG):
     """Look for alternative connections, that is the ones that connect the end of one stroke
     to the point within another stroke
 
@@ -143,11 +175,12 @@ def find_alt_connections(quality_matrix, side_matrix, strong_connections):
         each connection, created with :meth:`get_connection_matrixes`
     :param list strong_connections: List of connection created with
         :meth:`create_strong_connections`
+    :param ExtractionConfig config: Parameters of the extraction
 
     :returns: List of tuples (i, j, k) where (i, j) is an alternative connection and k is
         the next disc in the stroke with disc j
     """
-    quality_copy = copy_and_clean(quality_matrix)
+    quality_copy = copy_and_clean(quality_matrix, config)
     number_of_discs = len(quality_copy)
     alt_connections = []
 
@@ -181,7 +214,7 @@ def find_alt_connections(quality_matrix, side_matrix, strong_connections):
                 continue
             # ...with acceptable quality...
             quality = quality_copy[min(i, j), max(i, j)]
-            if quality < Q_MIN:
+            if quality < config.q_min:
                 continue
             # ...linking to the fragment of another stroke...
             side_ji = side_matrix[j, i]
@@ -191,7 +224,7 @@ def find_alt_connections(quality_matrix, side_matrix, strong_connections):
             # ...and not much worse from the existing connection within the stroke
             k2 = neighbors[side_ji][j]
             cmp_quality = quality_copy[min(k2, j), max(k2, j)]
-            if (cmp_quality - quality) > QR_MAX:
+            if (cmp_quality - quality) > config.qr_max:
                 continue
 
             if cmp_quality > alt_quality:
@@ -204,12 +237,24 @@ def find_alt_connections(quality_matrix, side_matrix, strong_connections):
     return alt_connections
 
 
-def create_connections(discs):
+def select_connections(quality_matrix, side_matrix, config=DEFAULT_CONFIG):
+    """Select basic and alternative connections using already computed matrices. This is
+    the part of :meth:`create_connections` that depends on the thresholds only
+
+    :param np.array quality_matrix: Matrix created with :meth:`get_connection_matrixes`
+    :param np.array side_matrix: Matrix created with :meth:`get_connection_matrixes`
+    :param ExtractionConfig config: Parameters of the extraction
+    """
+    connections = create_strong_connections(quality_matrix, side_matrix, config)
+    alt_connections = find_alt_connections(quality_matrix, side_matrix, connections, config)
+    return connections, alt_connections
+
+
+def create_connections(discs, config=DEFAULT_CONFIG):
     """Do the entire stage of creating connections (basic and alternative)
 
     :param list discs: List of discs
+    :param ExtractionConfig config: Parameters of the extraction
     """
-    quality_matrix, side_matrix = get_connection_matrixes(discs)
-    connections = create_strong_connections(quality_matrix, side_matrix)
-    alt_connections = find_alt_connections(quality_matrix, side_matrix, connections)
-    return connections, alt_connections
+    quality_matrix, side_matrix = get_connection_matrixes(discs, config)
+    return select_connections(quality_matrix, side_matrix, config)
@@ -1,8 +1,9 @@
+import copy
+
 import numpy as np
-from sklearn.neighbors import KDTree
 
 from ..common.numerical import euc_dist, pcos, f2
-from ..config import R_M
+from ..config import DEFAULT_CONFIG
 
 
 class Disc:
@@ -11,19 +12,30 @@ class Disc:
     :param array[int] centre: Coordinates of the disc center (in the skeleton)
     :param array[int] point1: Coordinates of the 1st tangent point (letter edge and the circle)
     :param array[int] point2: Coordinates of the 2nd tangent point (letter edge and the circle)
+    :param str dtype: Floating-point type of the radius and the angle
     """
 
-    def __init__(self, centre, point1, point2):
+    def __init__(self, centre, point1, point2, dtype=None):
         self.centre = centre
         self.point1 = point1
         self.point2 = point2
 
-        self.radius = (euc_dist(centre, point1) + euc_dist(centre, point2)) * 0.5
-        self.cos_al = pcos(point1, centre, point2)
+        self.radius = (euc_dist(centre, point1, dtype) + euc_dist(centre, point2, dtype)) * 0.5
+        self.cos_al = pcos(point1, centre, point2, dtype)
 
     def __repr__(self):
         return f'C=({self.centre[0]}, {self.centre[1]}) r={f2(self.radius)}'
 
+    def scaled(self, scale):
+        """Get a copy of the disc with the radius multiplied by the scale (the centre and
+        tangent points are the same)
+
+        :rtype: Disc
+        """
+        disc = copy.copy(self)
+        disc.radius = self.radius * scale
+        return disc
+
     def quality(self, expected):
         """Calculate the quality of the disc. An ideal disc should have:
 
@@ -44,15 +56,17 @@ class Disc:
         return np.array([vec_points[1], -vec_points[0]])
 
 
-def create_discs(edge_pixels, skel_pixels, avg_width):
+def create_discs(edge_pixels, skel_pixels, avg_width, config=DEFAULT_CONFIG):
     """Transform a set of pixels into a set of discs
 
     :param np.ndarray edge_pixels: Egde pixels, each of them might be a tangent point
     :param np.ndarray skel_pixels: Skeleton pixels, each of them might be a disc center
     :param float avg_width: Expected radius
+    :param ExtractionConfig config: Parameters of the extraction
     :return: List of created and selected discs
     :rtype: list[Disc]
     """
+    from sklearn.neighbors import KDTree
 
     # Use KD-tree to optimize search
     tree = KDTree(edge_pixels, leaf_size=10)
@@ -73,18 +87,55 @@ def create_discs(edge_pixels, skel_pixels, avg_width):
 
         if p2_dist[0][0] < max_error:
             p2 = edge_pixels[p2_id[0][0]]
-            discs.append(Disc(centre, p1, p2))
+            discs.append(Disc(centre, p1, p2, config.dtype))
 
     # Sort discs by quality
     discs.sort(key=lambda x: x.quality(avg_width), reverse=True)
 
-    # Select discs using the greedy algorithm
+    return select_discs(discs, config.r_m)
+
+
+def select_discs(discs, r_m):
+    """Select discs using the greedy algorithm: take the best disc and drop all discs with
+    centres closer to its centre than its radius multiplied by ``r_m``, and so on
+
+    :param list discs: Discs sorted by quality (the best first)
+    :param float r_m: Ratio of the radius where there should not be any other disc centre
+    :return: Selected discs (sorted by quality as well)
+    :rtype: list[Disc]
+    """
+    if len(discs) == 0:
+        return []
+
+    # Distances to all remaining discs at once (the same formula as in euc_dist)
+    centres = np.array([disc.centre for disc in discs])
+    remaining = np.arange(len(discs))
     selected_discs = []
-    while len(discs) > 0:
-        best_disc = discs[0]
+    while len(remaining) > 0:
+        best_disc = discs[remaining[0]]
         selected_discs.append(best_disc)
         cb = best_disc.centre
-        cr = best_disc.radius * R_M
-        discs = list(filter(lambda x: euc_dist(x.centre, cb) > cr, discs))
+        cr = best_disc.radius * r_m
+        distances = np.sqrt(((centres[remaining] - cb) ** 2).sum(axis=1))
+        remaining = remaining[distances > cr]
 
     return selected_discs
+
+
+def coarsen_discs(discs, max_discs, config=DEFAULT_CONFIG):
+    """Select fewer discs, so there are at most ``max_discs`` of them. The selection
+    (see :meth:`select_discs`) is repeated with a larger radius; the number of discs
+    along a stroke is inversely proportional to it. Radii of selected discs are enlarged
+    in the same way, so the distance between neighbours stays close to the radius (which
+    is the expected distance in :meth:`connection_quality_and_side`)
+
+    :param list discs: Discs created with :meth:`create_discs`
+    :param int max_discs: Maximal number of discs
+    :param ExtractionConfig config: Parameters of the extraction
+    :rtype: list[Disc]
+    """
+    scale = 1.0
+    while len(discs) > max_discs:
+        scale *= max(len(discs) / max_discs, 1.1)
+        discs = select_discs(discs, config.r_m * scale)
+    return [disc.scaled(scale) for disc in discs]
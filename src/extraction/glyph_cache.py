@@ -0,0 +1,116 @@
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+
+
+"""Default maximal number of components stored in :class:`GlyphCache`"""
+GLYPH_CACHE_SIZE = 4096
+
+
+def glyph_key(segment, config, max_discs=None):
+    """Get the key of a connected component in :class:`GlyphCache`: the digest of its binary
+    image (which is already cropped to the bounding box, so it does not depend on
+    the position), the parameters of the extraction and the maximal number of discs
+
+    :param np.array segment: Binary image of the component (see :meth:`crop_component`)
+    :param ExtractionConfig config: Parameters of the extraction
+    :param int max_discs: Maximal number of discs given to :meth:`extract_component`
+    :rtype: str
+    """
+    digest = hashlib.sha1()
+    digest.update(np.asarray(segment.shape, dtype='int64').tobytes())
+    digest.update(np.packbits(segment, axis=None).tobytes())
+    digest.update(f'{config.digest()};{max_discs}'.encode('utf-8'))
+    return digest.hexdigest()
+
+
+class GlyphCache:
+    """Cache of strokes of connected components, for pages where the same glyphs repeat
+    many times (e.g. printed text). Strokes are stored relative to the top-left corner of
+    the component and moved to the position of each repetition (see
+    :meth:`Stroke.translated`). The least recently used components are dropped when
+    the cache is full. Pass the same instance to :meth:`stroke_extraction` for many images
+    to share it between them
+
+    Strokes taken from the cache are equal to the extracted ones, except for the rounding
+    of coefficients of polynomials (they are fitted once, at the first position)
+
+    :param int max_size: Maximal number of stored components
+    """
+
+    def __init__(self, max_size=GLYPH_CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        return ', '.join(f'{name}={value}' for name, value in self.as_dict().items())
+
+    @property
+    def hit_rate(self):
+        """Fraction of lookups answered from the cache
+
+        :rtype: float
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.0
+
+    def as_dict(self):
+        """Get the size and counters of the cache
+
+        :rtype: dict
+        """
+        return {'size': len(self._entries), 'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions, 'hit_rate': self.hit_rate}
+
+    def get(self, key, offset):
+        """Get strokes of the component, moved to its position
+
+        :param str key: Key of the component (see :meth:`glyph_key`)
+        :param np.array offset: Position of the top-left corner of the component
+        :returns: List of strokes or None if the component is not in the cache
+        """
+        strokes = self._entries.get(key)
+        if strokes is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return [stroke.translated(offset) for stroke in strokes]
+
+    def put(self, key, strokes, offset):
+        """Store strokes of the component extracted at the given position
+
+        :param str key: Key of the component (see :meth:`glyph_key`)
+        :param list strokes: Extracted strokes
+        :param np.array offset: Position of the top-left corner of the component
+        """
+        if self.max_size <= 0:
+            return
+        self._entries[key] = [stroke.translated(-np.asarray(offset)) for stroke in strokes]
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+
+"""Caches shared by all images processed in this process (see :meth:`shared_glyph_cache`)"""
+_shared_caches = {}
+
+
+def shared_glyph_cache(max_size=GLYPH_CACHE_SIZE):
+    """Get the cache shared by all images processed in this process (e.g. by a worker of
+    :meth:`run_batch`), created on the first call
+
+    :param int max_size: Maximal number of stored components
+    :rtype: GlyphCache
+    """
+    if max_size not in _shared_caches:
+        _shared_caches[max_size] = GlyphCache(max_size)
+    return _shared_caches[max_size]
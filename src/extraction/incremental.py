@@ -0,0 +1,155 @@
+import numpy as np
+
+from . import (binarization, average_width, noise_reduction, component_filter, crop_component,
+               extract_component, BOLD_WIDTH)
+from ..config import DEFAULT_CONFIG
+
+
+"""Pixels of the preprocessed image that might change after editing a single pixel (in each
+direction): the noise reduction is a dilation followed by an erosion, each of them with
+the reach of 1 pixel"""
+HALO = 2
+
+
+def grow(range_slice, size, margin=HALO):
+    """Extend the range by the margin on both sides, within [0, size)
+
+    :rtype: slice
+    """
+    return slice(max(0, range_slice.start - margin), min(size, range_slice.stop + margin))
+
+
+class IncrementalExtraction:
+    """Stroke extraction (see :meth:`stroke_extraction`) of an image that is edited many
+    times, e.g. in an annotation tool. The labeled image and strokes of each connected
+    component are kept; after an edit (see :meth:`update`), the preprocessing is repeated
+    only around the edited region, and only components that touch the changed pixels are
+    extracted again
+
+    The threshold of the binarization and the decision about the erosion (see
+    :meth:`preprocessing`) are made once, for the initial image, so edits never change
+    the binary image far from them. Downscaling (``target_width``) is not supported, and
+    the time budget is ignored
+
+    :param np.array input_image: Input image in grayscale (bright background); it is copied
+    :param ExtractionConfig config: Parameters of the extraction
+    """
+
+    def __init__(self, input_image, config=DEFAULT_CONFIG):
+        from skimage.filters import threshold_otsu
+
+        if config.target_width > 0.0:
+            raise ValueError('The incremental extraction does not support downscaling')
+        self.config = config
+        self.image = np.array(input_image)
+        self.threshold = None if self.image.dtype == bool else threshold_otsu(self.image)
+        binary = binarization(self.image, self.threshold)
+        self.erode = bool(average_width(binary) > BOLD_WIDTH)
+
+        # The preprocessed image and labels have the 1 pixel margin (see :meth:`preprocessing`)
+        height, width = binary.shape
+        self.binary = np.zeros((height + 2, width + 2), dtype=bool)
+        noise_reduction(binary, self.erode, output=self.binary[1:-1, 1:-1])
+        self.labeled = np.zeros(self.binary.shape, dtype='int32')
+        self._components = {}
+        self._next_label = 1
+        self._extract((slice(0, height + 2), slice(0, width + 2)), [])
+
+    def strokes(self):
+        """Get strokes of all components, in the same order as :meth:`stroke_extraction`
+        (components sorted by their first pixels)
+
+        :rtype: list[Stroke]
+        """
+        extracted_strokes = []
+        for _, _, strokes in sorted(self._components.values(), key=lambda c: c[0]):
+            extracted_strokes.extend(strokes)
+        return extracted_strokes
+
+    def update(self, region, values):
+        """Change pixels of the image and update the strokes
+
+        :param tuple region: Pair of slices (rows, columns) of the image
+        :param values: New values of pixels in the region (an array or a number)
+        :returns: Number of components extracted again
+        :rtype: int
+        """
+        height, width = self.image.shape[:2]
+        rows, cols = (slice(*k.indices(n)[:2]) for k, n in zip(region, (height, width)))
+        self.image[rows, cols] = values
+
+        # Preprocessing of pixels that might change, with the context they depend on
+        changed_rows, changed_cols = grow(rows, height), grow(cols, width)
+        context_rows, context_cols = grow(changed_rows, height), grow(changed_cols, width)
+        reduced = noise_reduction(binarization(self.image[context_rows, context_cols],
+                                               self.threshold), self.erode)
+        new_binary = reduced[(changed_rows.start - context_rows.start):
+                             (changed_rows.stop - context_rows.start),
+                             (changed_cols.start - context_cols.start):
+                             (changed_cols.stop - context_cols.start)]
+
+        # Coordinates with the margin
+        window = (slice(changed_rows.start + 1, changed_rows.stop + 1),
+                  slice(changed_cols.start + 1, changed_cols.stop + 1))
+        changed = new_binary != self.binary[window]
+        if not changed.any():
+            return 0
+        self.binary[window] = new_binary
+
+        # Components with changed pixels or their (4-connected) neighbours
+        from scipy.ndimage import binary_dilation
+
+        ring = (slice(window[0].start - 1, window[0].stop + 1),
+                slice(window[1].start - 1, window[1].stop + 1))
+        touched = binary_dilation(np.pad(changed, 1))
+        affected = np.unique(self.labeled[ring][touched])
+        affected = affected[affected > 0].tolist()
+
+        # The box covering affected components and changed pixels, with the 1 pixel margin
+        r0, r1, c0, c1 = window[0].start, window[0].stop, window[1].start, window[1].stop
+        for this_label in affected:
+            box_rows, box_cols = self._components[this_label][1]
+            r0, r1 = min(r0, box_rows.start), max(r1, box_rows.stop)
+            c0, c1 = min(c0, box_cols.start), max(c1, box_cols.stop)
+        box = (slice(max(0, r0 - 1), min(self.binary.shape[0], r1 + 1)),
+               slice(max(0, c0 - 1), min(self.binary.shape[1], c1 + 1)))
+        return self._extract(box, affected)
+
+    def _extract(self, box, affected):
+        """Label again the foreground of the box that is not a part of unaffected components,
+        and extract strokes of the new components
+
+        :param tuple box: Pair of slices of the preprocessed image
+        :param list affected: Labels of components to be replaced
+        :returns: Number of new components
+        """
+        from scipy.ndimage import label, find_objects
+
+        labels = self.labeled[box]
+        replaced = np.isin(labels, affected) if affected else np.zeros(labels.shape, dtype=bool)
+        mask = self.binary[box] & (replaced | (labels == 0))
+        for this_label in affected:
+            del self._components[this_label]
+
+        local_labeled, number = label(mask)
+        lookup = np.arange(self._next_label - 1, self._next_label + number, dtype='int32')
+        lookup[0] = 0
+        labels[replaced] = 0
+        labels[mask] = lookup[local_labeled[mask]]
+        self._next_label += number
+
+        bounding_boxes = find_objects(local_labeled)
+        areas = np.bincount(local_labeled.ravel(), minlength=number + 1)[1:]
+        selected, _, _ = component_filter(bounding_boxes, areas, self.config.min_area)
+        origin = np.array([box[0].start, box[1].start])
+        for local_label, bounding_box in enumerate(bounding_boxes, start=1):
+            segment, offset = crop_component(local_labeled, local_label, bounding_box)
+            offset = offset + origin
+            # The first pixel in the raster order decides about the order of components
+            first = tuple(np.unravel_index(np.argmax(segment), segment.shape) + offset)
+            global_box = tuple(slice(s.start + o, s.stop + o) for s, o in zip(bounding_box, origin))
+            strokes = []
+            if selected[local_label - 1]:
+                strokes = extract_component(segment, offset, self.config)
+            self._components[int(lookup[local_label])] = (first, global_box, strokes)
+        return number
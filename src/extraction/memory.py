@@ -0,0 +1,177 @@
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from math import isqrt
+
+import numpy as np
+
+from .partition import MAX_PART_DISCS
+
+
+"""Memory used by the connection stage of a component for each pair of discs, when all pairs
+are scored (see :meth:`get_connection_matrixes`), apart from matrices of qualities: the boolean
+matrix of sides"""
+DENSE_BYTES_PER_PAIR = 1
+
+"""Number of matrices of qualities (of the floating-point type of the configuration) that
+exist at the same time: the matrix and its cleaned copy (see :meth:`copy_and_clean`).
+Together with :data:`DENSE_BYTES_PER_PAIR`, it matches the peak measured with
+:mod:`tracemalloc` (17 bytes per pair for float64, 9 for float32)"""
+QUALITY_MATRICES = 2
+
+"""Memory used by the connection stage of a component for each disc, when the component is
+split into parts (see :meth:`partitioned_connections`)"""
+PARTITIONED_BYTES_PER_DISC = 2000
+
+
+def dense_bytes_per_pair(dtype='float64'):
+    """Get the memory used for each pair of discs when all pairs are scored
+
+    :param str dtype: Floating-point type of the matrix of qualities
+    :rtype: int
+    """
+    return DENSE_BYTES_PER_PAIR + QUALITY_MATRICES * np.dtype(dtype).itemsize
+
+
+def estimate_component_memory(number_of_discs, dtype='float64'):
+    """Estimate the peak memory of creating connections of a component
+
+    :param int number_of_discs: Number of discs of the component
+    :param str dtype: Floating-point type of the extraction (see :data:`DTYPE`)
+    :returns: Number of bytes
+    :rtype: int
+    """
+    if number_of_discs > MAX_PART_DISCS:
+        return PARTITIONED_BYTES_PER_DISC * number_of_discs
+    return dense_bytes_per_pair(dtype) * number_of_discs * number_of_discs
+
+
+def discs_within_budget(memory_budget, dtype='float64'):
+    """Get the maximal number of discs of a component that fits in the memory budget
+    (see :meth:`estimate_component_memory`)
+
+    :param int memory_budget: Number of bytes
+    :param str dtype: Floating-point type of the extraction
+    :rtype: int
+    """
+    partitioned = memory_budget // PARTITIONED_BYTES_PER_DISC
+    if partitioned > MAX_PART_DISCS:
+        return partitioned
+    return max(1, min(MAX_PART_DISCS, isqrt(memory_budget // dense_bytes_per_pair(dtype))))
+
+
+def budget_max_discs(number_of_discs, max_discs, config):
+    """Lower the maximal number of discs of a component whose connections would exceed
+    ``memory_budget`` of the configuration (see :meth:`estimate_component_memory`)
+
+    :param int number_of_discs: Number of created discs
+    :param int max_discs: Maximal number of discs (0 means no limit)
+    :param ExtractionConfig config: Parameters of the extraction
+    :returns: Maximal number of discs within the budget (0 means no limit)
+    :rtype: int
+    """
+    memory_budget = config.memory_budget
+    if 0 < memory_budget < estimate_component_memory(number_of_discs, config.dtype):
+        budget_discs = discs_within_budget(memory_budget, config.dtype)
+        return min(max_discs, budget_discs) if max_discs > 0 else budget_discs
+    return max_discs
+
+
+def memory_stage(memory, name):
+    """Measure the stage with :meth:`MemoryStats.stage` if the object is given
+
+    :param MemoryStats memory: Object collecting the measurements (or None)
+    :param str name: Name of the stage
+    """
+    return nullcontext({}) if memory is None else memory.stage(name)
+
+
+class MemoryStats:
+    """Memory usage measured with :mod:`tracemalloc` during the stroke extraction. Pass
+    an instance to :meth:`stroke_extraction` to fill it (tracing is started for the time of
+    the extraction, which makes it a few times slower). It contains:
+
+    * ``stages`` - for each stage (e.g. ``preprocessing``, ``discs``, ``connections``):
+      the number of calls, the highest peak and the total retained memory (in bytes, above
+      the memory used at the start of the stage),
+    * ``components`` - for each processed component: its position, the number of created
+      discs, the memory predicted before creating connections (see
+      :meth:`estimate_component_memory`), whether it exceeds the budget, and the peak.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.components = []
+        self._frames = []
+        self._started = False
+
+    @contextmanager
+    def stage(self, name):
+        """Measure the peak and retained memory of the code within the context. Stages
+        might be nested
+
+        :param str name: Name of the stage
+        :returns: Context manager giving a dictionary, where ``peak`` and ``retained`` are
+            set at the end
+        """
+        if not self._frames and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started = True
+        current, peak = tracemalloc.get_traced_memory()
+        if self._frames:
+            # The peak is reset below, so the outer stage keeps its peak so far
+            self._frames[-1][1] = max(self._frames[-1][1], peak)
+        tracemalloc.reset_peak()
+        frame = [current, current]
+        self._frames.append(frame)
+        usage = {}
+        try:
+            yield usage
+        finally:
+            end, peak = tracemalloc.get_traced_memory()
+            self._frames.pop()
+            peak = max(frame[1], peak)
+            if self._frames:
+                self._frames[-1][1] = max(self._frames[-1][1], peak)
+            elif self._started:
+                tracemalloc.stop()
+                self._started = False
+
+            usage['peak'] = peak - frame[0]
+            usage['retained'] = end - frame[0]
+            record = self.stages.setdefault(name, {'calls': 0, 'peak': 0, 'retained': 0})
+            record['calls'] += 1
+            record['peak'] = max(record['peak'], usage['peak'])
+            record['retained'] += usage['retained']
+
+    def add_component(self, offset, number_of_discs, predicted, memory_budget=0):
+        """Record the prediction for a component (its peak is set by
+        :meth:`finish_component`)"""
+        self.components.append({
+            'offset': tuple(int(x) for x in offset),
+            'discs': number_of_discs,
+            'predicted': predicted,
+            'exceeds_budget': 0 < memory_budget < predicted,
+            'peak': None,
+        })
+
+    def finish_component(self, usage):
+        """Set the peak memory of the last recorded component"""
+        if self.components:
+            self.components[-1]['peak'] = usage['peak']
+
+    def report(self):
+        """Get the measurements as a readable table
+
+        :rtype: str
+        """
+        lines = [f'{"stage":16s} {"calls":>7s} {"peak [MB]":>10s} {"retained [MB]":>14s}']
+        for name, record in self.stages.items():
+            lines.append(f'{name:16s} {record["calls"]:7d} {record["peak"] / 2 ** 20:10.2f} '
+                         f'{record["retained"] / 2 ** 20:14.2f}')
+        if self.components:
+            largest = max(self.components, key=lambda c: c['peak'] or 0)
+            exceeding = sum(c['exceeds_budget'] for c in self.components)
+            lines.append(f'Components: {len(self.components)}, over the budget: {exceeding}, '
+                         f'the largest peak: {(largest["peak"] or 0) / 2 ** 20:.2f} MB '
+                         f'({largest["discs"]} discs at {largest["offset"]})')
+        return '\n'.join(lines)
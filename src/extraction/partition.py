@@ -0,0 +1,220 @@
+import numpy as np
+
+from .connection_functions import candidate_pairs, connection_quality_and_side
+from ..config import DEFAULT_CONFIG
+
+
+"""Components with more discs than this are split into parts by :meth:`extract_component`
+(see :meth:`partitioned_connections`)"""
+MAX_PART_DISCS = 1000
+
+
+def connection_reach(discs, config=DEFAULT_CONFIG):
+    """Get the maximal distance between centres of two discs that might be connected.
+    The quality of a connection is not greater than its distance factor (see
+    :meth:`connection_quality_and_side`), which falls below ``q_min`` when the distance is
+    greater than ``1 + sqrt(-rho * ln(q_min))`` radii of the disc
+
+    :param list discs: List of discs
+    :param ExtractionConfig config: Parameters of the extraction
+    :rtype: float
+    """
+    if config.q_min <= 0.0 or not discs:
+        return np.inf
+    factor = 1.0 + np.sqrt(-config.rho * np.log(min(config.q_min, 1.0)))
+    # A small margin for rounding errors
+    return factor * max(disc.radius for disc in discs) * (1.0 + 1e-6)
+
+
+def split_discs(centres, max_part_discs=MAX_PART_DISCS):
+    """Split the plane into rectangular parts (a k-d tree with splits in medians) with
+    at most ``max_part_discs`` disc centres each, unless the centres cannot be separated
+
+    :param np.array centres: Centres of discs (N x 2)
+    :returns: List of parts as pairs (lower corner, upper corner) of rectangles; each point
+        of the plane belongs to exactly one of them (the lower bounds are included)
+    """
+    parts = []
+    pending = [(np.full(2, -np.inf), np.full(2, np.inf), np.arange(len(centres)))]
+    while pending:
+        lower, upper, indices = pending.pop()
+        if len(indices) <= max_part_discs:
+            parts.append((lower, upper))
+            continue
+        points = centres[indices]
+        extents = points.max(axis=0) - points.min(axis=0)
+        for axis in np.argsort(-extents, kind='stable'):
+            value = np.median(points[:, axis])
+            left = points[:, axis] < value
+            if not left.any():
+                # Many centres equal to the median - split above it
+                value = np.min(points[points[:, axis] > value, axis], initial=np.inf)
+                left = points[:, axis] < value
+            if left.any() and not left.all():
+                break
+        else:
+            parts.append((lower, upper))
+            continue
+        left_upper = upper.copy()
+        left_upper[axis] = value
+        right_lower = lower.copy()
+        right_lower[axis] = value
+        pending.append((right_lower, upper, indices[~left]))
+        pending.append((lower, left_upper, indices[left]))
+    return parts
+
+
+def part_candidates(discs, indices, lower, upper, reach, config=DEFAULT_CONFIG,
+                    allowed=None):
+    """Find the connections of a single part with the quality not lower than ``q_min``.
+    A connection belongs to the part with the middle point between the centres of discs,
+    so the part needs discs up to ``reach / 2`` outside its rectangle
+
+    :param list discs: Discs of the part (with the margin)
+    :param np.array indices: Indices of these discs in the component
+    :param np.array lower: Lower corner of the part (see :meth:`split_discs`)
+    :param np.array upper: Upper corner of the part
+    :param float reach: Maximal length of a connection (see :meth:`connection_reach`)
+    :param ExtractionConfig config: Parameters of the extraction
+    :param set allowed: Pairs of indices (i, j), i < j, that might be considered (None means
+        all pairs, see :meth:`candidate_pairs`)
+
+    :returns: List of tuples (quality, i, j, side of j regarding i, side of i regarding j)
+        with indices of discs in the component
+    """
+    from scipy.spatial import cKDTree
+
+    if len(discs) < 2:
+        return []
+    centres = np.array([disc.centre for disc in discs], dtype=float)
+    pairs = cKDTree(centres).query_pairs(reach, output_type='ndarray')
+    pairs = pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+    middles = (centres[pairs[:, 0]] + centres[pairs[:, 1]]) / 2.0
+    owned = np.all((middles >= lower) & (middles < upper), axis=1)
+
+    candidates = []
+    for a, b in pairs[owned]:
+        i, j = int(indices[a]), int(indices[b])
+        if allowed is not None and (i, j) not in allowed:
+            continue
+        qij, sij = connection_quality_and_side(discs[a], discs[b], config)
+        qji, sji = connection_quality_and_side(discs[b], discs[a], config)
+        quality = min(qij, qji)
+        if quality >= config.q_min:
+            candidates.append((quality, i, j, sij, sji))
+    return candidates
+
+
+def select_candidates(candidates, number_of_discs):
+    """Select basic connections from candidates. This is the greedy algorithm of
+    :meth:`create_strong_connections`: connections are taken from the best one, unless one
+    of their discs already has a connection on the same side
+
+    :param list candidates: Candidates found with :meth:`part_candidates`
+    :param int number_of_discs: Number of discs of the component
+    :returns: List of connections as tuples (i, j) and the table of neighbours
+        (see :meth:`find_alt_connections`)
+    """
+    neighbors = {
+        True: np.full(number_of_discs, -1),
+        False: np.full(number_of_discs, -1)
+    }
+    connections = []
+    for _, i, j, sij, sji in sorted(candidates, key=lambda c: (-c[0], c[1], c[2])):
+        if neighbors[sij][i] < 0 and neighbors[sji][j] < 0:
+            neighbors[sij][i] = j
+            neighbors[sji][j] = i
+            connections.append((i, j))
+    return connections, neighbors
+
+
+def select_alt_candidates(candidates, neighbors, config=DEFAULT_CONFIG):
+    """Look for alternative connections among candidates, in the same way as
+    :meth:`find_alt_connections`, but only pairs of discs close enough to each other are
+    checked
+
+    :param list candidates: Candidates found with :meth:`part_candidates`
+    :param dict neighbors: Table of neighbours from :meth:`select_candidates`
+    :param ExtractionConfig config: Parameters of the extraction
+    :returns: List of tuples (i, j, k) (see :meth:`find_alt_connections`)
+    """
+    number_of_discs = len(neighbors[True])
+    qualities = {}
+    adjacent = [[] for _ in range(number_of_discs)]
+    for quality, i, j, sij, sji in candidates:
+        qualities[(i, j)] = quality
+        adjacent[i].append((j, sij, sji))
+        adjacent[j].append((i, sji, sij))
+
+    alt_connections = []
+    for i in range(number_of_discs):
+        if (neighbors[True][i] < 0) == (neighbors[False][i] < 0):
+            # It is not the end of the stroke, skip it
+            continue
+        empty_side = (neighbors[True][i] < 0)
+
+        alternative = None
+        alt_quality = 0.0
+        for j, side_ij, side_ji in sorted(adjacent[i]):
+            if side_ij != empty_side:
+                continue
+            k = neighbors[not side_ji][j]
+            if k < 0:
+                continue
+            k2 = neighbors[side_ji][j]
+            cmp_quality = qualities.get((min(k2, j), max(k2, j)), 0.0)
+            if (cmp_quality - qualities[(min(i, j), max(i, j))]) > config.qr_max:
+                continue
+            if cmp_quality > alt_quality:
+                alternative = (i, j, k)
+                alt_quality = cmp_quality
+
+        if alternative is not None:
+            alt_connections.append(alternative)
+
+    return alt_connections
+
+
+def partitioned_connections(discs, config=DEFAULT_CONFIG, max_part_discs=MAX_PART_DISCS,
+                            executor=None):
+    """Create connections (basic and alternative) of a large component part by part.
+    The component is split into spatially local parts (see :meth:`split_discs`) with margins
+    overlapping the neighbouring parts, and only pairs of discs within a part are scored,
+    so the time grows almost linearly with the number of discs. Candidates of all parts
+    are then joined and selected as in :meth:`create_connections`; since discs further than
+    :meth:`connection_reach` are never connected, the result is the same
+
+    :param list discs: List of discs
+    :param ExtractionConfig config: Parameters of the extraction
+    :param int max_part_discs: Maximal number of discs of a part (without the margin)
+    :param executor: Pool of workers scoring parts in parallel (optional)
+    :returns: Lists of basic and alternative connections
+    """
+    number_of_discs = len(discs)
+    centres = np.array([disc.centre for disc in discs], dtype=float).reshape(-1, 2)
+    reach = connection_reach(discs, config)
+    margin = reach / 2.0
+
+    allowed = None
+    if 0 < config.max_neighbours < number_of_discs - 1:
+        allowed = np.array(candidate_pairs(discs, config.max_neighbours))
+
+    arguments = []
+    for lower, upper in split_discs(centres, max_part_discs):
+        inside = np.all((centres >= lower - margin) & (centres <= upper + margin), axis=1)
+        indices = np.flatnonzero(inside)
+        part_allowed = None
+        if allowed is not None:
+            part_allowed = set(map(tuple, allowed[inside[allowed].all(axis=1)].tolist()))
+        arguments.append(([discs[i] for i in indices], indices, lower, upper, reach, config,
+                          part_allowed))
+
+    if executor is None:
+        results = [part_candidates(*args) for args in arguments]
+    else:
+        results = list(executor.map(part_candidates, *zip(*arguments)))
+    candidates = [candidate for result in results for candidate in result]
+
+    connections, neighbors = select_candidates(candidates, number_of_discs)
+    alt_connections = select_alt_candidates(candidates, neighbors, config)
+    return connections, alt_connections
@@ -0,0 +1,186 @@
+import numpy as np
+
+from . import (preprocessing, segmentation, component_areas, component_filter,
+               component_pixels, limit_discs)
+from .disc import create_discs
+from .connection_functions import get_connection_matrixes, select_connections
+from .partition import partitioned_connections, MAX_PART_DISCS
+from .chain_functions import create_chains
+from .stroke_functions import chains_to_strokes
+from ..config import DEFAULT_CONFIG
+
+
+def stage_key(config, names):
+    """Get the part of the configuration that a stage depends on
+
+    :param ExtractionConfig config: Parameters of the extraction
+    :param tuple[str] names: Names of the parameters
+    :rtype: tuple
+    """
+    return tuple(getattr(config, name) for name in names)
+
+
+def check_config(config):
+    """Reject parameters that :class:`ExtractionPipeline` does not support
+
+    :param ExtractionConfig config: Parameters of the extraction
+    """
+    if config.target_width > 0.0:
+        raise ValueError('The pipeline does not support downscaling')
+
+
+class ExtractionPipeline:
+    """Stroke extraction (see :meth:`stroke_extraction`) split into stages. Results of each
+    stage are stored for every connected component, so changing a parameter recomputes
+    only the stages that depend on it. The stages and their parameters are:
+
+    * components (preprocessing, segmentation, skipping the noise, skeleton and edge pixels)
+      - no parameters,
+    * discs (of components not smaller than ``min_area``) - ``min_area``, ``r_m``, ``dtype``,
+      ``max_discs``, ``memory_budget``,
+    * matrices of connection quality and side - ``rho``, ``max_neighbours`` (components
+      with more than ``max_part_discs`` discs have no matrices, see below),
+    * chains (basic and alternative connections) - ``q_min``, ``qr_max``,
+    * strokes - ``max_angle``, ``epsilon``, ``d_min`` (not stored, it is the cheap tail).
+
+    Each stage is stored under the values of its own parameters and the parameters of all
+    stages before it. Strokes of components limited by the budget (see :meth:`limit_discs`)
+    are marked as degraded, as in :meth:`stroke_extraction`; ``time_budget`` is ignored,
+    and downscaling (``target_width``) is not supported. Connections of large components
+    are created part by part in the chains stage (see :meth:`partitioned_connections`),
+    so no quadratic matrices of them are stored.
+
+    :param np.array input_image: Input image in grayscale (bright background)
+    :param int max_part_discs: Components with more discs are split into parts
+    """
+
+    DISC_PARAMETERS = ('min_area', 'r_m', 'dtype', 'max_discs', 'memory_budget')
+    MATRIX_PARAMETERS = DISC_PARAMETERS + ('rho', 'max_neighbours')
+    CHAIN_PARAMETERS = MATRIX_PARAMETERS + ('q_min', 'qr_max')
+
+    def __init__(self, input_image, max_part_discs=MAX_PART_DISCS):
+        self.input_image = input_image
+        self.max_part_discs = max_part_discs
+        self._components = None
+        self._areas = None
+        self._discs = {}
+        self._coarsened = {}
+        self._matrices = {}
+        self._chains = {}
+
+    def components(self):
+        """Get the edge pixels, skeleton pixels and average stroke width of each component
+        (except the noise, see :meth:`component_filter`)
+
+        :rtype: list[tuple]
+        """
+        if self._components is None:
+            binary = preprocessing(self.input_image)
+            labeled, bounding_boxes = segmentation(binary)
+            areas = component_areas(labeled, len(bounding_boxes))
+            selected, _, _ = component_filter(bounding_boxes, areas)
+            labels = np.flatnonzero(selected) + 1
+            self._components = [
+                component_pixels(labeled, this_label, bounding_boxes[this_label - 1])
+                for this_label in labels
+            ]
+            self._areas = areas[labels - 1]
+        return self._components
+
+    def discs(self, config=DEFAULT_CONFIG):
+        """Get the list of discs of each component
+
+        :rtype: list[list[Disc]]
+        """
+        check_config(config)
+        key = stage_key(config, self.DISC_PARAMETERS)
+        if key not in self._discs:
+            all_discs, coarsened = [], []
+            for (edge_pixels, skel_pixels, avg_width), area in zip(self.components(),
+                                                                   self._areas):
+                if area >= config.min_area:
+                    created = create_discs(edge_pixels, skel_pixels, avg_width, config)
+                    discs, _ = limit_discs(created, config)
+                    all_discs.append(discs)
+                    coarsened.append(len(discs) < len(created))
+            self._discs[key] = all_discs
+            self._coarsened[key] = coarsened
+        return self._discs[key]
+
+    def degraded(self, config=DEFAULT_CONFIG):
+        """Get the flag if each component is degraded (see :meth:`component_discs`)
+
+        :rtype: list[bool]
+        """
+        all_discs = self.discs(config)
+        coarsened = self._coarsened[stage_key(config, self.DISC_PARAMETERS)]
+        return [flag or 0 < config.max_neighbours < len(discs) - 1
+                for flag, discs in zip(coarsened, all_discs)]
+
+    def matrices(self, config=DEFAULT_CONFIG):
+        """Get the quality and side matrices (see :meth:`get_connection_matrixes`) of each
+        component (None for components split into parts)
+
+        :rtype: list[tuple]
+        """
+        check_config(config)
+        key = stage_key(config, self.MATRIX_PARAMETERS)
+        if key not in self._matrices:
+            self._matrices[key] = [
+                None if len(discs) > self.max_part_discs
+                else get_connection_matrixes(discs, config)
+                for discs in self.discs(config)
+            ]
+        return self._matrices[key]
+
+    def chains(self, config=DEFAULT_CONFIG):
+        """Get the list of chains of each component
+
+        :rtype: list[list]
+        """
+        check_config(config)
+        key = stage_key(config, self.CHAIN_PARAMETERS)
+        if key not in self._chains:
+            chains = []
+            for discs, matrices in zip(self.discs(config), self.matrices(config)):
+                if matrices is None:
+                    connections, alt_connections = partitioned_connections(
+                        discs, config, self.max_part_discs)
+                else:
+                    connections, alt_connections = select_connections(*matrices, config)
+                chains.append(create_chains(connections, alt_connections))
+            self._chains[key] = chains
+        return self._chains[key]
+
+    def strokes(self, config=DEFAULT_CONFIG):
+        """Get the extracted strokes for the given parameters, reusing the results of stages
+        that have already been computed
+
+        :param ExtractionConfig config: Parameters of the extraction
+        :returns: List of extracted :class:`Stroke` objects
+        :rtype: list[Stroke]
+        """
+        all_discs = self.discs(config)
+        all_chains = self.chains(config)
+        extracted_strokes = []
+        for discs, chains, degraded in zip(all_discs, all_chains, self.degraded(config)):
+            strokes = chains_to_strokes(discs, chains, config)
+            for stroke in strokes:
+                stroke.degraded = degraded
+            extracted_strokes.extend(strokes)
+        return extracted_strokes
+
+    def sweep(self, configs):
+        """Run the extraction for many sets of parameters
+
+        :param list[ExtractionConfig] configs: Parameters of each run
+        :returns: List of results, one for each set of parameters
+        """
+        return [self.strokes(config) for config in configs]
+
+    def clear(self):
+        """Drop the stored results of all stages except the components"""
+        self._discs.clear()
+        self._coarsened.clear()
+        self._matrices.clear()
+        self._chains.clear()
@@ -0,0 +1,147 @@
+import json
+import os
+import time
+from dataclasses import asdict
+
+import numpy as np
+
+from . import segment_pixels, limit_discs
+from .disc import Disc, create_discs
+from .connection_functions import get_connection_matrixes, select_connections
+from .partition import partitioned_connections, MAX_PART_DISCS
+from .memory import memory_stage
+from .chain_functions import create_chains
+from .stroke_functions import chains_to_strokes
+from ..config import ExtractionConfig
+
+
+def dump_component(dump_dir, segment, offset, config, discs, max_discs=None, elapsed=0.0,
+                   name='component'):
+    """Save a single connected component with everything needed to process it again:
+    the binary image, the position, the discs and the parameters
+
+    :param str dump_dir: Directory for saved components
+    :param np.array segment: Binary image of the component (see :meth:`crop_component`)
+    :param np.array offset: Position of the top-left corner of the segment
+    :param ExtractionConfig config: Parameters of the extraction
+    :param list discs: Discs used for the component (see :meth:`component_discs`)
+    :param int max_discs: Maximal number of discs used for the component
+    :param float elapsed: Time of processing the component (in seconds)
+    :param str name: Beginning of the file name (e.g. the name of the image)
+
+    :returns: Path of the saved file
+    :rtype: str
+    """
+    os.makedirs(dump_dir, exist_ok=True)
+    path = os.path.join(dump_dir,
+                        f'{name}_{offset[0]}_{offset[1]}_{config.digest()[:8]}.npz')
+    np.savez_compressed(
+        path, segment=segment, offset=np.asarray(offset),
+        centres=np.array([d.centre for d in discs]).reshape(-1, 2),
+        points1=np.array([d.point1 for d in discs]).reshape(-1, 2),
+        points2=np.array([d.point2 for d in discs]).reshape(-1, 2),
+        radii=np.array([d.radius for d in discs]),
+        config=json.dumps(asdict(config)),
+        max_discs=config.max_discs if max_discs is None else max_discs,
+        elapsed=elapsed)
+    return path
+
+
+def load_component(path):
+    """Read a component saved with :meth:`dump_component`
+
+    :returns: Dictionary with the segment, the offset, the list of discs, the configuration,
+        the maximal number of discs and the time of the original processing
+    :rtype: dict
+    """
+    with np.load(path) as data:
+        config = ExtractionConfig(**json.loads(str(data['config'])))
+        discs = []
+        for centre, point1, point2, radius in zip(data['centres'], data['points1'],
+                                                  data['points2'], data['radii']):
+            disc = Disc(centre, point1, point2, config.dtype)
+            disc.radius = radius.astype(config.dtype)
+            discs.append(disc)
+        return {
+            'segment': data['segment'],
+            'offset': data['offset'],
+            'discs': discs,
+            'config': config,
+            'max_discs': int(data['max_discs']),
+            'elapsed': float(data['elapsed']),
+        }
+
+
+def same_discs(discs1, discs2):
+    """Check if both lists have discs with the same centres and radii (up to the rounding
+    of the saved values)
+
+    :rtype: bool
+    """
+    if len(discs1) != len(discs2):
+        return False
+    return all(np.allclose(d1.centre, d2.centre) and np.isclose(d1.radius, d2.radius)
+               for d1, d2 in zip(discs1, discs2))
+
+
+def replay_component(path, profile=False, memory=None):
+    """Process a component saved with :meth:`dump_component` again, stage by stage,
+    measuring the time of each stage
+
+    :param str path: Path of the saved component
+    :param bool profile: Run the stages under :mod:`cProfile`
+    :param MemoryStats memory: Object to collect the memory usage of stages (optional)
+
+    :returns: Dictionary with the time of each stage (``stages``), extracted strokes,
+        the number of discs, whether they are the same as the saved ones (``same_discs``),
+        the time of the original processing and the profiler (:class:`cProfile.Profile`
+        or None)
+    :rtype: dict
+    """
+    component = load_component(path)
+    config = component['config']
+    profiler = None
+    if profile:
+        import cProfile
+        profiler = cProfile.Profile()
+
+    stage_times = {}
+
+    def run(name, function, *args):
+        start = time.perf_counter()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            with memory_stage(memory, name):
+                return function(*args)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            stage_times[name] = time.perf_counter() - start
+
+    def discs_stage(edge_pixels, skel_pixels, avg_width):
+        discs = create_discs(edge_pixels, skel_pixels, avg_width, config)
+        return limit_discs(discs, config, component['max_discs'])[0]
+
+    edge_pixels, skel_pixels, avg_width = run('pixels', segment_pixels, component['segment'],
+                                              component['offset'])
+    discs = run('discs', discs_stage, edge_pixels, skel_pixels, avg_width)
+    if len(discs) > MAX_PART_DISCS:
+        # Large components have no matrices (see :meth:`partitioned_connections`)
+        connections, alt_connections = run('connections', partitioned_connections, discs,
+                                           config)
+    else:
+        quality_matrix, side_matrix = run('matrices', get_connection_matrixes, discs, config)
+        connections, alt_connections = run('connections', select_connections, quality_matrix,
+                                           side_matrix, config)
+    chains = run('chains', create_chains, connections, alt_connections)
+    strokes = run('strokes', chains_to_strokes, discs, chains, config)
+
+    return {
+        'stages': stage_times,
+        'strokes': strokes,
+        'discs': len(discs),
+        'same_discs': same_discs(discs, component['discs']),
+        'elapsed': component['elapsed'],
+        'profiler': profiler,
+    }
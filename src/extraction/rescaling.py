@@ -0,0 +1,43 @@
+import numpy as np
+
+from . import average_width
+
+
+def downscale_to_width(grayscale_image, target_width):
+    """Downscale the image, so the average stroke width (see :meth:`average_width`) is close
+    to the target. Images with strokes thinner than the target are not changed
+
+    :param np.array grayscale_image: Input image in grayscale
+    :param float target_width: Desired average stroke width (in pixels)
+
+    :returns: Downscaled image and the ratios of the original size to the new size
+        (for rows and columns), or the original image and None
+    """
+    from skimage.filters import threshold_otsu
+    from skimage.transform import resize
+
+    if grayscale_image.dtype == bool:
+        binary = ~grayscale_image
+        grayscale_image = grayscale_image.astype('float')
+    else:
+        binary = (grayscale_image < threshold_otsu(grayscale_image))
+
+    scale = target_width / average_width(binary)
+    if scale >= 1.0:
+        return grayscale_image, None
+
+    shape = np.maximum(np.round(np.array(grayscale_image.shape) * scale).astype(int), 1)
+    downscaled = resize(grayscale_image, shape, anti_aliasing=True, preserve_range=True)
+    return downscaled, np.array(grayscale_image.shape) / shape
+
+
+def to_original_coordinates(strokes, factors):
+    """Map strokes extracted from the downscaled image back to the original image
+
+    :param list[Stroke] strokes: Strokes to be transformed (in place)
+    :param np.array factors: Ratios of the original size to the downscaled size
+    """
+    # Coordinates include the 1 pixel margin; centres of pixels are mapped onto centres
+    shift = 0.5 - 0.5 * factors
+    for stroke in strokes:
+        stroke.transform(factors, shift)
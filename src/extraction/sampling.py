@@ -0,0 +1,105 @@
+from functools import lru_cache
+
+import numpy as np
+
+
+"""Powers of t in polynomials of strokes, in the order of coefficients (from the highest)"""
+POWERS = np.arange(3, -1, -1)
+
+"""Number of points used to measure the length of strokes in the arc-length resampling"""
+ARC_LENGTH_SAMPLES = 128
+
+
+def polynomial_basis(t, derivative=0, dtype='float'):
+    """Get the matrix of powers of t (or their derivatives) for polynomials of strokes, so
+    that ``basis @ stroke.poly_x`` gives the values of x(t)
+
+    :param np.array t: Values of the parameter (any shape)
+    :param int derivative: Order of the derivative (0 means values of polynomials)
+    :param str dtype: Floating-point type of the basis
+    :returns: Array with the shape of t and one more dimension for the coefficients
+    """
+    t = np.asarray(t, dtype=dtype)
+    factors = np.ones(len(POWERS), dtype=dtype)
+    for order in range(derivative):
+        factors = factors * np.maximum(POWERS - order, 0)
+    exponents = np.maximum(POWERS - derivative, 0).astype(dtype)
+    return factors * t[..., None] ** exponents
+
+
+@lru_cache(maxsize=32)
+def uniform_basis(samples, derivative=0):
+    """Get the basis (see :meth:`polynomial_basis`) for evenly spaced values of t in [0, 1].
+    It is calculated once for each number of samples
+
+    :rtype: np.array
+    """
+    basis = polynomial_basis(np.linspace(0.0, 1.0, num=samples), derivative)
+    basis.flags.writeable = False
+    return basis
+
+
+def stroke_coefficients(strokes):
+    """Get coefficients of polynomials of strokes as an array N x 2 x 4 (x and y)
+
+    :param strokes: List of strokes or an array N x 8 of their features (see
+        :meth:`Stroke.vector_of_features`)
+    :rtype: np.array
+    """
+    if isinstance(strokes, np.ndarray):
+        return strokes.reshape(-1, 2, len(POWERS)).astype('float')
+    if len(strokes) == 0:
+        return np.zeros((0, 2, len(POWERS)))
+    return np.stack([stroke.vector_of_features() for stroke in strokes]).reshape(
+        -1, 2, len(POWERS))
+
+
+def arc_length_parameters(coefficients, samples):
+    """Find values of t that split each stroke into parts of the same length (measured along
+    the polyline of :data:`ARC_LENGTH_SAMPLES` points)
+
+    :param np.array coefficients: Coefficients of strokes (see :meth:`stroke_coefficients`)
+    :param int samples: Number of values for each stroke
+    :returns: Array N x samples
+    """
+    number = len(coefficients)
+    dense_t = np.linspace(0.0, 1.0, num=ARC_LENGTH_SAMPLES)
+    dense = evaluate_strokes(coefficients, ARC_LENGTH_SAMPLES)
+    distances = np.sqrt((np.diff(dense, axis=1) ** 2).sum(axis=2))
+    lengths = np.concatenate((np.zeros((number, 1)), np.cumsum(distances, axis=1)), axis=1)
+    total = lengths[:, -1:]
+    # Strokes of length 0 are sampled evenly in t
+    relative = np.where(total > 0.0, lengths / np.where(total > 0.0, total, 1.0), dense_t)
+
+    # Search in all strokes at once: the relative length of stroke i is shifted by 2i
+    targets = np.linspace(0.0, 1.0, num=samples)
+    shifts = 2.0 * np.arange(number)[:, None]
+    positions = np.searchsorted((relative + shifts).ravel(), (targets + shifts).ravel(),
+                                side='right').reshape(number, samples)
+    positions -= ARC_LENGTH_SAMPLES * np.arange(number)[:, None]
+    lower = np.clip(positions - 1, 0, ARC_LENGTH_SAMPLES - 2)
+
+    rows = np.arange(number)[:, None]
+    start = relative[rows, lower]
+    step = relative[rows, lower + 1] - start
+    fraction = np.clip((targets - start) / np.where(step > 0.0, step, 1.0), 0.0, 1.0)
+    return dense_t[lower] + fraction * (dense_t[lower + 1] - dense_t[lower])
+
+
+def evaluate_strokes(strokes, samples=17, derivative=0, arc_length=False):
+    """Evaluate polynomials of many strokes at once in evenly spaced values of t (or, with
+    ``arc_length``, in points evenly spaced along each stroke)
+
+    :param strokes: List of strokes or an array N x 8 of their features (see
+        :meth:`Stroke.vector_of_features`)
+    :param int samples: Number of points of each stroke
+    :param int derivative: Order of the derivative (0 means points of strokes)
+    :param bool arc_length: Sample strokes evenly in their length instead of in t
+    :returns: Array N x samples x 2 with coordinates (x, y) of points (or derivatives)
+    """
+    coefficients = stroke_coefficients(strokes)
+    if arc_length:
+        basis = polynomial_basis(arc_length_parameters(coefficients, samples), derivative)
+        return np.einsum('nkp,ncp->nkc', basis, coefficients)
+    basis = uniform_basis(samples, derivative)
+    return (coefficients @ basis.T).transpose(0, 2, 1)
@@ -0,0 +1,29 @@
+class ExtractionStats:
+    """Counters collected during the stroke extraction. Pass an instance to
+    :meth:`stroke_extraction` to fill it. The counters are:
+
+    * ``components`` - connected components of the image,
+    * ``skipped_noise`` - components too small to contain any stroke,
+    * ``skipped_small`` - components smaller than ``min_area``,
+    * ``degraded`` - components with strokes marked as degraded (see :class:`Stroke`),
+    * ``cached`` - components whose strokes were taken from :class:`GlyphCache`,
+    * ``strokes`` - extracted strokes.
+    """
+
+    def __init__(self):
+        self.components = 0
+        self.skipped_noise = 0
+        self.skipped_small = 0
+        self.degraded = 0
+        self.cached = 0
+        self.strokes = 0
+
+    def __repr__(self):
+        return ', '.join(f'{name}={value}' for name, value in self.as_dict().items())
+
+    def as_dict(self):
+        """Get all counters
+
+        :rtype: dict
+        """
+        return dict(vars(self))
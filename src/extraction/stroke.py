@@ -1,32 +1,62 @@
+import copy
+from functools import cached_property
+
 import numpy as np
 
-from ..common.numerical import euc_dist
-from ..config import EPSILON, MAX_ANGLE
+from .sampling import polynomial_basis
+from ..config import DEFAULT_CONFIG
 
 
 class Stroke:
     """Stroke as a sequence of 2D points. This class also allows the transformation of
     the stroke into a parametric form
 
-    :param list chain: Chain of 2D points (centers of discs that make the stroke)
+    :param list chain: Chain of 2D points (centers of discs that make the stroke), stored in
+        the field ``points`` as an array N x 2
+    :param ExtractionConfig config: Parameters of the extraction (substrokes inherit it)
+
+    The field ``degraded`` is set for strokes of components processed with a limited
+    number of discs (see :data:`MAX_DISCS`), which are less accurate
+
+    The approximation (fields ``poly_x``, ``poly_y`` and ``appr_errors``, see
+    :meth:`approximate`) is calculated on the first access, so strokes that are only split
+    or compared with other ones do not pay for it
     """
 
-    def __init__(self, chain):
-        self.points = chain
-        self.approximate()
+    def __init__(self, chain, config=DEFAULT_CONFIG):
+        self.points = np.asarray(chain).reshape(-1, 2)
+        self.config = config
+        self.degraded = False
 
     def __repr__(self):
-        points_repr = [f'({p[0]}, {p[1]})' for p in self.points]
-        return '->'.join(points_repr)
+        return '->'.join(f'({x}, {y})' for x, y in self.points.tolist())
 
     def length_tab(self):
         """Get the table with distances from the beginning of the stroke to the given point
         """
-        length_tab = [0.0]
-        for i in range(1, len(self.points)):
-            new_length = length_tab[-1] + euc_dist(self.points[i - 1], self.points[i])
-            length_tab.append(new_length)
-        return np.array(length_tab)
+        distances = np.sqrt((np.diff(self.points, axis=0) ** 2).sum(axis=1))
+        return np.concatenate(([0.0], np.cumsum(distances)))
+
+    @cached_property
+    def length(self):
+        """Length of the stroke (the sum of distances between the following points)"""
+        return self.length_tab()[-1]
+
+    @cached_property
+    def poly_x(self):
+        """Coefficients of the polynomial x(t), from the highest power"""
+        return self.approximate()[0]
+
+    @cached_property
+    def poly_y(self):
+        """Coefficients of the polynomial y(t), from the highest power"""
+        return self.approximate()[1]
+
+    @cached_property
+    def appr_errors(self):
+        """Approximation errors in each point of the stroke"""
+        self.approximate()
+        return self.__dict__['appr_errors']
 
     def approximate(self):
         """Make an approximation of the stroke with 2 3rd-degree polynomials. It is a parametric
@@ -34,39 +64,84 @@ class Stroke:
         approximation is returned and also stored if fields poly_x and poly_y. The function
         calculates the error of approximation as well and saves it in the field appr_errors
         """
+        dtype = self.config.dtype
         length_tab = self.length_tab()
         self.length = length_tab[-1]
-        t = length_tab / self.length
+        t = (length_tab / self.length).astype(dtype)
 
-        x = np.array([point[0] for point in self.points], dtype='float')
-        y = np.array([point[1] for point in self.points], dtype='float')
+        x = self.points[:, 0].astype(dtype)
+        y = self.points[:, 1].astype(dtype)
 
+        # The least squares of np.polyfit are always solved in double precision; only
+        # the coefficients are stored with the type of the configuration
         if len(t) > 3:
             # Approximation with 3rd-degree polynomial
-            self.poly_x = np.polyfit(t, x, 3)
-            self.poly_y = np.polyfit(t, y, 3)
+            self.poly_x = np.polyfit(t, x, 3).astype(dtype)
+            self.poly_y = np.polyfit(t, y, 3).astype(dtype)
         else:
             # Approximation with 2nd-degree polynomial
-            self.poly_x = np.concatenate(([0.0], np.polyfit(t, x, 2)))
-            self.poly_y = np.concatenate(([0.0], np.polyfit(t, y, 2)))
+            self.poly_x = np.concatenate(([0.0], np.polyfit(t, x, 2))).astype(dtype)
+            self.poly_y = np.concatenate(([0.0], np.polyfit(t, y, 2))).astype(dtype)
 
         # Calculate the approximation error
-        errors = []
-        for i in range(len(t)):
-            x_apr = np.polyval(self.poly_x, t[i])
-            y_apr = np.polyval(self.poly_y, t[i])
-            errors.append(euc_dist(self.points[i], (x_apr, y_apr)))
-        self.appr_errors = np.array(errors)
+        basis = polynomial_basis(t, dtype=dtype)
+        x_apr = basis @ self.poly_x
+        y_apr = basis @ self.poly_y
+        self.appr_errors = np.sqrt((x - x_apr) ** 2 + (y - y_apr) ** 2)
 
         return self.poly_x, self.poly_y
 
+    def transform(self, scale, shift):
+        """Transform the stroke in place: each coordinate c is replaced with
+        ``scale * c + shift``. Polynomials are transformed in the same way (the parameter t
+        is the relative length, so it does not change with scaling), so they do not need
+        to be fitted again
+
+        :param np.array scale: Scale of both coordinates (a number or a pair)
+        :param np.array shift: Shift of both coordinates (a number or a pair)
+        """
+        scale = np.broadcast_to(np.asarray(scale, dtype='float'), (2, ))
+        shift = np.broadcast_to(np.asarray(shift, dtype='float'), (2, ))
+        if 'appr_errors' not in self.__dict__:
+            # Fit the original points (t depends on the scale if it is not uniform)
+            self.approximate()
+        self.points = scale * self.points + shift
+        self.poly_x = self.poly_x * scale[0]
+        self.poly_x[-1] += shift[0]
+        self.poly_y = self.poly_y * scale[1]
+        self.poly_y[-1] += shift[1]
+        self.length = self.length_tab()[-1]
+        # The error is a distance, so it changes with the scale (exactly if the scale is uniform)
+        self.appr_errors = self.appr_errors * np.sqrt(scale[0] * scale[1])
+
+    def translated(self, shift):
+        """Get a copy of the stroke moved by the shift. Unlike :meth:`transform`, it keeps
+        the type of points (e.g. integers for a shift in pixels), and the approximation is
+        moved with the constant terms of polynomials instead of being fitted again
+
+        :param np.array shift: Shift of both coordinates (a pair)
+        :rtype: Stroke
+        """
+        shift = np.asarray(shift)
+        stroke = copy.copy(self)
+        stroke.points = self.points + shift
+        stroke.poly_x = self.poly_x.copy()
+        stroke.poly_x[-1] += shift[0]
+        stroke.poly_y = self.poly_y.copy()
+        stroke.poly_y[-1] += shift[1]
+        # The length and approximation errors do not change
+        stroke.length = self.length
+        stroke.appr_errors = self.appr_errors
+        return stroke
+
     def is_good(self):
         """Check if the approximation error is below the threshold
+
         :rtype: Boolean
         """
 
         error = self.appr_errors.sum() / (len(self.appr_errors) * self.length)
-        return error < EPSILON
+        return error < self.config.epsilon
 
     def divide_by_angles(self):
         """Analyze the stroke and cut it in points where the direction changes too rapidly
@@ -74,26 +149,27 @@ class Stroke:
         :return: Listę kresek (obiektów typu :class:`Stroke`) po podziale
         """
 
-        num = len(self.points)
-        # Create a list of vectors using complex numbers
-        points_cx = [complex(pt[1], pt[0]) for pt in self.points]
-        vectors = [points_cx[i + 1] - points_cx[i] for i in range(num - 1)]
+        # Create vectors using complex numbers
+        points_cx = self.points[:, 1] + 1j * self.points[:, 0]
+        vectors = np.diff(points_cx)
         # Rotate each vector by an angle of the previous one to get the direction change
-        rotators = [complex(cx.real, -cx.imag) / abs(cx) for cx in vectors]
-        rotated_by_prev = [vectors[i + 1] * rotators[i] for i in range(num - 2)]
-        # Get the list of angles between vectors
-        angles = np.angle(np.array(rotated_by_prev), deg=True)
+        rotators = np.conj(vectors[:-1]) / np.abs(vectors[:-1])
+        rotated_by_prev = vectors[1:] * rotators
+        # Get the angles between vectors
+        angles = np.angle(rotated_by_prev, deg=True)
         # Future work: consider using neighbor angles as well
 
-        if max(abs(angles)) > MAX_ANGLE:
-            breaking_points = np.flatnonzero(abs(angles) > MAX_ANGLE)
+        max_angle = self.config.max_angle
+        breaking_points = np.flatnonzero(np.abs(angles) > max_angle)
+        if len(breaking_points) > 0:
+            # Substrokes are views of the points of this stroke
             breaking_points = np.append(breaking_points, [len(angles)])  # Add a guard
             previous = 0
             substrokes = []
             for bp in breaking_points:
                 substroke = self.points[previous:(bp + 2)]
                 if len(substroke) > 2:
-                    substrokes.append(Stroke(substroke))
+                    substrokes.append(Stroke(substroke, self.config))
                 previous = bp + 1
         else:
             substrokes = [self]
@@ -125,9 +201,9 @@ class Stroke:
 
         divided = []
         if len(substroke1) > 2:
-            divided.append(Stroke(substroke1))
+            divided.append(Stroke(substroke1, self.config))
         if len(substroke2) > 2:
-            divided.append(Stroke(substroke2))
+            divided.append(Stroke(substroke2, self.config))
 
         return divided
 
@@ -147,11 +223,8 @@ class Stroke:
         :return: Two values - distinctness of this stroke from another and vice versa
         """
 
-        number_of_common = 0
-        for p1 in self.points:
-            for p2 in another_stroke.points:
-                if all(p1 == p2):
-                    number_of_common += 1
+        equal = self.points[:, None, :] == another_stroke.points[None, :, :]
+        number_of_common = np.count_nonzero(equal.all(axis=2))
 
         d1 = 1.0 - (number_of_common / len(self.points))
         d2 = 1.0 - (number_of_common / len(another_stroke.points))
@@ -1,6 +1,6 @@
 from .stroke import Stroke
 from .chain_functions import centres_from_chain
-from ..config import D_MIN
+from ..config import DEFAULT_CONFIG
 
 
 def recursive_stroke_analyze(stroke):
@@ -21,7 +21,25 @@ def recursive_stroke_analyze(stroke):
     return result
 
 
-def chains_to_strokes(discs, chains):
+def overlapping_pairs(strokes):
+    """Find pairs of strokes with at least one common point
+
+    :param list strokes: List of strokes
+    :returns: Sorted list of pairs (i, j) of indices, where i < j
+    """
+    strokes_of_point = {}
+    for index, stroke in enumerate(strokes):
+        for point in map(tuple, stroke.points.tolist()):
+            strokes_of_point.setdefault(point, set()).add(index)
+
+    pairs = set()
+    for indices in strokes_of_point.values():
+        indices = sorted(indices)
+        pairs.update((i, j) for n, i in enumerate(indices) for j in indices[(n + 1):])
+    return sorted(pairs)
+
+
+def chains_to_strokes(discs, chains, config=DEFAULT_CONFIG):
     """Transform the set of chains into a set of Stroke objects. This stage contains:
 
     * creation of stroke objects,
@@ -31,6 +49,7 @@ def chains_to_strokes(discs, chains):
     :param list discs: List of discs in such order that the index stored in a chain means
         the position of the disc within this list
     :param list chains: List of chains where each cain is the list of indices
+    :param ExtractionConfig config: Parameters of the extraction
 
     :return: List of strokes
     :rtype: List[Stroke]
@@ -40,21 +59,25 @@ def chains_to_strokes(discs, chains):
     # Creation of stroke objects and partitioning of the ones with too high curvature
     for chain in chains:
         centres = centres_from_chain(discs, chain)
-        new_stroke = Stroke(centres)
+        new_stroke = Stroke(centres, config)
         for stroke in new_stroke.divide_by_angles():
             strokes.extend(recursive_stroke_analyze(stroke))
 
-    # Selecting strokes with too low distinctness
+    # Selecting strokes with too low distinctness. Strokes without common points are
+    # completely distinct, so they are compared only if even that is not enough
+    if config.d_min > 1.0:
+        pairs = ((i, j) for i in range(len(strokes)) for j in range(i + 1, len(strokes)))
+    else:
+        pairs = overlapping_pairs(strokes)
     to_drop = set()
-    for i in range(len(strokes)):
-        for j in range(i + 1, len(strokes)):
-            d1, d2 = strokes[i].distinctness(strokes[j])
-            if d1 < d2:
-                if d1 < D_MIN:
-                    to_drop.add(i)
-            else:
-                if d2 < D_MIN:
-                    to_drop.add(j)
+    for i, j in pairs:
+        d1, d2 = strokes[i].distinctness(strokes[j])
+        if d1 < d2:
+            if d1 < config.d_min:
+                to_drop.add(i)
+        else:
+            if d2 < config.d_min:
+                to_drop.add(j)
 
     # Removing selected ones
     for i in sorted(to_drop, reverse=True):
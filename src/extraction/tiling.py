@@ -0,0 +1,316 @@
+import numpy as np
+
+from . import (noise_reduction, extract_component, component_areas, component_filter,
+               BOLD_WIDTH)
+from ..config import DEFAULT_CONFIG
+
+
+"""Default size of the tile (without the halo)"""
+TILE_SIZE = 1024
+
+"""Default width of the halo, that is pixels read around the tile. The morphology needs
+1 pixel; the skeletonization (used to estimate the stroke width) needs more than a half of
+the widest stroke"""
+HALO = 32
+
+
+class Tile:
+    """A rectangular part of the image with the halo around it
+
+    :param tuple core: Rows and columns of the tile (r0, r1, c0, c1) in the image
+    :param tuple region: Rows and columns of the tile with the halo (clipped to the image)
+    """
+
+    def __init__(self, core, region):
+        self.core = core
+        self.region = region
+
+    def read(self, input_image):
+        """Read the tile with the halo from the image (which might be a memory map)"""
+        r0, r1, c0, c1 = self.region
+        return np.asarray(input_image[r0:r1, c0:c1])
+
+    def core_slices(self):
+        """Get the slices of the core within the array returned by :meth:`read`"""
+        r0, r1, c0, c1 = self.core
+        return (slice(r0 - self.region[0], r1 - self.region[0]),
+                slice(c0 - self.region[2], c1 - self.region[2]))
+
+
+def split_into_tiles(shape, tile_size=TILE_SIZE, halo=HALO):
+    """Split the image into a grid of tiles
+
+    :param tuple shape: Shape of the image
+    :returns: Two-dimensional list (rows of the grid) of :class:`Tile` objects
+    """
+    height, width = shape[:2]
+    grid = []
+    for r0 in range(0, height, tile_size):
+        row = []
+        for c0 in range(0, width, tile_size):
+            r1 = min(r0 + tile_size, height)
+            c1 = min(c0 + tile_size, width)
+            region = (max(0, r0 - halo), min(height, r1 + halo),
+                      max(0, c0 - halo), min(width, c1 + halo))
+            row.append(Tile((r0, r1, c0, c1), region))
+        grid.append(row)
+    return grid
+
+
+def tiled_threshold(input_image, tiles):
+    """Calculate the Otsu threshold of the entire image from histograms of tiles. The result
+    is the same as :func:`skimage.filters.threshold_otsu` of the entire image
+
+    :param input_image: Image in grayscale (any array that can be sliced)
+    :param list[Tile] tiles: Tiles covering the image
+    :rtype: float
+    """
+    from skimage.filters import threshold_otsu
+
+    # The first pass gives the range of values, the second one - the histogram
+    minimum = None
+    maximum = None
+    for tile in tiles:
+        core = tile.read(input_image)[tile.core_slices()]
+        minimum = core.min() if minimum is None else min(minimum, core.min())
+        maximum = core.max() if maximum is None else max(maximum, core.max())
+    if minimum == maximum:
+        return minimum
+
+    integer = np.issubdtype(input_image.dtype, np.integer)
+    counts = 0
+    for tile in tiles:
+        core = tile.read(input_image)[tile.core_slices()]
+        if integer:
+            # Integer images have one bin for each value
+            counts = counts + np.bincount(core.ravel().astype('int64') - int(minimum),
+                                          minlength=int(maximum) - int(minimum) + 1)
+        else:
+            counts = counts + np.histogram(core, bins=256, range=(minimum, maximum))[0]
+
+    if integer:
+        bin_centers = np.arange(int(minimum), int(maximum) + 1)
+    else:
+        bin_edges = np.histogram_bin_edges(np.empty(0, dtype=input_image.dtype), bins=256,
+                                           range=(minimum, maximum))
+        bin_centers = (bin_edges[:-1] + bin_edges[1:]) / 2.0
+    return threshold_otsu(hist=(counts, bin_centers))
+
+
+def count_tile_pixels(tile_image, core_slices, threshold):
+    """Count the foreground and skeleton pixels within the core of the tile
+
+    :returns: Number of foreground pixels and number of skeleton pixels
+    """
+    from skimage.morphology import skeletonize
+
+    binary = (tile_image < threshold)
+    skeleton = skeletonize(binary)
+    return np.count_nonzero(binary[core_slices]), np.count_nonzero(skeleton[core_slices])
+
+
+def component_segment(mask):
+    """Add the 1 pixel margin to the binary mask of a component"""
+    segment = np.zeros((mask.shape[0] + 2, mask.shape[1] + 2), dtype=bool)
+    segment[1:-1, 1:-1] = mask
+    return segment
+
+
+def first_pixel(mask, origin):
+    """Get the first pixel of the component (in the raster order) in the image coordinates.
+    Labels of the entire image are given in this order"""
+    column = np.flatnonzero(mask[0])[0]
+    return origin[0], origin[1] + column
+
+
+def process_tile(tile_image, core_slices, core_origin, open_sides, threshold, erode, config):
+    """Do the preprocessing and the segmentation of a tile. Components inside the tile
+    are extracted immediately; the ones touching the seams with other tiles are returned
+    as pieces to be stitched
+
+    :param np.array tile_image: Tile with the halo
+    :param tuple core_slices: Slices of the core within the tile
+    :param tuple core_origin: Position of the core in the image
+    :param tuple open_sides: Flags (top, bottom, left, right) of sides shared with other tiles
+    :param float threshold: Threshold of the entire image
+    :param bool erode: Do the erosion in the noise reduction
+    :param ExtractionConfig config: Parameters of the extraction
+
+    :returns: Dictionary with a list of pairs (first pixel, strokes) of complete components,
+        a list of pieces (label, first pixel, bounding box origin, mask) and labels on
+        the edges of the core (top, bottom, left, right)
+    """
+    from scipy.ndimage import label, find_objects
+
+    binary = noise_reduction(tile_image < threshold, erode)[core_slices]
+    labeled, _ = label(binary)
+    edges = (labeled[0, :], labeled[-1, :], labeled[:, 0], labeled[:, -1])
+    open_labels = set()
+    for is_open, edge in zip(open_sides, edges):
+        if is_open:
+            open_labels.update(np.unique(edge[edge > 0]).tolist())
+
+    bounding_boxes = find_objects(labeled)
+    areas = component_areas(labeled, len(bounding_boxes))
+    selected, _, _ = component_filter(bounding_boxes, areas, config.min_area)
+
+    complete = []
+    pieces = []
+    for this_label, (rows, cols) in enumerate(bounding_boxes, start=1):
+        mask = (labeled[rows, cols] == this_label)
+        origin = (core_origin[0] + rows.start, core_origin[1] + cols.start)
+        key = first_pixel(mask, origin)
+        if this_label in open_labels:
+            pieces.append((this_label, key, origin, mask))
+        elif not selected[this_label - 1]:
+            # Noise (the component does not reach other tiles, so it is complete)
+            continue
+        else:
+            # The offset of the segment in the coordinates of the image with the margin
+            strokes = extract_component(component_segment(mask), np.array(origin), config)
+            complete.append((key, strokes))
+
+    return {'complete': complete, 'pieces': pieces, 'edges': edges}
+
+
+def stitch_pieces(grid_results):
+    """Join pieces of components cut by the seams between tiles
+
+    :param list grid_results: Two-dimensional list of results of :meth:`process_tile`
+    :returns: List of groups; each group is a list of pieces of a single component
+    """
+    parent = {}
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(a, b):
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    pieces = {}
+    for i, row in enumerate(grid_results):
+        for j, result in enumerate(row):
+            for piece in result['pieces']:
+                pieces[(i, j, piece[0])] = piece
+                parent[(i, j, piece[0])] = (i, j, piece[0])
+
+    def join_edges(id1, edge1, id2, edge2):
+        # Components are 4-connected, so only pixels directly across the seam are joined
+        touching = (edge1 > 0) & (edge2 > 0)
+        pairs = np.unique(np.stack((edge1[touching], edge2[touching]), axis=1), axis=0)
+        for label1, label2 in pairs:
+            union(id1 + (int(label1), ), id2 + (int(label2), ))
+
+    for i, row in enumerate(grid_results):
+        for j, result in enumerate(row):
+            if i + 1 < len(grid_results):
+                join_edges((i, j), result['edges'][1], (i + 1, j),
+                           grid_results[i + 1][j]['edges'][0])
+            if j + 1 < len(row):
+                join_edges((i, j), result['edges'][3], (i, j + 1), row[j + 1]['edges'][2])
+
+    groups = {}
+    for piece_id, piece in pieces.items():
+        groups.setdefault(find(piece_id), []).append(piece)
+    return list(groups.values())
+
+
+def assemble_group(group, config):
+    """Put pieces of a single component together and extract its strokes
+
+    :returns: Pair (first pixel, strokes)
+    """
+    top = min(origin[0] for _, _, origin, _ in group)
+    left = min(origin[1] for _, _, origin, _ in group)
+    bottom = max(origin[0] + mask.shape[0] for _, _, origin, mask in group)
+    right = max(origin[1] + mask.shape[1] for _, _, origin, mask in group)
+
+    segment = np.zeros((bottom - top + 2, right - left + 2), dtype=bool)
+    for _, _, origin, mask in group:
+        r = origin[0] - top + 1
+        c = origin[1] - left + 1
+        segment[r:(r + mask.shape[0]), c:(c + mask.shape[1])] |= mask
+
+    key = min(piece_key for _, piece_key, _, _ in group)
+    bounding_box = (slice(0, bottom - top), slice(0, right - left))
+    selected, _, _ = component_filter([bounding_box], [np.count_nonzero(segment)],
+                                      config.min_area)
+    if not selected[0]:
+        return key, []
+    return key, extract_component(segment, np.array([top, left]), config)
+
+
+def bounded_map(executor, function, arguments, window):
+    """Like :meth:`Executor.map`, but with at most ``window`` tasks submitted at once, so
+    only a few tiles are kept in memory. Without the executor, run in this process"""
+    if executor is None:
+        return [function(*args) for args in arguments]
+    results = []
+    pending = []
+    for args in arguments:
+        pending.append(executor.submit(function, *args))
+        if len(pending) >= window:
+            results.append(pending.pop(0).result())
+    results.extend(task.result() for task in pending)
+    return results
+
+
+def tiled_stroke_extraction(input_image, config=DEFAULT_CONFIG, tile_size=TILE_SIZE, halo=HALO,
+                            executor=None, window=8):
+    """Do the stroke extraction of a large image tile by tile, so the memory usage depends
+    on the tile size rather than the image size. The result is the same as the result of
+    :meth:`stroke_extraction` (also the order of strokes), provided that strokes are thinner
+    than twice the halo. Downscaling (``target_width``) is not supported. The image is read
+    four times: for the threshold, for the stroke width, for the segmentation and (only pieces
+    of components cut by seams) for stitching. Tiles are read lazily, when they are submitted
+
+    :param input_image: Image in grayscale (np.array, np.memmap or any array that can be
+        sliced)
+    :param ExtractionConfig config: Parameters of the extraction
+    :param int tile_size: Size of the tile (without the halo)
+    :param int halo: Width of the halo
+    :param executor: Pool of workers processing tiles in parallel (optional)
+    :param int window: Maximal number of tiles submitted to the executor at once
+
+    :returns: List of extracted :class:`Stroke` objects
+    :rtype: list[Stroke]
+    """
+    if config.target_width > 0.0:
+        raise ValueError('The tiled extraction does not support downscaling')
+    grid = split_into_tiles(input_image.shape, tile_size, halo)
+    tiles = [tile for row in grid for tile in row]
+
+    # Threshold and the average stroke width of the entire image
+    threshold = tiled_threshold(input_image, tiles)
+    counts = bounded_map(executor, count_tile_pixels, (
+        (tile.read(input_image), tile.core_slices(), threshold) for tile in tiles), window)
+    num_foreground = sum(c[0] for c in counts)
+    num_skeleton = sum(c[1] for c in counts)
+    erode = (num_foreground / num_skeleton) > BOLD_WIDTH
+
+    # Segmentation of tiles and extraction of components inside them (tiles are read one
+    # by one, so at most ``window`` of them are in memory)
+    arguments = ((tile.read(input_image), tile.core_slices(), tile.core[0::2],
+                  (i > 0, i + 1 < len(grid), j > 0, j + 1 < len(row)), threshold, erode, config)
+                 for i, row in enumerate(grid) for j, tile in enumerate(row))
+    results = bounded_map(executor, process_tile, arguments, window)
+    columns = len(grid[0])
+    grid_results = [results[(i * columns):((i + 1) * columns)] for i in range(len(grid))]
+
+    # Components cut by seams
+    components = [item for result in results for item in result['complete']]
+    groups = stitch_pieces(grid_results)
+    components.extend(bounded_map(executor, assemble_group,
+                                  ((group, config) for group in groups), window))
+
+    # The order of labels in the entire image
+    components.sort(key=lambda item: item[0])
+    extracted_strokes = []
+    for _, strokes in components:
+        extracted_strokes.extend(strokes)
+    return extracted_strokes
@@ -0,0 +1,95 @@
+import os
+import warnings
+import numpy as np
+
+
+"""Suffixes of the files created by :meth:`save_results`"""
+POINTS_SUFFIX = '_output_points.txt'
+POLYNOMIALS_SUFFIX = '_output_polynomials.csv'
+
+
+def read_image(path, keep_type=False):
+    """Read an input image in greyscale. Files with many pages (TIFF) are not accepted,
+    since only the first page would be read (see :meth:`extract_pages`)
+
+    :param path: Path to the image file (or a file-like object with the encoded image)
+    :param bool keep_type: Keep the type of pixels (e.g. 8-bit) instead of converting colour
+        images to floating point numbers (8 bytes per pixel)
+    :rtype: np.array
+    """
+    import skimage.io as io
+    from .pages import count_pages
+
+    number_of_pages = count_pages(path)
+    if number_of_pages > 1:
+        raise ValueError(f'The image has {number_of_pages} pages; process them with '
+                         'extract_pages')
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        if keep_type:
+            from .pages import to_grey
+            return to_grey(io.imread(path))
+        return io.imread(path, as_gray=True)
+
+
+def output_paths(output_prefix):
+    """Get the paths of files with the results
+
+    :param str output_prefix: Path of the output files without the suffix
+    :returns: Paths of the file with points and the file with polynomials
+    """
+    return output_prefix + POINTS_SUFFIX, output_prefix + POLYNOMIALS_SUFFIX
+
+
+def save_results(extracted_strokes, output_prefix):
+    """Save the points and polynomials of extracted strokes. Each file is written under
+    a temporary name and renamed at the end, so an interrupted run never leaves
+    a truncated output
+
+    :param list[Stroke] extracted_strokes: Strokes to be saved
+    :param str output_prefix: Path of the output files without the suffix
+    """
+    points_path, polynomials_path = output_paths(output_prefix)
+    points_array = []
+    polynomials_array = []
+    for s in extracted_strokes:
+        points_array.append(str(s))
+        polynomials_array.append(s.vector_of_features())
+
+    with open(points_path + '.tmp', 'w+') as f:
+        for line in points_array:
+            f.write(line)
+            f.write('\n')
+    with open(polynomials_path + '.tmp', 'w+') as f:
+        np.savetxt(f, polynomials_array, delimiter=',')
+
+    os.replace(points_path + '.tmp', points_path)
+    os.replace(polynomials_path + '.tmp', polynomials_path)
+
+
+def stroke_records(extracted_strokes):
+    """Get extracted strokes in the form that can be saved as JSON
+
+    :returns: Lists of points and lists of polynomial coefficients
+    """
+    points = [np.asarray(s.points).tolist() for s in extracted_strokes]
+    polynomials = [s.vector_of_features().tolist() for s in extracted_strokes]
+    return points, polynomials
+
+
+def stroke_arrays(extracted_strokes):
+    """Pack extracted strokes into three arrays. Points of stroke i are
+    ``points[offsets[i]:offsets[i + 1]]``
+
+    :returns: Offsets (n + 1 integers), points (m x 2) and polynomials (n x 8)
+    """
+    lengths = [len(s.points) for s in extracted_strokes]
+    offsets = np.concatenate(([0], np.cumsum(lengths))).astype('int64')
+    if extracted_strokes:
+        points = np.concatenate([np.asarray(s.points) for s in extracted_strokes])
+        polynomials = np.array([s.vector_of_features() for s in extracted_strokes])
+    else:
+        points = np.zeros((0, 2), dtype='int64')
+        polynomials = np.zeros((0, 8))
+    return offsets, points, polynomials
@@ -0,0 +1,235 @@
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+from .config import DEFAULT_CONFIG
+
+
+"""Extensions of files read page by page with :class:`TiffPageReader`"""
+TIFF_EXTENSIONS = ('.tif', '.tiff')
+
+"""Pages with more pixels than this are processed with the tiled extraction"""
+MAX_UNTILED_PIXELS = 4096 * 4096
+
+"""Weights of red, green and blue in the conversion to greyscale (the same as in
+:func:`skimage.color.rgb2gray`), multiplied by 10000"""
+GREY_WEIGHTS = (2125, 7154, 721)
+
+
+def to_grey(array):
+    """Convert an image (or its region) to greyscale without changing the type of pixels,
+    so an 8-bit image stays 8-bit. Transparent pixels are blended with the white background
+
+    :param np.array array: Image with 2 dimensions (greyscale) or 3 dimensions (channels last)
+    :rtype: np.array
+    """
+    if array.ndim == 2:
+        return array
+
+    integer = np.issubdtype(array.dtype, np.integer)
+    white = np.iinfo(array.dtype).max if integer else 1.0
+    work_type = 'int64' if integer else array.dtype
+    channels = array.shape[2]
+    colour = array[..., :(1 if channels < 3 else 3)].astype(work_type)
+
+    if channels in (2, 4):
+        alpha = array[..., -1:].astype(work_type)
+        colour = colour * alpha + white * (white - alpha)
+        colour = (colour + white // 2) // white if integer else colour / white
+
+    if channels < 3:
+        return colour[..., 0].astype(array.dtype)
+    weights = np.array(GREY_WEIGHTS, dtype=work_type)
+    if integer:
+        return ((colour @ weights + 5000) // 10000).astype(array.dtype)
+    return (colour @ weights / 10000).astype(array.dtype)
+
+
+class TiffPageReader:
+    """Greyscale view of a single page of a TIFF file that behaves like a read-only 2D array
+    (it can be sliced, see :meth:`__getitem__`). Uncompressed pages are memory-mapped;
+    in other pages only strips (or tiles) covering the requested region are decoded (in each
+    colour plane, if planes are stored separately), and the recently used ones are kept in
+    a small cache. Thanks to it, a page might be processed
+    region by region (e.g. with :meth:`tiled_stroke_extraction`) without loading it entirely
+
+    :param tifffile.TiffFile tiff: Opened TIFF file
+    :param int index: Index of the page
+    :param int cache_size: Number of decoded strips (or tiles) kept in memory
+    """
+
+    def __init__(self, tiff, index, cache_size=64):
+        self.page = tiff.pages[index]
+        self.shape = (self.page.imagelength, self.page.imagewidth)
+        self.dtype = self.page.dtype
+        self.ndim = 2
+        # Colour planes stored separately (one after another) instead of interleaved pixels
+        self._planes = self.page.samplesperpixel if self.page.planarconfig == 2 else 1
+        self._tiff = tiff
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        self._memmap = None
+        if self.page.is_memmappable:
+            import tifffile
+            self._memmap = tifffile.memmap(tiff.filehandle.path, page=index, mode='r')
+            if self._planes > 1:
+                self._memmap = np.moveaxis(self._memmap, 0, -1)
+
+    def __array__(self, dtype=None, copy=None):
+        array = self[:, :]
+        return array if dtype is None else array.astype(dtype)
+
+    def __getitem__(self, key):
+        """Read a rectangular region of the page
+
+        :param tuple key: Pair of slices (rows, columns) with the step 1
+        :rtype: np.array
+        """
+        rows, cols = (slice(*k.indices(n)[:2]) for k, n in zip(key, self.shape))
+        if self._memmap is not None:
+            return to_grey(np.asarray(self._memmap[rows, cols]))
+        # Segments of each plane follow the segments of the previous one
+        segments_per_plane = len(self.page.dataoffsets) // self._planes
+        planes = [self._read_plane(rows, cols, plane * segments_per_plane)
+                  for plane in range(self._planes)]
+        region = planes[0] if self._planes == 1 else np.stack(planes, axis=-1)
+        return to_grey(region)
+
+    def _read_plane(self, rows, cols, first_segment):
+        """Read a region of the page (or of a single colour plane) from the strips (or tiles)
+        covering it, starting at the given index of a segment"""
+        segment_height, segment_width = self.page.chunks[:2]
+        segments_per_row = -(-self.shape[1] // segment_width)
+        region = None
+        for segment_row in range(rows.start // segment_height,
+                                 -(-rows.stop // segment_height)):
+            for segment_col in range(cols.start // segment_width,
+                                     -(-cols.stop // segment_width)):
+                segment = self._segment(first_segment + segment_row * segments_per_row
+                                        + segment_col)
+                if region is None:
+                    region = np.zeros((rows.stop - rows.start, cols.stop - cols.start)
+                                      + segment.shape[2:], dtype=segment.dtype)
+                # Intersection of the segment and the region (in page coordinates)
+                top = segment_row * segment_height
+                left = segment_col * segment_width
+                r0, r1 = max(rows.start, top), min(rows.stop, top + segment.shape[0])
+                c0, c1 = max(cols.start, left), min(cols.stop, left + segment.shape[1])
+                region[(r0 - rows.start):(r1 - rows.start), (c0 - cols.start):(c1 - cols.start)] \
+                    = segment[(r0 - top):(r1 - top), (c0 - left):(c1 - left)]
+        if region is None:
+            region = np.zeros((0, 0), dtype=self.dtype)
+        return region
+
+    def _segment(self, index):
+        """Read and decode a single strip (or tile) of the page"""
+        if index in self._cache:
+            self._cache.move_to_end(index)
+            return self._cache[index]
+
+        handle = self._tiff.filehandle
+        handle.seek(self.page.dataoffsets[index])
+        data = handle.read(self.page.databytecounts[index])
+        segment, _, shape = self.page.decode(data, index, jpegtables=self.page.jpegtables)
+        # Drop the dimensions of planes and depth; keep samples only if there are many
+        segment = segment.reshape(shape[1:3] + ((shape[3], ) if shape[3] > 1 else ()))
+
+        self._cache[index] = segment
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        return segment
+
+
+def iter_pages(path):
+    """Iterate over the pages of an image file lazily. Pages of TIFF files are returned
+    as :class:`TiffPageReader` objects, which can be read until the iteration ends (the file
+    is closed then); other formats give a single page read at once. All pages are greyscale
+    and keep the type of pixels (usually 8-bit), instead of being converted to floating
+    point numbers
+
+    :param str path: Path to the image file
+    :returns: Generator of 2D arrays (or array-like objects)
+    """
+    if path.lower().endswith(TIFF_EXTENSIONS):
+        import tifffile
+
+        with tifffile.TiffFile(path) as tiff:
+            for index in range(len(tiff.pages)):
+                yield TiffPageReader(tiff, index)
+    else:
+        import skimage.io as io
+
+        yield to_grey(io.imread(path))
+
+
+def extract_pages(path, config=DEFAULT_CONFIG, max_untiled_pixels=MAX_UNTILED_PIXELS,
+                  tile_size=None, executor=None, stats=None, glyph_cache=None, dump_dir=None,
+                  dump_name='component'):
+    """Do the stroke extraction for each page of the image file. Large pages are processed
+    with :meth:`tiled_stroke_extraction`, so only a part of the page is kept in memory
+
+    :param str path: Path to the image file
+    :param ExtractionConfig config: Parameters of the extraction
+    :param int max_untiled_pixels: Pages with more pixels are processed tile by tile
+    :param int tile_size: Size of tiles (by default, :data:`TILE_SIZE`)
+    :param executor: Pool of workers processing tiles (optional)
+    :param ExtractionStats stats: Object to collect the statistics of all pages (optional;
+        only strokes are counted in tiled pages)
+    :param GlyphCache glyph_cache: Cache of strokes of repeated components (optional, not
+        used in tiled pages)
+    :param str dump_dir: Directory for slow components (optional, see
+        :meth:`stroke_extraction`; not used in tiled pages)
+    :param str dump_name: Name of the image in file names of slow components (the index of
+        the page is added)
+
+    :returns: Generator of pairs (index of the page, list of extracted strokes)
+    """
+    from .extraction import stroke_extraction
+    from .extraction.tiling import tiled_stroke_extraction, TILE_SIZE
+
+    for index, page in enumerate(iter_pages(path)):
+        if page.shape[0] * page.shape[1] > max_untiled_pixels:
+            strokes = tiled_stroke_extraction(page, config, tile_size or TILE_SIZE,
+                                              executor=executor)
+            if stats is not None:
+                stats.strokes += len(strokes)
+            yield index, strokes
+        else:
+            yield index, stroke_extraction(np.asarray(page), config, stats, dump_dir=dump_dir,
+                                           glyph_cache=glyph_cache,
+                                           dump_name=page_prefix(dump_name, index, None))
+
+
+def page_prefix(output_prefix, index, number_of_pages):
+    """Get the prefix of output files of the page (the index is added only if the file has
+    many pages)"""
+    if number_of_pages is not None and number_of_pages <= 1:
+        return output_prefix
+    return f'{output_prefix}_page{index + 1}'
+
+
+def count_pages(path):
+    """Get the number of pages without reading them
+
+    :param path: Path to the image file (or a file-like object with the encoded image)
+    :rtype: int
+    """
+    if isinstance(path, str):
+        if not (path.lower().endswith(TIFF_EXTENSIONS) and os.path.exists(path)):
+            return 1
+    else:
+        # Only TIFF files (starting with the byte order) might have many pages
+        position = path.tell()
+        is_tiff = path.read(2) in (b'II', b'MM')
+        path.seek(position)
+        if not is_tiff:
+            return 1
+
+    import tifffile
+
+    with tifffile.TiffFile(path) as tiff:
+        number_of_pages = len(tiff.pages)
+    if not isinstance(path, str):
+        path.seek(position)
+    return number_of_pages
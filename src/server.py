@@ -0,0 +1,299 @@
+import io
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import replace, fields
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+
+from .config import DEFAULT_CONFIG
+from .extraction import stroke_extraction
+from .files import read_image, stroke_arrays
+
+
+"""Content type of images sent as NumPy arrays (in the .npy format)"""
+NPY_CONTENT_TYPE = 'application/x-npy'
+
+"""Content type of the binary response (arrays from :meth:`stroke_arrays` in the .npz format)"""
+NPZ_CONTENT_TYPE = 'application/x-npz'
+
+
+def warm_up():
+    """Run the extraction on a tiny image, so all libraries are imported and initialized
+    before the first real request"""
+    image = np.ones((12, 12))
+    image[3:9, 5:7] = 0.0
+    stroke_extraction(image)
+
+
+def extract_batch(items):
+    """Extract strokes from many images (the task of a single worker)
+
+    :param list items: List of pairs (image, configuration)
+    :returns: List of pairs (True, arrays from :meth:`stroke_arrays`) or (False, error message)
+    """
+    results = []
+    for image, config in items:
+        try:
+            results.append((True, stroke_arrays(stroke_extraction(image, config))))
+        except Exception as error:
+            results.append((False, repr(error)))
+    return results
+
+
+class BatchingExecutor:
+    """Collect requests coming at the same time into batches and send each batch to
+    the pool of workers as a single task
+
+    :param executor: Pool of workers (:class:`concurrent.futures.Executor`)
+    :param int max_batch: Maximal number of images in a batch
+    :param float batch_window: Maximal time (in seconds) of waiting for more requests
+    """
+
+    def __init__(self, executor, max_batch=8, batch_window=0.005):
+        self.executor = executor
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.number_of_batches = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._dispatch, daemon=True)
+        self._thread.start()
+
+    def submit(self, image, config=DEFAULT_CONFIG):
+        """Add the image to the next batch
+
+        :returns: Future with the arrays from :meth:`stroke_arrays`
+        :rtype: Future
+        """
+        future = Future()
+        self._queue.put((image, config, future))
+        return future
+
+    def queue_size(self):
+        return self._queue.qsize()
+
+    def shutdown(self):
+        self._queue.put(None)
+        self._thread.join()
+        self.executor.shutdown()
+
+    def _dispatch(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0.0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    # Finish this batch first
+                    self._queue.put(None)
+                    break
+                batch.append(item)
+
+            self.number_of_batches += 1
+            items = [(image, config) for image, config, _ in batch]
+            task = self.executor.submit(extract_batch, items)
+            task.add_done_callback(lambda done, batch=batch: self._distribute(done, batch))
+
+    @staticmethod
+    def _distribute(task, batch):
+        try:
+            results = task.result()
+        except Exception as error:
+            results = [(False, repr(error))] * len(batch)
+        for (_, _, future), (success, result) in zip(batch, results):
+            if success:
+                future.set_result(result)
+            else:
+                future.set_exception(RuntimeError(result))
+
+
+class LatencyStats:
+    """Thread-safe statistics of requests and their latency (of the recent ones)
+
+    :param int window: Number of recent requests used for latency percentiles
+    """
+
+    def __init__(self, window=1000):
+        self.requests = 0
+        self.errors = 0
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency, error=False):
+        with self._lock:
+            self.requests += 1
+            self.errors += int(error)
+            self._latencies.append(latency)
+
+    def summary(self):
+        with self._lock:
+            latencies = np.array(self._latencies)
+            summary = {'requests': self.requests, 'errors': self.errors}
+        if len(latencies) > 0:
+            summary['latency'] = {
+                'mean': float(latencies.mean()),
+                'p50': float(np.percentile(latencies, 50)),
+                'p95': float(np.percentile(latencies, 95)),
+                'max': float(latencies.max()),
+            }
+        return summary
+
+
+def decode_image(body, content_type):
+    """Decode the image sent in the request body
+
+    :param bytes body: NumPy array in the .npy format or an encoded image file
+    :param str content_type: Content type of the body
+    :rtype: np.array
+    """
+    if content_type == NPY_CONTENT_TYPE:
+        image = np.load(io.BytesIO(body), allow_pickle=False)
+        if image.ndim != 2:
+            raise ValueError('The array must be a 2D greyscale image')
+        return image
+    return read_image(io.BytesIO(body))
+
+
+def encode_result(arrays, binary):
+    """Encode arrays from :meth:`stroke_arrays` as the response body
+
+    :returns: Body and its content type
+    """
+    offsets, points, polynomials = arrays
+    if binary:
+        buffer = io.BytesIO()
+        np.savez(buffer, offsets=offsets, points=points, polynomials=polynomials)
+        return buffer.getvalue(), NPZ_CONTENT_TYPE
+    strokes = [points[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+    records = {
+        'points': [s.tolist() for s in strokes],
+        'polynomials': polynomials.tolist(),
+    }
+    return json.dumps(records).encode('utf-8'), 'application/json'
+
+
+def config_from_query(query):
+    """Get the configuration with parameters overridden by the query string
+    (for example ``?q_min=0.1&epsilon=0.05``)
+
+    :rtype: ExtractionConfig
+    """
+    names = {f.name for f in fields(DEFAULT_CONFIG)}
+    changes = {}
+    for name, values in parse_qs(query).items():
+        if name in names:
+            changes[name] = type(getattr(DEFAULT_CONFIG, name))(values[-1])
+    return replace(DEFAULT_CONFIG, **changes) if changes else DEFAULT_CONFIG
+
+
+class ExtractionRequestHandler(BaseHTTPRequestHandler):
+    """Handler of the HTTP API:
+
+    * ``POST /extract`` - extract strokes from the image in the body (add ``?format=binary``
+      for the .npz response and parameters of :class:`ExtractionConfig` to override them),
+    * ``GET /health`` - check if the server is running,
+    * ``GET /metrics`` - get the number of requests, batches and latency statistics.
+    """
+
+    def log_message(self, format, *args):
+        if self.server.print_log:
+            super().log_message(format, *args)
+
+    def send_body(self, code, body, content_type='application/json'):
+        self.send_response(code)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, code, data):
+        self.send_body(code, json.dumps(data).encode('utf-8'))
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == '/health':
+            self.send_json(200, {'status': 'ok'})
+        elif path == '/metrics':
+            metrics = self.server.stats.summary()
+            metrics['batches'] = self.server.batching.number_of_batches
+            metrics['queue'] = self.server.batching.queue_size()
+            self.send_json(200, metrics)
+        else:
+            self.send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        start_time = time.perf_counter()
+        url = urlparse(self.path)
+        if url.path != '/extract':
+            self.send_json(404, {'error': 'not found'})
+            return
+
+        try:
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            image = decode_image(body, self.headers.get('Content-Type'))
+            config = config_from_query(url.query)
+        except Exception as error:
+            self.server.stats.record(time.perf_counter() - start_time, error=True)
+            self.send_json(400, {'error': repr(error)})
+            return
+
+        try:
+            arrays = self.server.batching.submit(image, config).result()
+        except Exception as error:
+            self.server.stats.record(time.perf_counter() - start_time, error=True)
+            self.send_json(500, {'error': str(error)})
+            return
+
+        binary = parse_qs(url.query).get('format', ['json'])[-1] == 'binary'
+        body, content_type = encode_result(arrays, binary)
+        # Recorded before responding, so the client sees its request in the metrics
+        self.server.stats.record(time.perf_counter() - start_time)
+        self.send_body(200, body, content_type)
+
+
+class ExtractionServer(ThreadingHTTPServer):
+    """Long-running HTTP server keeping the libraries loaded. Requests are handled in
+    separate threads and the extraction runs in a pool of workers
+
+    :param str host: Address to listen on (by default, only local connections are allowed)
+    :param int port: Port to listen on (0 means any free port, see :attr:`server_port`)
+    :param int workers: Number of workers
+    :param bool use_threads: Use threads instead of processes as workers
+    :param int max_batch: Maximal number of images sent to a worker at once
+    :param float batch_window: Maximal time of waiting for more requests to a batch
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', port=8765, workers=2, use_threads=False, max_batch=8,
+                 batch_window=0.005, print_log=False):
+        if use_threads:
+            warm_up()
+            executor = ThreadPoolExecutor(max_workers=workers)
+        else:
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=warm_up)
+            # Processes are started on demand, so start all of them before the first request
+            for task in [executor.submit(time.sleep, 0.1) for _ in range(workers)]:
+                task.result()
+        self.batching = BatchingExecutor(executor, max_batch, batch_window)
+        self.stats = LatencyStats()
+        self.print_log = print_log
+        super().__init__((host, port), ExtractionRequestHandler)
+
+    def server_close(self):
+        super().server_close()
+        self.batching.shutdown()
@@ -0,0 +1,250 @@
+import json
+import os
+import socket
+import threading
+import time
+from dataclasses import asdict
+
+from .batch import list_inputs
+from .config import ExtractionConfig, DEFAULT_CONFIG
+from .extraction import stroke_extraction
+from .files import read_image, stroke_records
+
+
+"""Default time (in seconds) after which a claimed task of a silent worker is released"""
+LEASE_TIME = 300.0
+
+"""Separator between the task id and the worker id in names of claimed tasks"""
+CLAIM_SEPARATOR = '@'
+
+
+def queue_paths(queue_dir):
+    """Get the paths of subdirectories of the queue
+
+    :returns: Dictionary with paths of directories: todo, claimed, done and shards
+    """
+    return {name: os.path.join(queue_dir, name) for name in ('todo', 'claimed', 'done', 'shards')}
+
+
+def create_queue(queue_dir, source, config=DEFAULT_CONFIG):
+    """Create a work queue in a directory on the shared filesystem. Each input image becomes
+    a task file. Paths of images are stored relative to the queue directory, so hosts might
+    mount the shared filesystem in different places
+
+    :param str queue_dir: Directory of the queue (created if it does not exist)
+    :param str source: Directory with images or a manifest file (see :meth:`list_inputs`)
+    :param ExtractionConfig config: Parameters used by all workers
+    :returns: Number of created tasks
+    """
+    paths = queue_paths(queue_dir)
+    for path in paths.values():
+        os.makedirs(path, exist_ok=True)
+    with open(os.path.join(queue_dir, 'config.json'), 'w') as f:
+        json.dump(asdict(config), f)
+
+    inputs = list_inputs(source)
+    for number, (input_path, relative_path) in enumerate(inputs):
+        task = {
+            'task': f'{number:08d}',
+            'input': os.path.relpath(input_path, queue_dir),
+            'name': relative_path,
+        }
+        task_path = os.path.join(paths['todo'], task['task'] + '.json')
+        with open(task_path + '.tmp', 'w') as f:
+            json.dump(task, f)
+        os.replace(task_path + '.tmp', task_path)
+    return len(inputs)
+
+
+def load_queue_config(queue_dir):
+    """Read the parameters of extraction stored in the queue
+
+    :rtype: ExtractionConfig
+    """
+    with open(os.path.join(queue_dir, 'config.json')) as f:
+        return ExtractionConfig(**json.load(f))
+
+
+def claim_task(queue_dir, worker_id):
+    """Claim the first available task by moving it atomically into the directory of claimed
+    tasks. If another worker is faster, the next task is tried
+
+    :returns: Path of the claimed task file or None if there is nothing to do
+    """
+    paths = queue_paths(queue_dir)
+    for name in sorted(os.listdir(paths['todo'])):
+        if not name.endswith('.json'):
+            continue
+        todo_path = os.path.join(paths['todo'], name)
+        claimed_path = os.path.join(paths['claimed'],
+                                    name[:-5] + CLAIM_SEPARATOR + worker_id + '.json')
+        try:
+            # The modification time is the beginning of the lease, so it is set before
+            # the task becomes visible as claimed
+            os.utime(todo_path)
+            os.rename(todo_path, claimed_path)
+        except FileNotFoundError:
+            continue
+        return claimed_path
+    return None
+
+
+def release_expired(queue_dir, lease_time=LEASE_TIME):
+    """Move tasks whose lease has expired (the worker has not renewed it) back to the queue
+
+    :returns: Number of released tasks
+    """
+    paths = queue_paths(queue_dir)
+    released = 0
+    now = time.time()
+    for name in os.listdir(paths['claimed']):
+        claimed_path = os.path.join(paths['claimed'], name)
+        try:
+            if now - os.path.getmtime(claimed_path) < lease_time:
+                continue
+            task_id = name.split(CLAIM_SEPARATOR)[0]
+            os.rename(claimed_path, os.path.join(paths['todo'], task_id + '.json'))
+            released += 1
+        except FileNotFoundError:
+            # Finished or released by someone else in the meantime
+            continue
+    return released
+
+
+def queue_status(queue_dir):
+    """Get the number of tasks in each state
+
+    :rtype: dict
+    """
+    paths = queue_paths(queue_dir)
+    return {
+        state: len([name for name in os.listdir(paths[state]) if name.endswith('.json')])
+        for state in ('todo', 'claimed', 'done')
+    }
+
+
+class LeaseKeeper:
+    """Background thread renewing the lease of the claimed task while it is processed
+
+    :param str claimed_path: Path of the claimed task file
+    :param float interval: Time between renewals
+    """
+
+    def __init__(self, claimed_path, interval):
+        self.claimed_path = claimed_path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                os.utime(self.claimed_path)
+            except FileNotFoundError:
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+
+def default_worker_id():
+    """Get the worker id made of the host name and the process id
+
+    :rtype: str
+    """
+    host = socket.gethostname().replace(CLAIM_SEPARATOR, '_').replace(os.sep, '_')
+    return f'{host}-{os.getpid()}'
+
+
+def run_worker(queue_dir, worker_id=None, lease_time=LEASE_TIME, poll_interval=1.0,
+               print_log=False):
+    """Process tasks from the queue until all of them are done. Results are appended to
+    the shard file of this worker. The record is written before the task is marked as done,
+    so a crash might lead to a duplicate (removed by :meth:`merge_shards`), but never to
+    a lost result
+
+    :param str queue_dir: Directory of the queue created with :meth:`create_queue`
+    :param str worker_id: Unique id of the worker (see :meth:`default_worker_id`)
+    :param float lease_time: Time after which tasks of silent workers are released
+    :param float poll_interval: Time of waiting when all tasks are claimed by others
+    :returns: Number of tasks processed by this worker
+    """
+    worker_id = worker_id or default_worker_id()
+    paths = queue_paths(queue_dir)
+    config = load_queue_config(queue_dir)
+    shard_path = os.path.join(paths['shards'], worker_id + '.jsonl')
+    processed = 0
+
+    with open(shard_path, 'a') as shard:
+        while True:
+            release_expired(queue_dir, lease_time)
+            claimed_path = claim_task(queue_dir, worker_id)
+            if claimed_path is None:
+                if queue_status(queue_dir)['claimed'] == 0:
+                    break
+                # Other workers are busy; wait in case some of them die
+                time.sleep(poll_interval)
+                continue
+
+            with open(claimed_path) as f:
+                task = json.load(f)
+            record = {'task': task['task'], 'name': task['name'], 'worker': worker_id}
+            try:
+                with LeaseKeeper(claimed_path, lease_time / 3.0):
+                    input_image = read_image(os.path.join(queue_dir, task['input']))
+                    extracted_strokes = stroke_extraction(input_image, config)
+                record['points'], record['polynomials'] = stroke_records(extracted_strokes)
+            except Exception as error:
+                # Do not let a broken image return to the queue forever
+                record['error'] = repr(error)
+            shard.write(json.dumps(record) + '\n')
+            shard.flush()
+            os.fsync(shard.fileno())
+
+            try:
+                os.rename(claimed_path, os.path.join(paths['done'], task['task'] + '.json'))
+            except FileNotFoundError:
+                # The lease expired and the task has been released; the duplicate is harmless
+                pass
+            processed += 1
+            if print_log:
+                result = record.get('error', f'{len(record.get("points", []))} strokes')
+                print(f'{worker_id}: {task["name"]}: {result}')
+
+    return processed
+
+
+def merge_shards(queue_dir, index_path=None):
+    """Combine shard files of all workers into a single index (a JSON Lines file sorted by
+    the task id, with one record for each task)
+
+    :param str queue_dir: Directory of the queue
+    :param str index_path: Path of the index (by default, index.jsonl in the queue)
+    :returns: Number of records in the index
+    """
+    paths = queue_paths(queue_dir)
+    index_path = index_path or os.path.join(queue_dir, 'index.jsonl')
+    records = {}
+    for name in sorted(os.listdir(paths['shards'])):
+        with open(os.path.join(paths['shards'], name)) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # The last line might be incomplete after a crash
+                    continue
+                if 'error' in record and record['task'] in records:
+                    # Keep the successful result of a duplicated task
+                    continue
+                records[record['task']] = record
+
+    with open(index_path + '.tmp', 'w') as f:
+        for task_id in sorted(records):
+            f.write(json.dumps(records[task_id]) + '\n')
+    os.replace(index_path + '.tmp', index_path)
+    return len(records)
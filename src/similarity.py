@@ -0,0 +1,207 @@
+import json
+import os
+
+import numpy as np
+
+
+"""Positions of constant terms of both polynomials in :meth:`Stroke.vector_of_features`.
+They encode the position of the stroke, so they are dropped by :meth:`normalize_features`"""
+CONSTANT_TERMS = (3, 7)
+
+"""Maximal number of vectors used to train the clusters of :class:`FeatureIndex`"""
+TRAINING_SAMPLE = 100000
+
+"""Default number of clusters searched for each query by :meth:`FeatureIndex.search`"""
+N_PROBE = 8
+
+"""Names of files of a saved :class:`FeatureIndex`"""
+INDEX_ARRAYS = ('centroids', 'offsets', 'vectors', 'stroke_ids', 'image_ids')
+IMAGES_FILE = 'images.json'
+
+
+def normalize_features(features):
+    """Make feature vectors of strokes independent of their position by dropping the constant
+    terms of polynomials
+
+    :param np.array features: Array N x 8 (see :meth:`Stroke.vector_of_features`)
+    :returns: Array N x 6
+    """
+    features = np.asarray(features, dtype='float').reshape(-1, 8)
+    return np.delete(features, CONSTANT_TERMS, axis=1)
+
+
+class FeatureIndex:
+    """Index of feature vectors of strokes for the search of similar strokes in a large
+    corpus. Vectors are normalized (see :meth:`normalize_features`) and divided into
+    clusters with k-means (an inverted file index); a query is compared only with vectors
+    of ``n_probe`` clusters with the nearest centres. The index can be saved in a directory
+    and loaded with memory-mapped arrays, so it does not need to fit in memory
+
+    Each vector has the id of the stroke (e.g. its position in the list of strokes of
+    the image) and the name of the image
+
+    :param int n_lists: Number of clusters (by default, the square root of the number of
+        vectors)
+    """
+
+    def __init__(self, n_lists=None):
+        self.n_lists = n_lists
+        self.centroids = None
+        self.offsets = None
+        self.vectors = np.zeros((0, 6), dtype='float32')
+        self.stroke_ids = np.zeros(0, dtype='int64')
+        self.image_ids = np.zeros(0, dtype='int64')
+        self.images = []
+        self._image_codes = {}
+        self._pending = []
+
+    def __len__(self):
+        return len(self.vectors) + sum(len(vectors) for vectors, _, _ in self._pending)
+
+    def add(self, features, image, stroke_ids=None):
+        """Add feature vectors of strokes of a single image. They are searchable after
+        :meth:`build` (or, if the index has been already built, after the next search)
+
+        :param np.array features: Array N x 8 (see :meth:`Stroke.vector_of_features`)
+        :param str image: Name of the image
+        :param stroke_ids: Ids of strokes (by default, 0, 1, ..., N - 1)
+        """
+        vectors = normalize_features(features).astype('float32')
+        if stroke_ids is None:
+            stroke_ids = np.arange(len(vectors))
+        if image not in self._image_codes:
+            self._image_codes[image] = len(self.images)
+            self.images.append(image)
+        self._pending.append((vectors, np.asarray(stroke_ids, dtype='int64'),
+                              np.full(len(vectors), self._image_codes[image], dtype='int64')))
+
+    def add_records(self, index_path):
+        """Add strokes of all images from the index of a work queue (see
+        :meth:`merge_shards`) or any file with JSON records with fields ``name`` and
+        ``polynomials``
+
+        :returns: Number of added vectors
+        """
+        added = 0
+        with open(index_path) as f:
+            for line in f:
+                record = json.loads(line)
+                if record.get('polynomials'):
+                    self.add(record['polynomials'], record['name'])
+                    added += len(record['polynomials'])
+        return added
+
+    def build(self, seed=0):
+        """Divide all vectors into clusters (k-means on a sample of at most
+        :data:`TRAINING_SAMPLE` vectors) and sort them by clusters
+
+        :param int seed: Seed of the random generator
+        """
+        from sklearn.cluster import MiniBatchKMeans
+
+        vectors, stroke_ids, image_ids = self._all_vectors()
+        if len(vectors) == 0:
+            raise ValueError('The index is empty')
+        n_lists = self.n_lists or max(1, int(np.sqrt(len(vectors))))
+        n_lists = max(1, min(n_lists, len(vectors)))
+        sample = vectors
+        if len(vectors) > TRAINING_SAMPLE:
+            random = np.random.default_rng(seed)
+            sample = vectors[random.choice(len(vectors), TRAINING_SAMPLE, replace=False)]
+        kmeans = MiniBatchKMeans(n_clusters=n_lists, random_state=seed, n_init=3)
+        self.centroids = kmeans.fit(sample).cluster_centers_.astype('float32')
+        self._assign(vectors, stroke_ids, image_ids)
+
+    def _all_vectors(self):
+        parts = [(self.vectors, self.stroke_ids, self.image_ids)] + self._pending
+        self._pending = []
+        return tuple(np.concatenate(arrays) for arrays in zip(*parts))
+
+    def _assign(self, vectors, stroke_ids, image_ids):
+        """Sort vectors by the nearest centres"""
+        lists = np.zeros(len(vectors), dtype='int64')
+        for start in range(0, len(vectors), TRAINING_SAMPLE):
+            chunk = vectors[start:(start + TRAINING_SAMPLE)]
+            lists[start:(start + len(chunk))] = squared_distances(chunk, self.centroids) \
+                .argmin(axis=1)
+        order = np.argsort(lists, kind='stable')
+        self.vectors = vectors[order]
+        self.stroke_ids = stroke_ids[order]
+        self.image_ids = image_ids[order]
+        self.offsets = np.searchsorted(lists[order], np.arange(len(self.centroids) + 1))
+
+    def search(self, features, k=10, n_probe=N_PROBE):
+        """Find the most similar strokes to each query
+
+        :param np.array features: Array M x 8 of feature vectors of queries
+        :param int k: Number of results for each query
+        :param int n_probe: Number of searched clusters (with all of them, the search is exact)
+        :returns: Arrays M x k: distances, ids of strokes and codes of images (the names are
+            in the field ``images``); missing results have the distance inf and codes -1
+        """
+        if self.centroids is None:
+            raise ValueError('The index has to be built before searching')
+        if self._pending:
+            # Vectors added after building go to the existing clusters
+            self._assign(*self._all_vectors())
+
+        queries = normalize_features(features)
+        n_probe = min(n_probe, len(self.centroids))
+        probes = np.argsort(squared_distances(queries, self.centroids), axis=1)[:, :n_probe]
+
+        distances = np.full((len(queries), k), np.inf)
+        positions = np.full((len(queries), k), -1, dtype='int64')
+        for q, (query, lists) in enumerate(zip(queries, probes)):
+            candidates = np.concatenate([np.arange(self.offsets[i], self.offsets[i + 1])
+                                         for i in lists])
+            if len(candidates) == 0:
+                continue
+            candidate_distances = np.sqrt(squared_distances(
+                query[None, :], self.vectors[candidates])[0])
+            best = np.argsort(candidate_distances, kind='stable')[:k]
+            distances[q, :len(best)] = candidate_distances[best]
+            positions[q, :len(best)] = candidates[best]
+
+        found = positions >= 0
+        stroke_ids = np.where(found, self.stroke_ids[positions], -1)
+        image_ids = np.where(found, self.image_ids[positions], -1)
+        return distances, stroke_ids, image_ids
+
+    def save(self, directory):
+        """Save the index (it is built first if needed) as NumPy files in the directory"""
+        if self.centroids is None or self._pending:
+            self.build()
+        os.makedirs(directory, exist_ok=True)
+        for name in INDEX_ARRAYS:
+            np.save(os.path.join(directory, name + '.npy'), getattr(self, name))
+        with open(os.path.join(directory, IMAGES_FILE), 'w') as f:
+            json.dump(self.images, f)
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        """Load the index saved with :meth:`save`
+
+        :param bool mmap: Map arrays of vectors and ids from files instead of reading them
+        :rtype: FeatureIndex
+        """
+        index = cls()
+        for name in INDEX_ARRAYS:
+            setattr(index, name, np.load(os.path.join(directory, name + '.npy'),
+                                         mmap_mode=('r' if mmap else None)))
+        index.n_lists = len(index.centroids)
+        with open(os.path.join(directory, IMAGES_FILE)) as f:
+            index.images = json.load(f)
+        index._image_codes = {image: code for code, image in enumerate(index.images)}
+        return index
+
+
+def squared_distances(vectors1, vectors2):
+    """Get squared Euclidean distances between all pairs of vectors
+
+    :returns: Array len(vectors1) x len(vectors2)
+    """
+    vectors1 = np.asarray(vectors1, dtype='float')
+    vectors2 = np.asarray(vectors2, dtype='float')
+    distances = (vectors1 ** 2).sum(axis=1)[:, None] - 2.0 * vectors1 @ vectors2.T \
+        + (vectors2 ** 2).sum(axis=1)[None, :]
+    return np.maximum(distances, 0.0)
@@ -0,0 +1,165 @@
+import numpy as np
+
+
+"""Default size (in pixels) of cells of :class:`StrokeIndex`"""
+CELL_SIZE = 32
+
+
+class StrokeIndex:
+    """Spatial index of extracted strokes: a uniform grid of square cells, where each cell
+    lists the strokes whose bounding boxes overlap it. It answers queries about strokes
+    within rectangles and strokes nearest to points without scanning all of them, and
+    strokes can be added at any time. Strokes are identified by the order of insertion
+    (the first one is 0). Coordinates are (row, column), as in points of strokes
+
+    :param int cell_size: Size of cells in pixels (should be similar to the size of strokes)
+    """
+
+    def __init__(self, cell_size=CELL_SIZE):
+        self.cell_size = cell_size
+        self._cells = {}
+        self._points = []
+        self._boxes = np.zeros((0, 4))
+        self._size = 0
+        self._cell_range = None
+
+    @classmethod
+    def from_strokes(cls, extracted_strokes, cell_size=CELL_SIZE):
+        """Build the index of a list of strokes (e.g. the result of :meth:`stroke_extraction`)
+
+        :rtype: StrokeIndex
+        """
+        index = cls(cell_size)
+        index.insert(extracted_strokes)
+        return index
+
+    def __len__(self):
+        return self._size
+
+    def _cell(self, point):
+        return (int(np.floor(point[0] / self.cell_size)),
+                int(np.floor(point[1] / self.cell_size)))
+
+    def insert(self, extracted_strokes):
+        """Add strokes (or arrays N x 2 of their points) to the index
+
+        :returns: Ids of added strokes
+        :rtype: range
+        """
+        first = self._size
+        new_points = [np.asarray(getattr(stroke, 'points', stroke), dtype='float').reshape(-1, 2)
+                      for stroke in extracted_strokes]
+        new_boxes = np.array([np.concatenate((points.min(axis=0), points.max(axis=0)))
+                              for points in new_points]).reshape(-1, 4)
+
+        # Grow the table of bounding boxes by doubling
+        if first + len(new_boxes) > len(self._boxes):
+            boxes = np.zeros((max(2 * len(self._boxes), first + len(new_boxes)), 4))
+            boxes[:first] = self._boxes[:first]
+            self._boxes = boxes
+        self._boxes[first:(first + len(new_boxes))] = new_boxes
+        self._points.extend(new_points)
+        self._size += len(new_points)
+
+        for stroke_id, box in enumerate(new_boxes, start=first):
+            r0, c0 = self._cell(box[:2])
+            r1, c1 = self._cell(box[2:])
+            for row in range(r0, r1 + 1):
+                for col in range(c0, c1 + 1):
+                    self._cells.setdefault((row, col), []).append(stroke_id)
+            if self._cell_range is None:
+                self._cell_range = [r0, c0, r1, c1]
+            else:
+                self._cell_range = [min(self._cell_range[0], r0), min(self._cell_range[1], c0),
+                                    max(self._cell_range[2], r1), max(self._cell_range[3], c1)]
+        return range(first, self._size)
+
+    def points(self, stroke_id):
+        """Get points of the stroke (an array N x 2)"""
+        return self._points[stroke_id]
+
+    def query_rect(self, rect, exact=False):
+        """Find strokes within the rectangle
+
+        :param tuple rect: Corners of the rectangle (row0, col0, row1, col1), included
+        :param bool exact: Return only strokes with at least one point in the rectangle
+            (by default, strokes whose bounding boxes overlap the rectangle)
+        :returns: Sorted array of ids of strokes
+        """
+        r0, c0, r1, c1 = rect
+        cell_r0, cell_c0 = self._cell((r0, c0))
+        cell_r1, cell_c1 = self._cell((r1, c1))
+        if self._cell_range is not None:
+            # Cells outside the range are empty
+            cell_r0, cell_c0 = max(cell_r0, self._cell_range[0]), max(cell_c0, self._cell_range[1])
+            cell_r1, cell_c1 = min(cell_r1, self._cell_range[2]), min(cell_c1, self._cell_range[3])
+        candidates = set()
+        for row in range(cell_r0, cell_r1 + 1):
+            for col in range(cell_c0, cell_c1 + 1):
+                candidates.update(self._cells.get((row, col), ()))
+        if not candidates:
+            return np.zeros(0, dtype='int64')
+
+        ids = np.array(sorted(candidates))
+        boxes = self._boxes[ids]
+        ids = ids[(boxes[:, 0] <= r1) & (boxes[:, 2] >= r0)
+                  & (boxes[:, 1] <= c1) & (boxes[:, 3] >= c0)]
+        if exact:
+            lower = np.array([r0, c0])
+            upper = np.array([r1, c1])
+            ids = np.array([i for i in ids if np.any(np.all(
+                (self._points[i] >= lower) & (self._points[i] <= upper), axis=1))],
+                dtype='int64')
+        return ids
+
+    def query_rects(self, rects, exact=False):
+        """Find strokes within each of many rectangles (see :meth:`query_rect`)
+
+        :param rects: Array K x 4 (or a list) of rectangles
+        :returns: List of K arrays of ids
+        """
+        return [self.query_rect(rect, exact) for rect in rects]
+
+    def nearest(self, point, k=1):
+        """Find the strokes nearest to the point. The distance to a stroke is the distance
+        to the nearest of its points
+
+        :param point: Coordinates (row, column)
+        :param int k: Number of strokes
+        :returns: Arrays of ids and distances of at most k strokes, from the nearest one
+        """
+        if self._size == 0 or k <= 0:
+            return np.zeros(0, dtype='int64'), np.zeros(0)
+        point = np.asarray(point, dtype='float')
+        centre_row, centre_col = self._cell(point)
+        row0, col0, row1, col1 = self._cell_range
+        # Rings of cells around the point are checked until the k-th distance is shorter
+        # than the distance to the next ring (or there are no more cells). Rings before
+        # the first one touching the occupied cells are skipped, and only the occupied
+        # rows and columns of each ring are visited
+        first_ring = max(row0 - centre_row, centre_row - row1, col0 - centre_col,
+                         centre_col - col1, 0)
+        max_ring = max(abs(centre_row - row0), abs(centre_row - row1),
+                       abs(centre_col - col0), abs(centre_col - col1))
+        distances = {}
+        for ring in range(first_ring, max_ring + 1):
+            for row in range(max(centre_row - ring, row0), min(centre_row + ring, row1) + 1):
+                if abs(row - centre_row) == ring:
+                    cols = range(max(centre_col - ring, col0), min(centre_col + ring, col1) + 1)
+                else:
+                    cols = [col for col in (centre_col - ring, centre_col + ring)
+                            if col0 <= col <= col1]
+                for col in cols:
+                    for stroke_id in self._cells.get((row, col), ()):
+                        if stroke_id not in distances:
+                            difference = self._points[stroke_id] - point
+                            distances[stroke_id] = np.sqrt((difference ** 2).sum(axis=1).min())
+            if len(distances) >= k:
+                kth = np.partition(np.fromiter(distances.values(), dtype='float'), k - 1)[k - 1]
+                if kth <= ring * self.cell_size:
+                    break
+
+        ids = np.fromiter(distances.keys(), dtype='int64')
+        values = np.fromiter(distances.values(), dtype='float')
+        order = np.lexsort((ids, values))[:k]
+        return ids[order], values[order]
@@ -0,0 +1,114 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+import numpy as np
+import pytest
+
+from ..src.config import ExtractionConfig
+from ..src.extraction import stroke_extraction
+from ..src.extraction.aio import extract_async, iter_components_async
+from ..src.extraction.glyph_cache import GlyphCache
+from ..src.extraction.stats import ExtractionStats
+from ..src.files import read_image
+from .test_extraction import grid_image
+from .test_rescaling import example_image
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    """Thread pool that remembers the maximal number of tasks submitted at once"""
+
+    def __init__(self):
+        super().__init__(max_workers=4)
+        self.running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+
+    def submit(self, function, *args):
+        def wrapped():
+            with self.lock:
+                self.running += 1
+                self.max_running = max(self.max_running, self.running)
+            try:
+                return function(*args)
+            finally:
+                with self.lock:
+                    self.running -= 1
+        return super().submit(wrapped)
+
+
+def test_extract_async():
+    input_image = read_image('data/tx.png')
+    strokes = asyncio.run(extract_async(input_image))
+    assert [str(s) for s in strokes] == [str(s) for s in stroke_extraction(input_image)]
+
+
+def test_extract_async_processes():
+    input_image = read_image('data/tx.png')
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        strokes = asyncio.run(extract_async(input_image, executor=executor))
+    assert len(strokes) == 4
+
+
+def test_iter_components_async_concurrency():
+    input_image = read_image('data/tx.png')
+    executor = CountingExecutor()
+
+    async def collect():
+        return [item async for item in iter_components_async(input_image, executor=executor,
+                                                             max_concurrency=1)]
+
+    components = asyncio.run(collect())
+    executor.shutdown()
+    assert [label for label, _ in components] == list(range(1, len(components) + 1))
+    assert sum(len(strokes) for _, strokes in components) == 4
+    assert executor.max_running == 1
+
+
+def test_cancellation():
+    input_image = read_image('data/tx.png')
+
+    async def cancel_after_first():
+        async def consume():
+            async for _ in iter_components_async(input_image, max_concurrency=1):
+                await asyncio.sleep(10.0)
+        task = asyncio.create_task(consume())
+        await asyncio.sleep(0.5)
+        task.cancel()
+        await task
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(cancel_after_first())
+
+
+def test_extract_async_rescaled():
+    input_image = example_image()
+    config = ExtractionConfig(target_width=4.0)
+    strokes = asyncio.run(extract_async(input_image, config))
+    expected = stroke_extraction(input_image, config)
+    assert len(strokes) == 1
+    assert [str(s) for s in strokes] == [str(s) for s in expected]
+    assert np.allclose(strokes[0].vector_of_features(), expected[0].vector_of_features())
+
+
+def test_extract_async_budget_and_stats():
+    input_image = grid_image()
+    config = ExtractionConfig(time_budget=1e-6)
+    stats, expected_stats = ExtractionStats(), ExtractionStats()
+    strokes = asyncio.run(extract_async(input_image, config, stats=stats))
+    expected = stroke_extraction(input_image, config, expected_stats)
+    assert [str(s) for s in strokes] == [str(s) for s in expected]
+    assert all(stroke.degraded for stroke in strokes)
+    assert stats.as_dict() == expected_stats.as_dict()
+
+
+def test_extract_async_glyph_cache():
+    input_image = read_image('data/tx.png')
+    glyph_cache = GlyphCache()
+    expected = [str(s) for s in stroke_extraction(input_image)]
+    for _ in range(2):
+        stats = ExtractionStats()
+        strokes = asyncio.run(extract_async(input_image, stats=stats, glyph_cache=glyph_cache))
+        assert [str(s) for s in strokes] == expected
+    assert stats.cached == len(glyph_cache) > 0
+    assert glyph_cache.hits == stats.cached
@@ -0,0 +1,101 @@
+import os
+import shutil
+
+import numpy as np
+import pytest
+import tifffile
+
+from ..src.batch import list_inputs, run_batch, load_checkpoint, CHECKPOINT_NAME
+from ..src.extraction import stroke_extraction
+from ..src.files import read_image, output_paths
+
+
+def prepare_inputs(directory, names):
+    os.makedirs(directory, exist_ok=True)
+    for name in names:
+        shutil.copy('data/tx.png', os.path.join(directory, name))
+
+
+def test_list_inputs_directory(tmp_path):
+    prepare_inputs(tmp_path, ['b.png', 'a.png'])
+    (tmp_path / 'notes.txt').write_text('not an image')
+    inputs = list_inputs(str(tmp_path))
+    assert [relative for _, relative in inputs] == ['a.png', 'b.png']
+
+
+def test_list_inputs_manifest(tmp_path):
+    prepare_inputs(tmp_path / 'images', ['a.png', 'b.png'])
+    manifest = tmp_path / 'manifest.txt'
+    manifest.write_text('images/b.png\n\n# comment\nimages/a.png\n')
+    inputs = list_inputs(str(manifest))
+    assert inputs[0] == (os.path.join(str(tmp_path), 'images/b.png'), 'images/b.png')
+    assert len(inputs) == 2
+
+
+def test_run_batch(tmp_path):
+    prepare_inputs(tmp_path / 'in', ['a.png', 'b.png', 'c.png'])
+    output_dir = str(tmp_path / 'out')
+    summary = run_batch(str(tmp_path / 'in'), output_dir, workers=2, print_log=False)
+    assert summary['processed'] == 3
+    assert summary['strokes'] == 12
+    assert summary['images_per_second'] > 0.0
+    for name in ['a', 'b', 'c']:
+        for path in output_paths(os.path.join(output_dir, name)):
+            assert os.path.exists(path)
+    assert len(load_checkpoint(os.path.join(output_dir, CHECKPOINT_NAME))) == 3
+
+
+def test_run_batch_same_prefix(tmp_path):
+    prepare_inputs(tmp_path / 'in', ['a.png', 'a.jpg', 'b.png'])
+    with pytest.raises(ValueError):
+        run_batch(str(tmp_path / 'in'), str(tmp_path / 'out'), print_log=False)
+    assert not os.path.exists(tmp_path / 'out')
+
+
+def test_run_batch_pages(tmp_path):
+    page = (read_image('data/tx.png') * 255).round().astype(np.uint8)
+    os.makedirs(tmp_path / 'in')
+    with tifffile.TiffWriter(str(tmp_path / 'in' / 'pages.tif')) as tiff:
+        tiff.write(page)
+        tiff.write(page[:, ::-1])
+    output_dir = str(tmp_path / 'out')
+    summary = run_batch(str(tmp_path / 'in'), output_dir, print_log=False)
+    assert summary['processed'] == 1
+    assert summary['strokes'] == sum(len(stroke_extraction(p)) for p in [page, page[:, ::-1]])
+    for name in ['pages_page1', 'pages_page2']:
+        for path in output_paths(os.path.join(output_dir, name)):
+            assert os.path.exists(path)
+    assert run_batch(str(tmp_path / 'in'), output_dir, print_log=False)['skipped'] == 1
+
+
+def test_run_batch_resume(tmp_path):
+    prepare_inputs(tmp_path / 'in', ['a.png', 'b.png'])
+    output_dir = str(tmp_path / 'out')
+    run_batch(str(tmp_path / 'in'), output_dir, print_log=False)
+
+    # Simulate an interrupted run: b.png has no record and a.png is newer than the results
+    checkpoint_path = os.path.join(output_dir, CHECKPOINT_NAME)
+    with open(checkpoint_path) as f:
+        lines = [line for line in f if 'b.png' not in line]
+    with open(checkpoint_path, 'w') as f:
+        f.writelines(lines)
+    os.utime(tmp_path / 'in' / 'a.png')
+    a_points, _ = output_paths(os.path.join(output_dir, 'a'))
+    os.utime(a_points, (0, 0))
+
+    summary = run_batch(str(tmp_path / 'in'), output_dir, print_log=False)
+    assert summary['processed'] == 2
+
+    summary = run_batch(str(tmp_path / 'in'), output_dir, print_log=False)
+    assert summary['processed'] == 0
+    assert summary['skipped'] == 2
+
+
+def test_run_batch_glyph_cache(tmp_path):
+    # The same image three times: components of the 2nd and 3rd one are in the cache
+    prepare_inputs(tmp_path / 'in', ['a.png', 'b.png', 'c.png'])
+    output_dir = str(tmp_path / 'out')
+    summary = run_batch(str(tmp_path / 'in'), output_dir, print_log=False, glyph_cache_size=16)
+    assert summary['processed'] == 3
+    assert summary['strokes'] == 12
+    assert summary['glyph_cache_hit_rate'] >= 2.0 / 3.0
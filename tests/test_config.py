@@ -0,0 +1,28 @@
+import pytest
+from dataclasses import replace, FrozenInstanceError
+
+from ..src.config import ExtractionConfig, DEFAULT_CONFIG, R_M, D_MIN
+
+
+def test_defaults():
+    assert DEFAULT_CONFIG.r_m == R_M
+    assert DEFAULT_CONFIG.d_min == D_MIN
+
+
+def test_immutable():
+    with pytest.raises(FrozenInstanceError):
+        DEFAULT_CONFIG.r_m = 1.0
+
+
+def test_hash():
+    config = replace(DEFAULT_CONFIG, q_min=0.1)
+    assert config == ExtractionConfig(q_min=0.1)
+    assert hash(config) == hash(ExtractionConfig(q_min=0.1))
+    assert hash(config) != hash(DEFAULT_CONFIG)
+    assert len({config: 1, ExtractionConfig(q_min=0.1): 2}) == 1
+
+
+def test_digest():
+    assert DEFAULT_CONFIG.digest() == ExtractionConfig().digest()
+    assert DEFAULT_CONFIG.digest() == '56000cf519249e77936b301b5d88ae4a1de5fc27'
+    assert DEFAULT_CONFIG.digest() != ExtractionConfig(rho=8.0).digest()
@@ -1,8 +1,11 @@
 import numpy as np
+from dataclasses import replace
+
 from ..src.extraction.connection_functions import connection_quality, connection_side, \
     get_connection_matrixes, copy_and_clean, create_strong_connections, find_alt_connections, \
-    create_connections
+    create_connections, candidate_pairs
 from ..src.extraction.disc import Disc
+from ..src.config import DEFAULT_CONFIG
 
 
 def create_disc(cx, cy, p1x, p1y, p2x, p2y):
@@ -137,3 +140,24 @@ def test_create_connections():
     assert len(alt_connections) == 1
     assert len(connections) == 3
     assert connections[0] == (3, 4)
+
+
+def test_candidate_pairs():
+    discs = create_discs_set()
+    assert list(candidate_pairs(discs)) == [(i, j) for i in range(5) for j in range(i + 1, 5)]
+    pairs = candidate_pairs(discs, max_neighbours=1)
+    assert (3, 4) in pairs
+    assert (2, 4) not in pairs
+    assert all(i < j for i, j in pairs)
+
+
+def test_single_precision():
+    discs = create_discs_set()
+    config = replace(DEFAULT_CONFIG, dtype='float32')
+    quality_matrix, side_matrix = get_connection_matrixes(discs, config)
+    expected_quality, expected_side = get_connection_matrixes(discs)
+    assert quality_matrix.dtype == np.float32
+    assert copy_and_clean(quality_matrix, config).dtype == np.float32
+    assert np.allclose(quality_matrix, expected_quality, atol=1e-6)
+    assert np.array_equal(side_matrix, expected_side)
+    assert create_connections(discs, config) == create_connections(discs)
@@ -1,6 +1,6 @@
 import numpy as np
-from ..src.extraction.disc import Disc, create_discs
-from ..src.common.numerical import vcos
+from ..src.extraction.disc import Disc, create_discs, select_discs, coarsen_discs
+from ..src.common.numerical import vcos, euc_dist
 
 
 def get_disc_1():
@@ -55,3 +55,34 @@ def test_create_discs():
     assert len(discs) == 3
     assert all(discs[0].centre == np.array([7, 3]))
     assert np.isclose(discs[0].radius, 2.0)
+
+
+def line_discs(length):
+    # Discs along a horizontal line, 2 pixels wide
+    return [Disc(np.array([0, x]), np.array([-1, x]), np.array([1, x])) for x in range(length)]
+
+
+def test_select_discs():
+    discs = line_discs(30)
+    selected = select_discs(discs, 1.5)
+    # The same as filtering the list after each selected disc
+    expected = []
+    remaining = discs
+    while remaining:
+        expected.append(remaining[0])
+        remaining = [d for d in remaining
+                     if euc_dist(d.centre, remaining[0].centre) > remaining[0].radius * 1.5]
+    assert selected == expected
+    assert len(selected) == 15
+
+
+def test_coarsen_discs():
+    discs = select_discs(line_discs(100), 0.95)
+    coarse = coarsen_discs(discs, 10)
+    assert 3 <= len(coarse) <= 10
+    scale = coarse[0].radius / discs[0].radius
+    assert scale > 1.0
+    # Neighbours are about the enlarged radius apart
+    gaps = np.diff(sorted(d.centre[1] for d in coarse))
+    assert np.all(gaps > 0.95 * coarse[0].radius)
+    assert np.all(discs[0].radius == 1.0)
@@ -0,0 +1,24 @@
+import numpy as np
+
+from ..src.draw import packed_coordinates, draw_raw, draw_approximated
+from ..src.extraction import stroke_extraction
+from ..src.files import read_image
+
+
+def test_packed_coordinates():
+    lines = [np.array([[0, 1], [2, 3]]), np.array([[4, 5]])]
+    packed = packed_coordinates(lines)
+    assert packed.shape == (4, 2)
+    assert np.all(np.isnan(packed[2]))
+    assert np.array_equal(packed[[0, 1, 3]], np.array([[0, 1], [2, 3], [4, 5]]))
+    assert packed_coordinates([]).shape == (0, 2)
+
+
+def test_draw_packed():
+    strokes = stroke_extraction(read_image('data/tx.png'))
+    assert len(draw_raw(strokes).data) == len(strokes)
+    for fig in [draw_raw(strokes, packed=True), draw_approximated(strokes, packed=True)]:
+        assert len(fig.data) == 1
+        assert fig.data[0].type == 'scattergl'
+        assert np.count_nonzero(np.isnan(np.asarray(fig.data[0].x, dtype=float))) \
+            == len(strokes) - 1
@@ -1,8 +1,16 @@
 import numpy as np
 import skimage.io as io
 import warnings
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
 
-from ..src.extraction import preprocessing, stroke_extraction
+from skimage.filters import threshold_otsu
+from skimage.morphology import dilation, erosion
+
+from ..src.extraction import (preprocessing, stroke_extraction, noise_reduction, component_filter,
+                              segmentation, crop_component, extract_component, STRUCT_ELEMENT)
+from ..src.extraction.stats import ExtractionStats
+from ..src.config import DEFAULT_CONFIG
 
 
 def test_preprocessing():
@@ -15,9 +23,115 @@ def test_preprocessing():
     assert foreground_num < 1000
 
 
+def test_noise_reduction():
+    random = np.random.default_rng(0)
+    for _ in range(50):
+        binary = random.random(random.integers(1, 20, size=2)) < random.random()
+        dilated = dilation(binary, STRUCT_ELEMENT)
+        assert np.array_equal(noise_reduction(binary, False), dilated)
+        assert np.array_equal(noise_reduction(binary, True), erosion(dilated, STRUCT_ELEMENT))
+
+
+def test_preprocessing_types():
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        input_image = io.imread('data/tx.png', as_gray=True)
+    binary = preprocessing(input_image)
+    assert binary.dtype == bool
+    assert not binary[0].any() and not binary[:, -1].any()
+    # Binary images are not thresholded again; 8-bit images are thresholded without
+    # conversion (the threshold is an integer, so a few pixels might differ)
+    assert np.array_equal(preprocessing(input_image >= threshold_otsu(input_image)), binary)
+    input_uint8 = np.round(input_image * 255).astype(np.uint8)
+    binary_uint8 = preprocessing(input_uint8)
+    assert np.array_equal(preprocessing(input_uint8 >= threshold_otsu(input_uint8)),
+                          binary_uint8)
+    assert np.count_nonzero(binary_uint8 != binary) < 10
+
+
 def test_extraction_stage():
     with warnings.catch_warnings():
         warnings.simplefilter("ignore")
         input_image = io.imread('data/tx.png', as_gray=True)
     strokes = stroke_extraction(input_image)
     assert len(strokes) == 4
+
+
+def test_extraction_concurrent_configs():
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        input_image = io.imread('data/tx.png', as_gray=True)
+    configs = [DEFAULT_CONFIG, replace(DEFAULT_CONFIG, max_angle=30.0)] * 4
+    expected = [[str(s) for s in stroke_extraction(input_image, c)] for c in configs]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(lambda c: stroke_extraction(input_image, c), configs))
+    assert [[str(s) for s in strokes] for strokes in results] == expected
+
+
+def test_component_filter():
+    bounding_boxes = [(slice(0, 2), slice(3, 5)), (slice(0, 1), slice(0, 3)),
+                      (slice(4, 9), slice(4, 9)), (slice(2, 3), slice(2, 4))]
+    selected, noise, small = component_filter(bounding_boxes, [4, 3, 9, 2])
+    assert selected.tolist() == [False, True, True, False]
+    assert (noise, small) == (2, 0)
+    selected, noise, small = component_filter(bounding_boxes, [4, 3, 9, 2], min_area=5)
+    assert selected.tolist() == [False, False, True, False]
+    assert (noise, small) == (2, 1)
+
+
+def test_extraction_noise():
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        input_image = io.imread('data/tx.png', as_gray=True)
+    # Small dark spots (far from each other) in the white margin on the right
+    noisy_image = np.hstack((input_image, np.ones((input_image.shape[0], 30))))
+    for row in range(2, 48, 6):
+        for col in range(80, 103, 6):
+            noisy_image[row:(row + 2), col:(col + 2)] = input_image.min()
+    # Skipping the noise does not change the result of processing all components
+    labeled, bounding_boxes = segmentation(preprocessing(noisy_image))
+    expected = []
+    for this_label, bounding_box in enumerate(bounding_boxes, start=1):
+        segment, offset = crop_component(labeled, this_label, bounding_box)
+        expected.extend(str(s) for s in extract_component(segment, offset))
+    stats = ExtractionStats()
+    strokes = stroke_extraction(noisy_image, stats=stats)
+    assert [str(s) for s in strokes] == expected
+    assert stats.skipped_noise == 32
+    assert stats.strokes == len(strokes)
+
+    stats = ExtractionStats()
+    strokes = stroke_extraction(noisy_image, replace(DEFAULT_CONFIG, min_area=1000), stats)
+    assert strokes == []
+    assert stats.skipped_noise + stats.skipped_small == stats.components
+
+
+def grid_image(size=120, spacing=50):
+    # A grid (like a table) is a single large component
+    input_image = np.ones((size, size))
+    for k in range(10, size, spacing):
+        input_image[k:(k + 4), 10:(size - 10)] = 0.0
+        input_image[10:(size - 10), k:(k + 4)] = 0.0
+    return input_image
+
+
+def test_extraction_budget():
+    input_image = grid_image()
+    for config in [replace(DEFAULT_CONFIG, max_discs=40),
+                   replace(DEFAULT_CONFIG, max_neighbours=4),
+                   replace(DEFAULT_CONFIG, time_budget=1e-6)]:
+        stats = ExtractionStats()
+        strokes = stroke_extraction(input_image, config, stats)
+        assert len(strokes) > 0
+        assert all(stroke.degraded for stroke in strokes)
+        assert stats.degraded == 1
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        input_image = io.imread('data/tx.png', as_gray=True)
+    expected = [str(s) for s in stroke_extraction(input_image)]
+    stats = ExtractionStats()
+    strokes = stroke_extraction(input_image, replace(DEFAULT_CONFIG, max_discs=1000), stats)
+    assert [str(s) for s in strokes] == expected
+    assert not any(stroke.degraded for stroke in strokes)
+    assert stats.degraded == 0
@@ -0,0 +1,87 @@
+from dataclasses import replace
+
+import numpy as np
+
+from ..src.extraction import stroke_extraction
+from ..src.extraction.glyph_cache import GlyphCache, glyph_key, shared_glyph_cache
+from ..src.extraction.stats import ExtractionStats
+from ..src.extraction.stroke import Stroke
+from ..src.config import DEFAULT_CONFIG
+
+
+def glyph(input_image, row, col):
+    """Draw a small 'T' with its top-left corner at the given position"""
+    input_image[row:(row + 3), col:(col + 20)] = 0.0
+    input_image[row:(row + 20), (col + 9):(col + 12)] = 0.0
+
+
+def repeated_glyphs_image():
+    input_image = np.ones((100, 130))
+    for row in [5, 55]:
+        for col in [5, 45, 85]:
+            glyph(input_image, row, col)
+    return input_image
+
+
+def test_glyph_key():
+    segment = np.zeros((5, 6), dtype=bool)
+    segment[1:4, 2] = True
+    other = segment.copy()
+    other[2, 3] = True
+    assert glyph_key(segment, DEFAULT_CONFIG) == glyph_key(segment.copy(), DEFAULT_CONFIG)
+    assert glyph_key(segment, DEFAULT_CONFIG) != glyph_key(other, DEFAULT_CONFIG)
+    assert glyph_key(segment, DEFAULT_CONFIG) != glyph_key(segment.T, DEFAULT_CONFIG)
+    assert glyph_key(segment, DEFAULT_CONFIG) != glyph_key(segment, DEFAULT_CONFIG, 10)
+    assert glyph_key(segment, DEFAULT_CONFIG) != \
+        glyph_key(segment, replace(DEFAULT_CONFIG, rho=8.0))
+
+
+def test_translated():
+    stroke = Stroke(np.array([[1, 1], [2, 3], [4, 4], [6, 5]]))
+    moved = stroke.translated(np.array([10, 20]))
+    assert moved.points.dtype == stroke.points.dtype
+    assert np.array_equal(moved.points, stroke.points + [10, 20])
+    expected = Stroke(moved.points)
+    assert np.allclose(moved.vector_of_features(), expected.vector_of_features())
+    assert np.allclose(moved.appr_errors, expected.appr_errors)
+    assert moved.length == stroke.length
+    # The original stroke is not changed
+    assert stroke.poly_x[-1] == Stroke(stroke.points).poly_x[-1]
+
+
+def test_repeated_glyphs():
+    input_image = repeated_glyphs_image()
+    expected = stroke_extraction(input_image)
+    cache = GlyphCache()
+    stats = ExtractionStats()
+    strokes = stroke_extraction(input_image, stats=stats, glyph_cache=cache)
+    assert [str(s) for s in strokes] == [str(s) for s in expected]
+    for stroke, expected_stroke in zip(strokes, expected):
+        assert np.allclose(stroke.vector_of_features(), expected_stroke.vector_of_features())
+    assert len(cache) == 1
+    assert cache.hits == stats.cached == 5
+    assert cache.misses == 1
+
+    # The cache is shared between images
+    stroke_extraction(input_image[50:, :], glyph_cache=cache)
+    assert cache.hits == 8
+    assert np.isclose(cache.hit_rate, 8 / 9)
+
+
+def test_eviction():
+    cache = GlyphCache(max_size=2)
+    stroke = Stroke(np.array([[1, 1], [2, 3], [4, 4]]))
+    for key in ['a', 'b']:
+        cache.put(key, [stroke], np.zeros(2, dtype=int))
+    assert cache.get('a', np.zeros(2, dtype=int)) is not None
+    cache.put('c', [stroke], np.zeros(2, dtype=int))
+    # 'b' is the least recently used one
+    assert cache.get('b', np.zeros(2, dtype=int)) is None
+    assert str(cache.get('a', np.array([1, 1]))[0]) == '(2, 2)->(3, 4)->(5, 5)'
+    assert cache.as_dict() == {'size': 2, 'hits': 2, 'misses': 1, 'evictions': 1,
+                               'hit_rate': 2 / 3}
+
+    assert shared_glyph_cache(2) is shared_glyph_cache(2)
+    empty = GlyphCache(max_size=0)
+    empty.put('a', [stroke], np.zeros(2, dtype=int))
+    assert len(empty) == 0
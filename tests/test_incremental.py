@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+from dataclasses import replace
+
+from ..src.extraction import stroke_extraction, binarization
+from ..src.extraction.incremental import IncrementalExtraction
+from ..src.config import DEFAULT_CONFIG
+from ..src.files import read_image
+
+
+def full_extraction(extraction):
+    # The full extraction with the same threshold
+    return [str(s) for s in stroke_extraction(~binarization(extraction.image,
+                                                            extraction.threshold))]
+
+
+def test_initial_extraction():
+    input_image = read_image('data/tx.png')
+    extraction = IncrementalExtraction(input_image)
+    assert [str(s) for s in extraction.strokes()] == \
+        [str(s) for s in stroke_extraction(input_image)]
+    with pytest.raises(ValueError):
+        IncrementalExtraction(input_image, replace(DEFAULT_CONFIG, target_width=3.0))
+
+
+def test_update():
+    input_image = read_image('data/tx.png')
+    extraction = IncrementalExtraction(input_image)
+
+    # Nothing changes outside strokes and far from them
+    assert extraction.update((slice(0, 2), slice(0, 2)), 1.0) == 0
+
+    # Erase a part of a stroke, draw a new one, and join two strokes
+    for region, value in [((slice(20, 26), slice(8, 18)), 1.0),
+                          ((slice(40, 44), slice(35, 70)), 0.0),
+                          ((slice(20, 23), slice(28, 46)), 0.0)]:
+        assert extraction.update(region, value) > 0
+        assert [str(s) for s in extraction.strokes()] == full_extraction(extraction)
+    assert input_image[41, 40] > 0.5
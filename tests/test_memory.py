@@ -0,0 +1,83 @@
+from dataclasses import replace
+
+import numpy as np
+
+from ..src.extraction import stroke_extraction
+from ..src.extraction.memory import (MemoryStats, estimate_component_memory, discs_within_budget,
+                                     budget_max_discs)
+from ..src.extraction.partition import MAX_PART_DISCS
+from ..src.extraction.stats import ExtractionStats
+from ..src.config import DEFAULT_CONFIG
+from .test_extraction import grid_image
+
+
+def test_estimate():
+    assert estimate_component_memory(0) == 0
+    assert estimate_component_memory(200) == 4 * estimate_component_memory(100)
+    assert estimate_component_memory(100) == 17 * 100 * 100
+    # Partitioned components grow linearly
+    large = estimate_component_memory(2 * MAX_PART_DISCS)
+    assert estimate_component_memory(4 * MAX_PART_DISCS) == 2 * large
+
+    for budget in [1, 10 ** 5, 10 ** 6, 10 ** 7, 10 ** 9]:
+        n = discs_within_budget(budget)
+        assert n >= 1
+        assert n == 1 or estimate_component_memory(n) <= budget
+        assert estimate_component_memory(n + 1) > budget or n == MAX_PART_DISCS
+
+    # Matrices of single precision take less memory
+    assert estimate_component_memory(100, 'float32') < estimate_component_memory(100)
+    assert discs_within_budget(10 ** 6, 'float32') >= discs_within_budget(10 ** 6)
+
+    assert budget_max_discs(100, 0, DEFAULT_CONFIG) == 0
+    assert budget_max_discs(100, 40, replace(DEFAULT_CONFIG, memory_budget=10 ** 9)) == 40
+    config = replace(DEFAULT_CONFIG, memory_budget=10 ** 5)
+    assert budget_max_discs(100, 0, config) == discs_within_budget(10 ** 5)
+    assert budget_max_discs(100, 20, config) == 20
+
+
+def test_stages():
+    memory = MemoryStats()
+    with memory.stage('outer') as outer:
+        with memory.stage('inner') as inner:
+            array = np.ones(10 ** 6)
+        del array
+    assert inner['peak'] >= 8 * 10 ** 6
+    assert inner['retained'] >= 8 * 10 ** 6
+    assert outer['peak'] >= inner['peak']
+    assert outer['retained'] < 10 ** 6
+    assert memory.stages['inner']['calls'] == 1
+
+
+def test_extraction_memory():
+    input_image = grid_image()
+    expected = [str(s) for s in stroke_extraction(input_image)]
+    memory = MemoryStats()
+    strokes = stroke_extraction(input_image, memory=memory)
+    assert [str(s) for s in strokes] == expected
+    for stage in ['preprocessing', 'segmentation', 'pixels', 'discs', 'connections',
+                  'strokes', 'component']:
+        assert memory.stages[stage]['calls'] >= 1
+    assert len(memory.components) == 1
+    component = memory.components[0]
+    assert component['predicted'] == estimate_component_memory(component['discs'])
+    # The prediction is close to the measured peak of the matrices
+    assert 0.8 * component['predicted'] <= memory.stages['connections']['peak'] \
+        <= 1.5 * component['predicted']
+    assert not component['exceeds_budget']
+    assert component['peak'] > 0
+    assert 'connections' in memory.report()
+
+
+def test_memory_budget():
+    input_image = grid_image()
+    memory = MemoryStats()
+    stats = ExtractionStats()
+    budget = 10 ** 5
+    strokes = stroke_extraction(input_image, replace(DEFAULT_CONFIG, memory_budget=budget),
+                                stats, memory=memory)
+    assert len(strokes) > 0
+    assert all(stroke.degraded for stroke in strokes)
+    assert stats.degraded == 1
+    assert memory.components[0]['exceeds_budget']
+    assert memory.components[0]['discs'] > discs_within_budget(budget)
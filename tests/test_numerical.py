@@ -61,3 +61,13 @@ def test_pseudo_gaussian_diff():
     var3 = pseudo_gaussian(2.5, 5, 5)
     assert var2 > var1
     assert var3 > var1
+
+
+def test_dtype():
+    v1, v2 = np.array([5, 5]), np.array([8, 9])
+    assert euc_dist(v1, v2).dtype == np.float64
+    assert euc_dist(v1, v2, 'float32').dtype == np.float32
+    assert np.isclose(euc_dist(v1, v2, 'float32'), 5.0)
+    assert vlen(v1, 'float32').dtype == np.float32
+    assert vcos(v1, v2, 'float32').dtype == np.float32
+    assert pcos(v1, v2, np.array([11, 13]), 'float32').dtype == np.float32
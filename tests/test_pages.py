@@ -0,0 +1,109 @@
+import io
+
+import numpy as np
+import pytest
+import tifffile
+
+from ..src.extraction import stroke_extraction
+from ..src.files import read_image
+from ..src.pages import to_grey, iter_pages, extract_pages, page_prefix, count_pages
+
+
+def example_page():
+    return (read_image('data/tx.png') * 255).round().astype(np.uint8)
+
+
+def test_to_grey():
+    page = example_page()
+    assert to_grey(page) is page
+    rgb = np.stack([page] * 3, axis=2)
+    assert np.array_equal(to_grey(rgb), page)
+    transparent = np.zeros((2, 2, 4), dtype=np.uint8)
+    assert np.all(to_grey(transparent) == 255)
+    assert to_grey(rgb.astype(np.uint16)).dtype == np.uint16
+
+
+def test_read_image_keep_type():
+    page = read_image('data/tx.png', keep_type=True)
+    assert page.dtype == np.uint8
+    assert np.abs(page - example_page().astype(int)).max() <= 1
+
+
+def test_read_image_many_pages(tmp_path):
+    page = example_page()
+    path = str(tmp_path / 'pages.tif')
+    with tifffile.TiffWriter(path) as tiff:
+        tiff.write(page)
+        tiff.write(page)
+    with pytest.raises(ValueError):
+        read_image(path)
+    with open(path, 'rb') as f:
+        with pytest.raises(ValueError):
+            read_image(io.BytesIO(f.read()))
+
+    tifffile.imwrite(path, page)
+    assert np.array_equal(read_image(path, keep_type=True), page)
+    with open(path, 'rb') as f:
+        assert np.array_equal(read_image(io.BytesIO(f.read()), keep_type=True), page)
+
+
+def test_iter_pages(tmp_path):
+    page = example_page()
+    for name, options in [('plain.tif', {}),
+                          ('strips.tif', {'compression': 'zlib', 'rowsperstrip': 7}),
+                          ('tiles.tif', {'compression': 'zlib', 'tile': (16, 16)})]:
+        path = str(tmp_path / name)
+        with tifffile.TiffWriter(path) as tiff:
+            tiff.write(page, **options)
+            tiff.write(255 - page, **options)
+
+        assert count_pages(path) == 2
+        for index, reader in enumerate(iter_pages(path)):
+            expected = 255 - page if index else page
+            assert reader.dtype == np.uint8
+            assert np.array_equal(np.asarray(reader), expected)
+            assert np.array_equal(reader[5:30, 3:41], expected[5:30, 3:41])
+            assert np.array_equal(reader[:, -3:], expected[:, -3:])
+
+
+def test_iter_pages_planar(tmp_path):
+    page = example_page()
+    rgb = np.stack([page, 255 - page, page // 2], axis=2)
+    expected = to_grey(rgb)
+    for name, options in [('plain.tif', {}),
+                          ('strips.tif', {'compression': 'zlib', 'rowsperstrip': 7}),
+                          ('tiles.tif', {'compression': 'zlib', 'tile': (16, 16)})]:
+        path = str(tmp_path / name)
+        with tifffile.TiffWriter(path) as tiff:
+            tiff.write(np.moveaxis(rgb, 2, 0), photometric='rgb', planarconfig='separate',
+                       **options)
+
+        for reader in iter_pages(path):
+            assert reader.page.planarconfig == 2
+            assert reader.shape == page.shape
+            assert np.array_equal(reader[5:30, 3:41], expected[5:30, 3:41])
+            if 'rowsperstrip' in options:
+                # Only five strips of each plane cover the region
+                assert len(reader._cache) == 3 * 5
+            assert np.array_equal(np.asarray(reader), expected)
+            assert np.array_equal(reader[:, -3:], expected[:, -3:])
+
+
+def test_extract_pages(tmp_path):
+    page = example_page()
+    path = str(tmp_path / 'pages.tif')
+    with tifffile.TiffWriter(path) as tiff:
+        tiff.write(page, compression='zlib', rowsperstrip=5)
+        tiff.write(page[:, ::-1])
+
+    expected = [[str(s) for s in stroke_extraction(page)],
+                [str(s) for s in stroke_extraction(page[:, ::-1].copy())]]
+    for max_untiled_pixels in [page.size, 100]:
+        results = list(extract_pages(path, max_untiled_pixels=max_untiled_pixels, tile_size=24))
+        assert [index for index, _ in results] == [0, 1]
+        assert [[str(s) for s in strokes] for _, strokes in results] == expected
+
+
+def test_page_prefix():
+    assert page_prefix('data/tx', 0, 1) == 'data/tx'
+    assert page_prefix('data/tx', 1, 3) == 'data/tx_page2'
@@ -0,0 +1,57 @@
+import numpy as np
+from dataclasses import replace
+
+from ..src.extraction import preprocessing, segmentation, crop_component, component_discs
+from ..src.extraction.connection_functions import create_connections, connection_quality
+from ..src.extraction.partition import (split_discs, connection_reach, partitioned_connections)
+from ..src.config import DEFAULT_CONFIG
+from ..src.files import read_image
+from .test_extraction import grid_image
+
+
+def grid_discs():
+    labeled, bounding_boxes = segmentation(preprocessing(grid_image(100, 40)))
+    segment, offset = crop_component(labeled, 1, bounding_boxes[0])
+    discs, _ = component_discs(segment, offset)
+    return discs
+
+
+def test_split_discs():
+    centres = np.random.default_rng(0).integers(0, 50, size=(200, 2)).astype(float)
+    parts = split_discs(centres, 30)
+    counts = [np.count_nonzero(np.all((centres >= lower) & (centres < upper), axis=1))
+              for lower, upper in parts]
+    assert sum(counts) == len(centres)
+    assert max(counts) <= 30
+    # Centres that cannot be separated stay together
+    assert len(split_discs(np.zeros((10, 2)), 3)) == 1
+
+
+def test_connection_reach():
+    discs = grid_discs()
+    reach = connection_reach(discs)
+    for disc1 in discs:
+        for disc2 in discs:
+            if np.sqrt(((disc1.centre - disc2.centre) ** 2).sum()) > reach:
+                assert min(connection_quality(disc1, disc2),
+                           connection_quality(disc2, disc1)) < DEFAULT_CONFIG.q_min
+
+
+def test_partitioned_connections():
+    discs = grid_discs()
+    for config in [DEFAULT_CONFIG, replace(DEFAULT_CONFIG, max_neighbours=4)]:
+        connections, alt_connections = create_connections(discs, config)
+        for max_part_discs in [5, 20, len(discs)]:
+            part_connections, part_alt_connections = partitioned_connections(
+                discs, config, max_part_discs)
+            assert part_connections == [(int(i), int(j)) for i, j in connections]
+            assert part_alt_connections == alt_connections
+
+
+def test_partitioned_components():
+    labeled, bounding_boxes = segmentation(preprocessing(read_image('data/tx.png')))
+    for label in range(1, len(bounding_boxes) + 1):
+        segment, offset = crop_component(labeled, label, bounding_boxes[label - 1])
+        discs, _ = component_discs(segment, offset)
+        expected = create_connections(discs)
+        assert partitioned_connections(discs, max_part_discs=4) == expected
@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+import skimage.io as io
+import warnings
+from dataclasses import replace
+
+from ..src.extraction import stroke_extraction
+from ..src.extraction.pipeline import ExtractionPipeline
+from ..src.config import DEFAULT_CONFIG
+from .test_extraction import grid_image
+
+
+def read_example_image():
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return io.imread('data/tx.png', as_gray=True)
+
+
+def test_strokes_as_stroke_extraction():
+    input_image = read_example_image()
+    pipeline = ExtractionPipeline(input_image)
+    strokes = pipeline.strokes()
+    expected = stroke_extraction(input_image)
+    assert [str(s) for s in strokes] == [str(s) for s in expected]
+
+
+def test_reuse_of_stages():
+    pipeline = ExtractionPipeline(read_example_image())
+    pipeline.strokes()
+    discs = pipeline.discs()
+    matrices = pipeline.matrices()
+    pipeline.strokes(replace(DEFAULT_CONFIG, q_min=0.2, epsilon=0.05))
+    assert pipeline.discs() is discs
+    assert pipeline.matrices() is matrices
+    assert len(pipeline._discs) == 1
+    assert len(pipeline._matrices) == 1
+    assert len(pipeline._chains) == 2
+
+
+def test_sweep():
+    pipeline = ExtractionPipeline(read_example_image())
+    configs = [
+        DEFAULT_CONFIG,
+        replace(DEFAULT_CONFIG, d_min=0.0),
+        replace(DEFAULT_CONFIG, r_m=1.5)
+    ]
+    results = pipeline.sweep(configs)
+    assert len(results) == 3
+    assert len(results[0]) == 4
+    assert len(pipeline._discs) == 2
+
+
+def test_dtype_of_stages():
+    pipeline = ExtractionPipeline(read_example_image())
+    pipeline.strokes()
+    config = replace(DEFAULT_CONFIG, dtype='float32')
+    matrices = pipeline.matrices(config)
+    assert all(quality_matrix.dtype == np.float32 for quality_matrix, _ in matrices)
+    assert all(disc.radius.dtype == np.float32 for discs in pipeline.discs(config)
+               for disc in discs)
+    assert pipeline.matrices()[0][0].dtype == np.float64
+    assert len(pipeline._discs) == 2
+    expected = ExtractionPipeline(read_example_image()).strokes(config)
+    assert [str(s) for s in pipeline.strokes(config)] == [str(s) for s in expected]
+
+
+def test_budget_as_stroke_extraction():
+    pipeline = ExtractionPipeline(read_example_image())
+    pipeline.strokes()
+    for config in [replace(DEFAULT_CONFIG, max_discs=5),
+                   replace(DEFAULT_CONFIG, max_neighbours=2),
+                   replace(DEFAULT_CONFIG, memory_budget=1000)]:
+        strokes = pipeline.strokes(config)
+        expected = stroke_extraction(read_example_image(), config)
+        assert [str(s) for s in strokes] == [str(s) for s in expected]
+        assert [s.degraded for s in strokes] == [s.degraded for s in expected]
+        assert any(s.degraded for s in strokes)
+    assert not any(s.degraded for s in pipeline.strokes())
+
+
+def test_partitioned_components():
+    input_image = grid_image()
+    expected = ExtractionPipeline(input_image).strokes()
+    pipeline = ExtractionPipeline(input_image, max_part_discs=50)
+    strokes = pipeline.strokes()
+    assert [str(s) for s in strokes] == [str(s) for s in expected]
+    # The large component has no matrices
+    assert len(pipeline.discs()[0]) > 50
+    assert pipeline.matrices() == [None]
+
+
+def test_rescaling_not_supported():
+    pipeline = ExtractionPipeline(read_example_image())
+    config = replace(DEFAULT_CONFIG, target_width=1.0)
+    for stage in [pipeline.strokes, pipeline.discs, pipeline.matrices, pipeline.chains]:
+        with pytest.raises(ValueError):
+            stage(config)
@@ -0,0 +1,50 @@
+from ..src.extraction import stroke_extraction
+from ..src.extraction.replay import load_component, replay_component
+from ..src.batch import dump_name_for
+from ..src.config import DEFAULT_CONFIG
+from .test_extraction import grid_image
+
+
+def test_replay(tmp_path):
+    strokes = stroke_extraction(grid_image(70, 40), dump_dir=str(tmp_path), dump_threshold=0.0)
+    paths = sorted(tmp_path.glob('*.npz'))
+    assert len(paths) == 1
+
+    component = load_component(str(paths[0]))
+    assert component['segment'].dtype == bool
+    assert component['config'] == DEFAULT_CONFIG
+    assert len(component['discs']) > 0
+    assert component['elapsed'] >= 0.0
+
+    result = replay_component(str(paths[0]), profile=True)
+    assert [str(s) for s in result['strokes']] == [str(s) for s in strokes]
+    assert result['discs'] == len(component['discs'])
+    assert result['same_discs']
+    assert list(result['stages']) == ['pixels', 'discs', 'matrices', 'connections', 'chains',
+                                      'strokes']
+    assert result['profiler'] is not None
+
+
+def test_dump_names(tmp_path):
+    for name in ['a.png', 'b.png']:
+        stroke_extraction(grid_image(70, 40), dump_dir=str(tmp_path), dump_threshold=0.0,
+                          dump_name=name)
+    paths = sorted(path.name for path in tmp_path.glob('*.npz'))
+    assert len(paths) == 2
+    assert paths[0].startswith('a.png_') and paths[1].startswith('b.png_')
+    assert dump_name_for('images/a b.png') == 'images_a_b.png'
+
+
+def test_no_dump_below_threshold(tmp_path):
+    stroke_extraction(grid_image(70, 40), dump_dir=str(tmp_path))
+    assert list(tmp_path.glob('*.npz')) == []
+
+
+def test_replay_memory(tmp_path):
+    from ..src.extraction.memory import MemoryStats
+
+    stroke_extraction(grid_image(70, 40), dump_dir=str(tmp_path), dump_threshold=0.0)
+    memory = MemoryStats()
+    result = replay_component(str(sorted(tmp_path.glob('*.npz'))[0]), memory=memory)
+    assert list(memory.stages) == list(result['stages'])
+    assert all(stage['calls'] == 1 for stage in memory.stages.values())
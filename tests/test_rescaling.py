@@ -0,0 +1,36 @@
+import numpy as np
+
+from ..src.config import ExtractionConfig
+from ..src.extraction import stroke_extraction
+from ..src.extraction.rescaling import downscale_to_width
+
+
+def example_image():
+    image = np.ones((200, 300))
+    image[90:110, 20:280] = 0.0
+    return image
+
+
+def test_downscale_to_width():
+    image = example_image()
+    downscaled, factors = downscale_to_width(image, 4.0)
+    # The stroke is 20 pixels wide (a bit more according to the estimate)
+    assert np.allclose(factors, np.array(image.shape) / downscaled.shape)
+    assert np.all((factors > 5.0) & (factors < 6.0))
+    # Thin strokes are not rescaled
+    same, factors = downscale_to_width(image, 40.0)
+    assert same is image
+    assert factors is None
+
+
+def test_rescaled_extraction():
+    image = example_image()
+    reference = stroke_extraction(image)
+    strokes = stroke_extraction(image, ExtractionConfig(target_width=4.0))
+    assert len(strokes) == len(reference) == 1
+    rows = np.array([point[0] for point in strokes[0].points])
+    cols = np.array([point[1] for point in strokes[0].points])
+    # Coordinates of the original image (with the margin)
+    assert np.all(np.abs(rows - 100.5) < 6.0)
+    assert cols.min() < 40 and cols.max() > 260
+    assert np.isclose(np.polyval(strokes[0].poly_x, 0.5), rows.mean(), atol=1.0)
@@ -0,0 +1,40 @@
+import numpy as np
+
+from ..src.extraction import stroke_extraction
+from ..src.extraction.sampling import evaluate_strokes, uniform_basis, polynomial_basis
+from ..src.files import read_image
+
+
+def test_evaluate_strokes():
+    strokes = stroke_extraction(read_image('data/tx.png'))
+    tt = np.linspace(0, 1, num=5)
+    for derivative in range(3):
+        points = evaluate_strokes(strokes, 5, derivative)
+        assert points.shape == (len(strokes), 5, 2)
+        for stroke, stroke_points in zip(strokes, points):
+            assert np.allclose(stroke_points[:, 0],
+                               np.polyval(np.polyder(stroke.poly_x, derivative), tt))
+            assert np.allclose(stroke_points[:, 1],
+                               np.polyval(np.polyder(stroke.poly_y, derivative), tt))
+
+    features = np.array([stroke.vector_of_features() for stroke in strokes])
+    assert np.array_equal(evaluate_strokes(features, 5), evaluate_strokes(strokes, 5))
+    assert evaluate_strokes([], 5).shape == (0, 5, 2)
+
+
+def test_uniform_basis():
+    assert uniform_basis(9) is uniform_basis(9)
+    assert np.array_equal(uniform_basis(9, 1), polynomial_basis(np.linspace(0, 1, 9), 1))
+
+
+def test_arc_length():
+    # A straight line x = y = t^3: points evenly spaced in t are not evenly spaced in length
+    features = np.array([[1.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0],
+                         [0.0, 0.0, 0.0, 5.0, 0.0, 0.0, 0.0, 5.0]])
+    points = evaluate_strokes(features, 11, arc_length=True)
+    assert np.allclose(points[0, :, 0], np.linspace(0, 1, 11), atol=1e-3)
+    assert np.allclose(points[0, :, 0], points[0, :, 1])
+    # A stroke of length 0
+    assert np.allclose(points[1], 5.0)
+    derivatives = evaluate_strokes(features, 11, derivative=1, arc_length=True)
+    assert np.allclose(derivatives[0, :, 0], 3 * np.cbrt(np.linspace(0, 1, 11)) ** 2, atol=1e-2)
@@ -0,0 +1,67 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from ..src.server import ExtractionServer
+from ..src.client import extract_remote, get_json
+from ..src.files import read_image
+
+
+@pytest.fixture(scope='module')
+def server_url():
+    server = ExtractionServer(port=0, workers=2, use_threads=True, batch_window=0.05)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+    server.server_close()
+
+
+def read_example_bytes():
+    with open('data/tx.png', 'rb') as f:
+        return f.read()
+
+
+def test_health(server_url):
+    assert get_json(server_url, '/health') == {'status': 'ok'}
+
+
+def test_extract_encoded_image(server_url):
+    points, polynomials = extract_remote(read_example_bytes(), server_url)
+    assert len(points) == 4
+    assert polynomials.shape == (4, 8)
+
+
+def test_extract_array_binary(server_url):
+    image = read_image('data/tx.png')
+    points, polynomials = extract_remote(image, server_url, binary=True)
+    json_points, json_polynomials = extract_remote(image, server_url)
+    assert len(points) == 4
+    assert all(np.array_equal(p1, p2) for p1, p2 in zip(points, json_points))
+    assert np.allclose(polynomials, json_polynomials)
+
+
+def test_extract_with_parameters(server_url):
+    points, _ = extract_remote(read_example_bytes(), server_url, d_min=0.0)
+    assert len(points) >= 4
+
+
+def test_concurrent_requests_and_metrics(server_url):
+    before = get_json(server_url, '/metrics')
+    image = read_example_bytes()
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        results = list(executor.map(lambda _: extract_remote(image, server_url), range(6)))
+    assert all(len(points) == 4 for points, _ in results)
+
+    metrics = get_json(server_url, '/metrics')
+    assert metrics['requests'] - before['requests'] == 6
+    assert metrics['batches'] - before['batches'] < 6
+    assert metrics['latency']['max'] > 0.0
+
+
+def test_bad_request(server_url):
+    with pytest.raises(Exception):
+        extract_remote(b'not an image', server_url)
+    assert get_json(server_url, '/metrics')['errors'] >= 1
@@ -0,0 +1,81 @@
+import json
+import os
+import shutil
+import time
+from multiprocessing import Process
+
+from ..src.sharding import create_queue, claim_task, release_expired, run_worker, \
+    merge_shards, queue_status, queue_paths
+
+
+def prepare_queue(tmp_path, number_of_images):
+    input_dir = tmp_path / 'in'
+    os.makedirs(input_dir)
+    for i in range(number_of_images):
+        shutil.copy('data/tx.png', input_dir / f'{i}.png')
+    queue_dir = str(tmp_path / 'queue')
+    create_queue(queue_dir, str(input_dir))
+    return queue_dir
+
+
+def read_index(queue_dir):
+    with open(os.path.join(queue_dir, 'index.jsonl')) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_create_queue(tmp_path):
+    queue_dir = prepare_queue(tmp_path, 3)
+    assert queue_status(queue_dir) == {'todo': 3, 'claimed': 0, 'done': 0}
+
+
+def test_claim_task(tmp_path):
+    queue_dir = prepare_queue(tmp_path, 2)
+    first = claim_task(queue_dir, 'w1')
+    second = claim_task(queue_dir, 'w2')
+    assert first != second
+    assert claim_task(queue_dir, 'w3') is None
+    assert queue_status(queue_dir)['claimed'] == 2
+
+
+def test_release_expired(tmp_path):
+    queue_dir = prepare_queue(tmp_path, 2)
+    claimed_path = claim_task(queue_dir, 'dead')
+    assert release_expired(queue_dir, lease_time=60.0) == 0
+    os.utime(claimed_path, (time.time() - 120.0, time.time() - 120.0))
+    assert release_expired(queue_dir, lease_time=60.0) == 1
+    assert queue_status(queue_dir)['todo'] == 2
+
+
+def test_workers_and_merge(tmp_path):
+    queue_dir = prepare_queue(tmp_path, 6)
+
+    # A task claimed by a worker that died long ago
+    claimed_path = claim_task(queue_dir, 'dead')
+    os.utime(claimed_path, (time.time() - 120.0, time.time() - 120.0))
+
+    workers = [
+        Process(target=run_worker, args=(queue_dir, f'worker{i}', 60.0, 0.1))
+        for i in range(3)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=120)
+        assert worker.exitcode == 0
+
+    assert queue_status(queue_dir) == {'todo': 0, 'claimed': 0, 'done': 6}
+    assert len(os.listdir(queue_paths(queue_dir)['shards'])) > 0
+    assert merge_shards(queue_dir) == 6
+    index = read_index(queue_dir)
+    assert [record['name'] for record in index] == [f'{i}.png' for i in range(6)]
+    assert all(len(record['points']) == 4 for record in index)
+
+
+def test_merge_duplicates(tmp_path):
+    queue_dir = prepare_queue(tmp_path, 2)
+    run_worker(queue_dir, 'w1')
+    shards_dir = queue_paths(queue_dir)['shards']
+    shutil.copy(os.path.join(shards_dir, 'w1.jsonl'), os.path.join(shards_dir, 'w2.jsonl'))
+    with open(os.path.join(shards_dir, 'w2.jsonl'), 'a') as f:
+        f.write('{"task": "0000')
+    assert merge_shards(queue_dir) == 2
@@ -0,0 +1,79 @@
+import json
+
+import numpy as np
+import pytest
+
+from ..src.similarity import FeatureIndex, normalize_features
+
+
+def random_features(random, number):
+    return random.normal(size=(number, 8)) * np.array([1, 2, 5, 100, 1, 2, 5, 100])
+
+
+def test_normalize_features():
+    features = np.arange(16.0).reshape(2, 8)
+    assert np.array_equal(normalize_features(features), features[:, [0, 1, 2, 4, 5, 6]])
+
+
+def test_search():
+    random = np.random.default_rng(0)
+    index = FeatureIndex(n_lists=10)
+    features = [random_features(random, 200) for _ in range(3)]
+    for number, image_features in enumerate(features):
+        index.add(image_features, f'image{number}')
+    with pytest.raises(ValueError):
+        index.search(features[0][:1])
+    index.build()
+    assert len(index) == 600
+
+    all_vectors = normalize_features(np.concatenate(features))
+    queries = random_features(random, 20)
+    expected = np.sqrt(((normalize_features(queries)[:, None, :] - all_vectors[None, :, :]) ** 2)
+                       .sum(axis=2))
+    # Searching all clusters is exact
+    distances, stroke_ids, image_ids = index.search(queries, k=5, n_probe=10)
+    assert np.allclose(distances, np.sort(expected, axis=1)[:, :5], atol=1e-4)
+    found = 200 * image_ids + stroke_ids
+    assert np.allclose(expected[np.arange(20)[:, None], found], distances, atol=1e-4)
+
+    # The same stroke is found with the distance 0, regardless of its position
+    moved = features[1][17].copy()
+    moved[[3, 7]] += 1000.0
+    distances, stroke_ids, image_ids = index.search(moved[None, :], k=1, n_probe=1)
+    assert distances[0, 0] < 1e-4
+    assert (index.images[image_ids[0, 0]], stroke_ids[0, 0]) == ('image1', 17)
+
+
+def test_add_after_build():
+    random = np.random.default_rng(1)
+    index = FeatureIndex(n_lists=4)
+    index.add(random_features(random, 50), 'a')
+    index.build()
+    new_features = random_features(random, 5)
+    index.add(new_features, 'b', stroke_ids=[10, 11, 12, 13, 14])
+    distances, stroke_ids, image_ids = index.search(new_features, k=1, n_probe=4)
+    assert np.allclose(distances[:, 0], 0.0, atol=1e-4)
+    assert stroke_ids[:, 0].tolist() == [10, 11, 12, 13, 14]
+    assert [index.images[code] for code in image_ids[:, 0]] == ['b'] * 5
+
+
+def test_save_and_load(tmp_path):
+    random = np.random.default_rng(2)
+    records = [{'name': f'page{n}.png', 'polynomials': random_features(random, 30).tolist()}
+               for n in range(4)] + [{'name': 'failed.png', 'error': 'Error()'}]
+    index_path = tmp_path / 'index.jsonl'
+    index_path.write_text(''.join(json.dumps(record) + '\n' for record in records))
+
+    index = FeatureIndex()
+    assert index.add_records(str(index_path)) == 120
+    index.save(str(tmp_path / 'features'))
+    loaded = FeatureIndex.load(str(tmp_path / 'features'))
+    assert isinstance(loaded.vectors, np.memmap)
+    assert loaded.images == index.images
+
+    queries = random_features(random, 10)
+    for expected, result in zip(index.search(queries, k=3), loaded.search(queries, k=3)):
+        assert np.array_equal(expected, result)
+    # Fewer results than k
+    distances, stroke_ids, _ = loaded.search(queries[:1], k=500, n_probe=1)
+    assert np.isinf(distances[0, -1]) and stroke_ids[0, -1] == -1
@@ -0,0 +1,54 @@
+import numpy as np
+
+from ..src.extraction import stroke_extraction
+from ..src.files import read_image
+from ..src.spatial import StrokeIndex
+
+
+def random_strokes(random, number):
+    starts = random.integers(-50, 300, size=(number, 1, 2))
+    return list(starts + np.cumsum(random.integers(-5, 6, size=(number, 8, 2)), axis=1))
+
+
+def test_query_rect():
+    random = np.random.default_rng(0)
+    strokes = random_strokes(random, 300)
+    index = StrokeIndex(cell_size=16)
+    assert list(index.insert(strokes[:100])) == list(range(100))
+    assert list(index.insert(strokes[100:])) == list(range(100, 300))
+    assert len(index) == 300
+
+    rects = [(0, 0, 50, 50), (-100, -100, 400, 400), (100, 120, 110, 300), (500, 500, 600, 600)]
+    for rect, result, exact_result in zip(rects, index.query_rects(rects),
+                                          index.query_rects(rects, exact=True)):
+        lower, upper = np.array(rect[:2]), np.array(rect[2:])
+        expected = [i for i, points in enumerate(strokes)
+                    if np.all(points.min(axis=0) <= upper) and np.all(points.max(axis=0) >= lower)]
+        expected_exact = [i for i, points in enumerate(strokes)
+                          if np.any(np.all((points >= lower) & (points <= upper), axis=1))]
+        assert result.tolist() == expected
+        assert exact_result.tolist() == expected_exact
+
+
+def test_nearest():
+    random = np.random.default_rng(1)
+    strokes = random_strokes(random, 200)
+    index = StrokeIndex.from_strokes(strokes, cell_size=8)
+    far_points = [(20000, 20000), (-20000, 150), (100, 30000)]
+    for point in np.vstack((random.integers(-100, 400, size=(20, 2)), far_points)):
+        distances = np.array([np.sqrt(((points - point) ** 2).sum(axis=1)).min()
+                              for points in strokes])
+        ids, values = index.nearest(point, k=5)
+        assert np.allclose(values, np.sort(distances)[:5])
+        assert np.allclose(distances[ids], values)
+    assert len(index.nearest((0, 0), k=500)[0]) == 200
+    assert len(StrokeIndex().nearest((0, 0))[0]) == 0
+
+
+def test_extracted_strokes():
+    strokes = stroke_extraction(read_image('data/tx.png'))
+    index = StrokeIndex.from_strokes(strokes)
+    assert index.query_rect((0, 0, 100, 100)).tolist() == list(range(len(strokes)))
+    ids, values = index.nearest(strokes[0].points[0])
+    assert values[0] == 0.0
+    assert np.array_equal(index.points(ids[0]), strokes[ids[0]].points)
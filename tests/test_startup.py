@@ -0,0 +1,24 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ['scipy.ndimage', 'skimage.filters', 'skimage.morphology', 'skimage.io',
+                 'sklearn.neighbors', 'plotly', 'PIL']
+
+
+def loaded_modules(statement):
+    code = f'import sys; {statement}; print(" ".join(sys.modules))'
+    output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, check=True,
+                            capture_output=True, text=True).stdout
+    return set(output.split())
+
+
+def test_import_main_is_light():
+    modules = loaded_modules('import main')
+    assert not modules.intersection(HEAVY_MODULES)
+
+
+def test_import_extraction_is_light():
+    modules = loaded_modules('import src.extraction, src.batch, src.sharding')
+    assert not modules.intersection(HEAVY_MODULES)
@@ -1,5 +1,7 @@
 import numpy as np
+from dataclasses import replace
 
+from ..src.config import DEFAULT_CONFIG
 from ..src.extraction.stroke import Stroke
 from ..src.extraction.chain_functions import centres_from_chain
 from .test_connection_functions import create_discs_set
@@ -45,6 +47,25 @@ def test_approximate_short():
     assert np.isclose(poly_x[0], 0.0) and np.isclose(poly_y[0], 0.0)
 
 
+def test_approximate_single_precision():
+    expected = create_example_stroke()
+    stroke = Stroke(expected.points, replace(DEFAULT_CONFIG, dtype='float32'))
+    assert stroke.poly_x.dtype == stroke.poly_y.dtype == stroke.appr_errors.dtype == np.float32
+    assert np.allclose(stroke.vector_of_features(), expected.vector_of_features(), atol=1e-4)
+    assert np.allclose(stroke.appr_errors, expected.appr_errors, atol=1e-4)
+
+
+def test_lazy_approximation():
+    stroke = Stroke(centres_from_chain(create_discs_set(), [0, 1, 2, 3, 4]))
+    stroke.divide_by_angles()
+    stroke.distinctness(create_example_stroke())
+    assert 'poly_x' not in vars(stroke)
+    expected_x, expected_y = Stroke(stroke.points).approximate()
+    assert np.array_equal(stroke.poly_x, expected_x)
+    assert np.array_equal(stroke.poly_y, expected_y)
+    assert len(stroke.appr_errors) == 5
+
+
 def test_is_good():
     stroke = create_example_stroke()
     poly_x, poly_y = stroke.approximate()
@@ -61,6 +82,19 @@ def test_divide_using_error():
     divided = stroke.divide_using_error()
     assert len(divided) == 1
     assert type(divided[0]) is Stroke
+    assert np.shares_memory(divided[0].points, stroke.points)
+
+
+def test_divide_by_angles():
+    points = [(0, 0), (0, 1), (0, 2), (0, 3), (1, 3), (2, 3), (3, 3)]
+    stroke = Stroke(points)
+    assert stroke.points.shape == (7, 2)
+    divided = stroke.divide_by_angles()
+    assert [str(s) for s in divided] == ['(0, 0)->(0, 1)->(0, 2)->(0, 3)',
+                                         '(0, 3)->(1, 3)->(2, 3)->(3, 3)']
+    assert all(np.shares_memory(s.points, stroke.points) for s in divided)
+    straight = Stroke(points[:4])
+    assert straight.divide_by_angles() == [straight]
 
 
 def test_vector_of_features():
@@ -78,3 +112,12 @@ def test_distinctness():
     assert np.isclose(distinctness_1b, 0.0)
     assert np.isclose(distinctness_12, 0.5)
     assert np.isclose(distinctness_21, 0.333333)
+
+
+def test_transform():
+    stroke = create_example_stroke()
+    expected = Stroke([2.5 * np.asarray(p) - 1.0 for p in stroke.points])
+    stroke.transform(2.5, -1.0)
+    assert np.allclose(stroke.vector_of_features(), expected.vector_of_features())
+    assert np.isclose(stroke.length, expected.length)
+    assert np.allclose(stroke.appr_errors, expected.appr_errors)
@@ -1,4 +1,5 @@
-from ..src.extraction.stroke_functions import recursive_stroke_analyze, chains_to_strokes
+from ..src.extraction.stroke_functions import recursive_stroke_analyze, chains_to_strokes, \
+    overlapping_pairs
 from ..src.extraction.stroke import Stroke
 from ..src.extraction.chain_functions import centres_from_chain
 from .test_connection_functions import create_discs_set
@@ -19,3 +20,11 @@ def test_chains_to_strokes():
     assert len(strokes) == 2
     assert strokes[0].is_good()
     assert strokes[1].is_good()
+
+
+def test_overlapping_pairs():
+    discs = create_discs_set()
+    chains = [[0, 1, 2], [2, 3, 4], [1, 0, 3]]
+    strokes = [Stroke(centres_from_chain(discs, chain)) for chain in chains]
+    strokes.append(Stroke([discs[4].centre + 10, discs[3].centre + 10, discs[2].centre + 10]))
+    assert overlapping_pairs(strokes) == [(0, 1), (0, 2), (1, 2)]
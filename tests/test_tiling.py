@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from skimage.filters import threshold_otsu
+
+from ..src.config import ExtractionConfig
+from ..src.extraction import stroke_extraction
+from ..src.extraction import tiling
+from ..src.extraction.tiling import split_into_tiles, tiled_threshold, tiled_stroke_extraction
+from ..src.files import read_image
+from .test_rescaling import example_image
+
+
+def test_split_into_tiles():
+    grid = split_into_tiles((50, 75), tile_size=32, halo=4)
+    assert len(grid) == 2
+    assert len(grid[0]) == 3
+    assert grid[0][0].core == (0, 32, 0, 32)
+    assert grid[0][0].region == (0, 36, 0, 36)
+    assert grid[1][2].core == (32, 50, 64, 75)
+    assert grid[1][2].region == (28, 50, 60, 75)
+
+
+def test_tiled_threshold():
+    input_image = read_image('data/tx.png')
+    tiles = [tile for row in split_into_tiles(input_image.shape, 16) for tile in row]
+    assert tiled_threshold(input_image, tiles) == threshold_otsu(input_image)
+    input_uint8 = (input_image * 255).astype(np.uint8)
+    assert tiled_threshold(input_uint8, tiles) == threshold_otsu(input_uint8)
+
+
+def test_tiled_extraction_as_whole_image():
+    input_image = read_image('data/tx.png')
+    expected = [str(s) for s in stroke_extraction(input_image)]
+    for tile_size in [16, 25, 1024]:
+        strokes = tiled_stroke_extraction(input_image, tile_size=tile_size)
+        assert [str(s) for s in strokes] == expected
+
+
+def test_tiled_extraction_parallel():
+    input_image = read_image('data/tx.png')
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        strokes = tiled_stroke_extraction(input_image, tile_size=20, executor=executor,
+                                          window=2)
+    assert [str(s) for s in strokes] == [str(s) for s in stroke_extraction(input_image)]
+
+
+class CountingImage:
+    """Image that counts reads of its regions"""
+
+    def __init__(self, image):
+        self.image = image
+        self.shape = image.shape
+        self.dtype = image.dtype
+        self.reads = 0
+
+    def __getitem__(self, key):
+        self.reads += 1
+        return self.image[key]
+
+
+def test_tiled_extraction_reads_lazily(monkeypatch):
+    input_image = CountingImage(read_image('data/tx.png'))
+    reads = []
+
+    def counting_process_tile(*args):
+        reads.append(input_image.reads)
+        return process_tile(*args)
+
+    process_tile = tiling.process_tile
+    monkeypatch.setattr(tiling, 'process_tile', counting_process_tile)
+    strokes = tiled_stroke_extraction(input_image, tile_size=20)
+    assert [str(s) for s in strokes] == [str(s) for s in stroke_extraction(input_image.image)]
+    # Each tile is read just before it is processed
+    assert len(reads) > 1
+    assert reads == list(range(reads[0], reads[0] + len(reads)))
+
+
+def test_tiled_extraction_min_area():
+    input_image = read_image('data/tx.png')
+    input_image[5:7, 5:7] = 0.0
+    config = ExtractionConfig(min_area=400)
+    expected = [str(s) for s in stroke_extraction(input_image, config)]
+    strokes = tiled_stroke_extraction(input_image, config, tile_size=20)
+    assert [str(s) for s in strokes] == expected
+
+
+def test_tiled_extraction_rescaling():
+    with pytest.raises(ValueError):
+        tiled_stroke_extraction(example_image(), ExtractionConfig(target_width=4.0))